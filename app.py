@@ -1,11 +1,28 @@
+import functools
+import os
+import tempfile
+
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
 
-from database import SalesData
-from visualizations import SalesVisualizations
+from config import (
+    APPROX_CONFIG,
+    DATA_BACKEND,
+    FETCH_CONFIG,
+    INSTRUMENTATION_CONFIG,
+    LOCAL_STORE_CONFIG,
+    PAGINATION_CONFIG,
+)
+from database import SalesData, empty_snapshot, page_cursor
+from export import EXPORT_FORMATS, SalesExporter
+from formatting import format_brl, format_number
+from local_store import LocalSalesData
+from prewarm import CacheWarmer
+from rollups import recent_days
+from visualizations import GRANULARITY_LABELS, SalesVisualizations
 
 # Configuração da página
 st.set_page_config(
@@ -46,17 +63,219 @@ st.markdown(
 )
 
 
-@st.cache_resource(ttl=300)  # Cache por 5 minutos para recursos de banco
+@st.cache_resource
 def load_data():
-    """Carrega dados do banco com cache"""
+    """Carrega dados do banco com cache
+
+    Sem TTL: o pool renova as conexões e o cache de resultados, os dados;
+    descartar o objeto só derrubaria conexões e caches aquecidos.
+    """
     try:
-        sales_data = SalesData()
+        if DATA_BACKEND == "local":
+            sales_data = LocalSalesData()
+        else:
+            sales_data = SalesData()
         return sales_data
     except Exception as e:
         st.error(f"Erro ao conectar com o banco de dados: {e}")
         return None
 
 
+@st.cache_resource
+def load_warmer(_sales_data):
+    """Inicia o pré-aquecimento do cache, uma thread por processo"""
+    warmer = CacheWarmer.from_config(_sales_data)
+    return warmer.start() if warmer is not None else None
+
+
+@st.cache_resource
+def load_visualizations():
+    """Gráficos com o cache de figuras compartilhado entre as execuções"""
+    return SalesVisualizations()
+
+
+def show_performance_panel(sales_data, viz, warmer=None):
+    """Painel oculto com as métricas de cada método de SalesData
+
+    Aparece com ?perf=1 na URL ou SHOW_PERFORMANCE_PANEL=true.
+    """
+    if not (INSTRUMENTATION_CONFIG["show_panel"] or st.query_params.get("perf") == "1"):
+        return
+
+    with st.sidebar.expander("⏱️ Performance"):
+        summary = sales_data.stats.summary()
+        if summary.empty:
+            st.caption("Nenhuma chamada registrada ainda.")
+        else:
+            st.dataframe(
+                summary.round({"p50_ms": 1, "p95_ms": 1, "p99_ms": 1, "taxa_cache": 2}),
+                hide_index=True,
+            )
+
+        if sales_data.cache is not None:
+            st.caption("Cache de resultados")
+            st.json(sales_data.cache.stats())
+        if viz.figure_cache is not None:
+            st.caption("Cache de figuras")
+            st.json(viz.figure_cache.stats())
+        if warmer is not None:
+            st.caption("Pré-aquecimento do cache")
+            st.json(warmer.stats())
+        if sales_data.cube is not None:
+            st.caption("Cubo de vendas")
+            st.json(sales_data.cube.stats())
+        if sales_data.db is not None and sales_data.db.pool is not None:
+            st.caption("Pool de conexões")
+            st.json(sales_data.db.pool.stats())
+
+        for method, plan in sales_data.stats.plans().items():
+            st.caption(f"Plano de {method}")
+            st.code(plan, language="text")
+
+        st.download_button(
+            "📥 Métricas (Prometheus)",
+            data=sales_data.stats.to_prometheus(),
+            file_name="sales_metrics.prom",
+            mime="text/plain",
+        )
+
+
+# Aviso mostrado nos painéis calculados sobre a amostra
+ESTIMATE_NOTICE = "≈ Estimativa por amostragem; atualizando com os valores exatos…"
+
+
+def period_sales(sales_data, snapshot, start_date, end_date, filters, estimated=False):
+    """Vendas no período: (quantidade, texto da métrica)
+
+    Usa o total do snapshot e, sem ele, a contagem do backend (a estimativa
+    do planejador, no Postgres); só valores aproximados levam "≈".
+    """
+    total_sales = snapshot["total_sales"]
+    if not total_sales.empty:
+        count = int(total_sales["total_vendas"].iloc[0])
+        return count, ("≈ " if estimated else "") + format_number(count)
+    count = sales_data.get_sales_count_estimate(start_date, end_date, **filters)
+    if not count:
+        return count, None
+    return count, ("" if sales_data.exact_count else "≈ ") + format_number(count)
+
+
+def show_snapshot(slots, snapshot, viz, period, estimated=False):
+    """Desenha as métricas e os painéis do snapshot nos espaços reservados
+
+    Com estimated, os valores vêm da amostra: as métricas levam "≈" e a
+    margem de erro, e os gráficos, o aviso de estimativa. Chamar de novo
+    com o snapshot exato substitui o conteúdo.
+    """
+    prefix = "≈ " if estimated else ""
+    metrics = slots["metrics"]
+    total_sales = snapshot["total_sales"]
+    if not total_sales.empty:
+        # Períodos sem vendas têm SUM/AVG nulos: exibidos como zero
+        row = total_sales.iloc[0].fillna(0)
+        margins = {}
+        if estimated:
+            margins = {
+                "count": f"± {format_number(row['margem_quantidade'])}",
+                "value": f"± {format_brl(row['margem_valor'])}",
+            }
+        metrics[0].metric(
+            "Total de Vendas",
+            prefix + format_number(row["total_vendas"]),
+            help=margins.get("count"),
+        )
+        metrics[1].metric(
+            "Valor Total",
+            prefix + format_brl(row["valor_total_vendas"]),
+            help=margins.get("value"),
+        )
+        metrics[2].metric("Valor Médio", prefix + format_brl(row["valor_medio_venda"]))
+    else:
+        for slot in metrics[:3]:
+            slot.empty()
+    if period:
+        metrics[3].metric("Vendas no Período", period)
+    else:
+        metrics[3].empty()
+
+    panels = {
+        "sales_by_model": (
+            "sales_by_model",
+            viz.create_sales_by_model_chart,
+            "Nenhum dado de vendas por modelo disponível.",
+        ),
+        "sales_by_dealership": (
+            "sales_by_dealership",
+            viz.create_sales_by_dealership_chart,
+            "Nenhum dado de vendas por concessionária disponível.",
+        ),
+        "sales_by_salesperson": (
+            "sales_by_salesperson",
+            viz.create_sales_by_salesperson_chart,
+            "Nenhum dado de vendas por vendedor disponível.",
+        ),
+        "pie": ("sales_by_model", viz.create_pie_chart_models, None),
+    }
+    for name, (panel, create_chart, empty_message) in panels.items():
+        data = snapshot[panel]
+        if data.empty:
+            # Sem mensagem, o espaço é limpo: não sobra a estimativa anterior
+            if empty_message:
+                slots[name].info(empty_message)
+            else:
+                slots[name].empty()
+            continue
+        with slots[name].container():
+            if estimated:
+                st.caption(ESTIMATE_NOTICE)
+            fig = create_chart(data)
+            if fig:
+                # Chave própria: a estimativa e o exato são elementos distintos
+                key = f"{name}-{'estimativa' if estimated else 'exato'}"
+                st.plotly_chart(fig, use_container_width=True, key=key)
+
+
+def sales_browser_state(key):
+    """Cursores das páginas já visitadas da tabela de vendas
+
+    O estado é reiniciado na primeira página quando o período ou os
+    filtros (key) mudam.
+    """
+    state = st.session_state.get("sales_browser")
+    if state is None or state["key"] != key:
+        state = {"key": key, "cursors": [None], "page": 0}
+        st.session_state["sales_browser"] = state
+    return state
+
+
+def next_sales_page(state, cursor):
+    """Avança uma página, guardando o cursor para poder voltar"""
+    del state["cursors"][state["page"] + 1 :]
+    state["cursors"].append(cursor)
+    state["page"] += 1
+
+
+def previous_sales_page(state):
+    """Volta uma página usando o cursor já guardado"""
+    state["page"] = max(state["page"] - 1, 0)
+
+
+def open_export(path):
+    """Abre o arquivo exportado só quando o download é solicitado
+
+    O Streamlit lê o arquivo direto do handle, sem uma cópia intermediária
+    dos bytes no app.
+    """
+    return open(path, "rb")
+
+
+def discard_export():
+    """Remove o arquivo da exportação anterior desta sessão"""
+    export = st.session_state.pop("export", None)
+    if export and os.path.exists(export[1]):
+        os.remove(export[1])
+
+
 def main():
     # Cabeçalho
     st.markdown(
@@ -72,11 +291,24 @@ def main():
         )
         return
 
-    viz = SalesVisualizations()
+    warmer = load_warmer(sales_data)
+    viz = load_visualizations()
 
     # Sidebar para filtros
     st.sidebar.title("📊 Filtros")
 
+    # Indicador de atualização quando os dados vêm do snapshot local
+    synced_at = sales_data.data_freshness()
+    if synced_at is not None:
+        age = (datetime.now() - synced_at).total_seconds()
+        message = (
+            f"Dados locais sincronizados em {synced_at.strftime('%d/%m/%Y %H:%M')}"
+        )
+        if age > LOCAL_STORE_CONFIG["max_age"]:
+            st.sidebar.warning(f"{message} (desatualizados)")
+        else:
+            st.sidebar.caption(message)
+
     # Filtro de período
     st.sidebar.subheader("Período")
     period_option = st.sidebar.selectbox(
@@ -92,16 +324,14 @@ def main():
 
     start_date = None
     end_date = None
-
+    # Períodos prontos em dias inteiros: o rollup diário e o cube respondem
+    # por eles, e a chave do cache só muda na virada do dia
     if period_option == "Últimos 30 dias":
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)
+        start_date, end_date = recent_days(30)
     elif period_option == "Últimos 90 dias":
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=90)
+        start_date, end_date = recent_days(90)
     elif period_option == "Último ano":
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=365)
+        start_date, end_date = recent_days(365)
     elif period_option == "Período personalizado":
         start_date = st.sidebar.date_input(
             "Data inicial", datetime.now() - timedelta(days=30)
@@ -110,150 +340,272 @@ def main():
         start_date = datetime.combine(start_date, datetime.min.time())
         end_date = datetime.combine(end_date, datetime.max.time())
 
-    # Carrega dados com filtro de período
+    # Agrupamento do gráfico de tendência, calculado pelo banco
+    granularity = st.sidebar.selectbox(
+        "Agrupar tendência por:",
+        list(GRANULARITY_LABELS),
+        format_func=GRANULARITY_LABELS.get,
+    )
+
+    # Filtros de dimensão, aplicados pelo banco em todos os painéis
+    st.sidebar.subheader("Dimensões")
+    options = sales_data.get_filter_options()
+    filters = {
+        "dealership": st.sidebar.multiselect(
+            "Concessionárias:", options.get("dealership", [])
+        ),
+        "state": st.sidebar.multiselect("Estados:", options.get("state", [])),
+        "model": st.sidebar.multiselect("Modelos:", options.get("model", [])),
+        "salesperson": st.sidebar.multiselect(
+            "Vendedores:", options.get("salesperson", [])
+        ),
+    }
+    filters = {name: values or None for name, values in filters.items()}
+
     if start_date and end_date:
-        recent_sales = sales_data.get_sales_period(start_date, end_date)
         st.sidebar.info(
             f"Período: {start_date.strftime('%d/%m/%Y')} a {end_date.strftime('%d/%m/%Y')}"
         )
-    else:
-        recent_sales = sales_data.get_recent_sales(1000)  # Últimas 1000 vendas
-
-    # Métricas principais
-    st.subheader("📈 Métricas Principais")
-
-    col1, col2, col3, col4 = st.columns(4)
-
-    with col1:
-        total_sales = sales_data.get_total_sales()
-        if not total_sales.empty:
-            total_vendas = total_sales["total_vendas"].iloc[0]
-            st.metric("Total de Vendas", f"{total_vendas:,}".replace(",", "."))
 
-    with col2:
-        if not total_sales.empty:
-            valor_total = total_sales["valor_total_vendas"].iloc[0]
-            st.metric(
-                "Valor Total",
-                f"R$ {valor_total:,.2f}".replace(",", "X")
-                .replace(".", ",")
-                .replace("X", "."),
+    # Exportação das vendas do período direto do banco
+    st.sidebar.subheader("Exportação")
+    if start_date and end_date:
+        export_format = st.sidebar.selectbox("Formato:", list(EXPORT_FORMATS))
+        extension = EXPORT_FORMATS[export_format]["extension"]
+        export_key = (export_format, start_date, end_date, str(filters))
+        if st.sidebar.button("Gerar arquivo"):
+            # O arquivo vai para o disco; a sessão guarda só o caminho
+            discard_export()
+            fd, path = tempfile.mkstemp(prefix="vendas_", suffix=f".{extension}")
+            os.close(fd)
+            rows = SalesExporter(sales_data).export(
+                start_date, end_date, path, export_format, **filters
             )
-
-    with col3:
-        if not total_sales.empty:
-            valor_medio = total_sales["valor_medio_venda"].iloc[0]
-            st.metric(
-                "Valor Médio",
-                f"R$ {valor_medio:,.2f}".replace(",", "X")
-                .replace(".", ",")
-                .replace("X", "."),
+            if rows is None:
+                st.sidebar.error("Não foi possível exportar as vendas.")
+            else:
+                st.session_state["export"] = (export_key, path)
+
+        export = st.session_state.get("export")
+        if export and export[0] == export_key and os.path.exists(export[1]):
+            st.sidebar.download_button(
+                "📥 Baixar vendas",
+                data=functools.partial(open_export, export[1]),
+                file_name=f"vendas_{start_date:%Y%m%d}_{end_date:%Y%m%d}.{extension}",
+                mime=EXPORT_FORMATS[export_format]["mime"],
             )
+    else:
+        st.sidebar.caption("Selecione um período para exportar as vendas.")
 
-    with col4:
-        if not recent_sales.empty:
-            vendas_periodo = len(recent_sales)
-            st.metric("Vendas no Período", f"{vendas_periodo:,}".replace(",", "."))
+    # Espaços dos painéis do snapshot, redesenhados quando o resultado exato
+    # substitui a estimativa
+    st.subheader("📈 Métricas Principais")
+    slots = {"metrics": [col.empty() for col in st.columns(4)]}
 
     st.markdown("---")
 
-    # Gráficos principais
     col1, col2 = st.columns(2)
-
     with col1:
         st.subheader("🚗 Vendas por Modelo")
-        sales_by_model = sales_data.get_sales_by_model()
-        if not sales_by_model.empty:
-            fig_model = viz.create_sales_by_model_chart(sales_by_model)
-            if fig_model:
-                st.plotly_chart(fig_model, use_container_width=True)
-        else:
-            st.info("Nenhum dado de vendas por modelo disponível.")
-
+        slots["sales_by_model"] = st.empty()
     with col2:
         st.subheader("📅 Vendas por Mês")
-        sales_by_month = sales_data.get_sales_by_month()
-        if not sales_by_month.empty:
-            fig_month = viz.create_sales_by_month_chart(sales_by_month)
-            if fig_month:
-                st.plotly_chart(fig_month, use_container_width=True)
-        else:
-            st.info("Nenhum dado de vendas por mês disponível.")
+        month_slot = st.empty()
 
-    # Gráficos de concessionárias e vendedores
     col1, col2 = st.columns(2)
-
     with col1:
         st.subheader("🏢 Vendas por Concessionária")
-        sales_by_dealership = sales_data.get_sales_by_dealership()
-        if not sales_by_dealership.empty:
-            fig_dealership = viz.create_sales_by_dealership_chart(sales_by_dealership)
-            if fig_dealership:
-                st.plotly_chart(fig_dealership, use_container_width=True)
-        else:
-            st.info("Nenhum dado de vendas por concessionária disponível.")
-
+        slots["sales_by_dealership"] = st.empty()
     with col2:
         st.subheader("👥 Vendas por Vendedor")
-        sales_by_salesperson = sales_data.get_sales_by_salesperson()
-        if not sales_by_salesperson.empty:
-            fig_salesperson = viz.create_sales_by_salesperson_chart(
-                sales_by_salesperson
-            )
-            if fig_salesperson:
-                st.plotly_chart(fig_salesperson, use_container_width=True)
-        else:
-            st.info("Nenhum dado de vendas por vendedor disponível.")
+        slots["sales_by_salesperson"] = st.empty()
 
-    # Gráficos adicionais
     st.markdown("---")
 
     col1, col2 = st.columns(2)
-
     with col1:
         st.subheader("🥧 Distribuição por Modelo")
-        if not sales_by_model.empty:
-            fig_pie = viz.create_pie_chart_models(sales_by_model)
-            if fig_pie:
-                st.plotly_chart(fig_pie, use_container_width=True)
-
+        slots["pie"] = st.empty()
     with col2:
         st.subheader("📊 Tendência de Vendas")
-        if not recent_sales.empty:
-            fig_trend = viz.create_sales_trend_chart(recent_sales)
+        trend_slot = st.empty()
+
+    # Painéis agregados e vendas do período são buscados em paralelo, cada
+    # consulta em sua própria conexão do pool
+    requests = {
+        "months": lambda: sales_data.get_sales_timeseries(
+            "month", start_date, end_date, **filters
+        ),
+        "trend": lambda: sales_data.get_sales_timeseries(
+            granularity, start_date, end_date, **filters
+        ),
+        "heatmap": lambda: sales_data.get_sales_heatmap(
+            start_date, end_date, **filters
+        ),
+    }
+    # No modo aproximado, a estimativa por amostragem aparece logo e o
+    # snapshot exato segue em segundo plano
+    pending = None
+    if APPROX_CONFIG["enabled"]:
+        snapshot, pending = sales_data.fetch_snapshot_progressive(
+            start_date, end_date, **filters
+        )
+        if snapshot is None:
+            st.warning("Alguns painéis não puderam ser carregados: snapshot")
+            snapshot = empty_snapshot()
+        _, period = period_sales(
+            sales_data, snapshot, start_date, end_date, filters, pending is not None
+        )
+        show_snapshot(slots, snapshot, viz, period, estimated=pending is not None)
+    else:
+        requests["snapshot"] = lambda: sales_data.get_dashboard_snapshot(
+            start_date, end_date, **filters
+        )
+    # Tabela de vendas paginada por keyset: cada página custa o mesmo,
+    # qualquer que seja a profundidade
+    page_size = PAGINATION_CONFIG["page_size"]
+    browser = sales_browser_state(
+        (start_date, end_date, tuple(sorted(filters.items())))
+    )
+    page_after = browser["cursors"][browser["page"]]
+    requests["sales"] = lambda: sales_data.get_sales_page(
+        page_after, page_size, start_date, end_date, **filters
+    )
+
+    results, errors = sales_data.fetch_many(requests)
+    if errors:
+        st.warning(
+            "Alguns painéis não puderam ser carregados: " + ", ".join(sorted(errors))
+        )
+    if not APPROX_CONFIG["enabled"]:
+        snapshot = results["snapshot"] or empty_snapshot()
+        _, period = period_sales(sales_data, snapshot, start_date, end_date, filters)
+        show_snapshot(slots, snapshot, viz, period)
+    sales_by_month = (
+        results["months"] if results["months"] is not None else pd.DataFrame()
+    )
+    trend = results["trend"] if results["trend"] is not None else pd.DataFrame()
+    heatmap = results["heatmap"] if results["heatmap"] is not None else pd.DataFrame()
+    recent_sales = results["sales"] if results["sales"] is not None else pd.DataFrame()
+    if PAGINATION_CONFIG["prefetch"]:
+        # A próxima página já fica no cache quando o usuário avançar
+        sales_data.prefetch_sales_page(
+            recent_sales,
+            page_size,
+            start_date=start_date,
+            end_date=end_date,
+            **filters,
+        )
+
+    # Total de vendas para a paginação: o exato dos agregados, senão a
+    # estimativa do planejador; com a amostra ainda na tela, não há total
+    vendas_periodo = None
+    if pending is None:
+        vendas_periodo, _ = period_sales(
+            sales_data, snapshot, start_date, end_date, filters
+        )
+
+    with month_slot.container():
+        if not sales_by_month.empty:
+            fig_month = viz.create_sales_by_month_chart(sales_by_month)
+            if fig_month:
+                st.plotly_chart(fig_month, use_container_width=True)
+        else:
+            st.info("Nenhum dado de vendas por mês disponível.")
+
+    with trend_slot.container():
+        if not trend.empty:
+            fig_trend = viz.create_sales_trend_chart(trend, granularity)
             if fig_trend:
                 st.plotly_chart(fig_trend, use_container_width=True)
 
+    # Heatmap de concessionárias por mês, já pivotado pelo banco
+    st.markdown("---")
+    st.subheader("🗺️ Vendas por Concessionária e Mês")
+    if not heatmap.empty:
+        fig_heatmap = viz.create_heatmap_dealership_month(heatmap)
+        if fig_heatmap:
+            st.plotly_chart(fig_heatmap, use_container_width=True)
+    else:
+        st.info("Nenhum dado de vendas por concessionária e mês disponível.")
+
     # Tabela de vendas recentes
     st.markdown("---")
     st.subheader("📋 Vendas Recentes")
 
     if not recent_sales.empty:
-        # Formata a coluna de data
-        recent_sales_display = recent_sales.copy()
-        recent_sales_display["data_venda"] = recent_sales_display[
-            "data_venda"
-        ].dt.strftime("%d/%m/%Y %H:%M")
-        recent_sales_display["valor_pago"] = recent_sales_display["valor_pago"].apply(
-            lambda x: f"R$ {x:,.2f}".replace(",", "X")
-            .replace(".", ",")
-            .replace("X", ".")
+        # Valor formatado de uma vez para a coluna inteira; a data é formatada
+        # só na exibição, sem gerar texto para cada linha
+        recent_sales_display = (
+            recent_sales.drop(columns="id_vendas")
+            .assign(valor_pago=format_brl(recent_sales["valor_pago"]))
+            .rename(
+                columns={
+                    "data_venda": "Data/Hora",
+                    "modelo": "Modelo",
+                    "concessionaria": "Concessionária",
+                    "vendedor": "Vendedor",
+                    "cliente": "Cliente",
+                    "valor_pago": "Valor Pago",
+                }
+            )
         )
 
-        # Renomeia colunas
-        recent_sales_display.columns = [
-            "Data/Hora",
-            "Modelo",
-            "Concessionária",
-            "Vendedor",
-            "Cliente",
-            "Valor Pago",
-        ]
-
-        st.dataframe(recent_sales_display, use_container_width=True, hide_index=True)
+        st.dataframe(
+            recent_sales_display,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Data/Hora": st.column_config.DatetimeColumn(format="DD/MM/YYYY HH:mm")
+            },
+        )
+
+        # Navegação entre páginas
+        page_number = browser["page"] + 1
+        total_pages = -(-vendas_periodo // page_size) if vendas_periodo else None
+        has_next = len(recent_sales) == page_size and (
+            total_pages is None or page_number < total_pages
+        )
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            st.button(
+                "◀ Anterior",
+                disabled=browser["page"] == 0,
+                on_click=previous_sales_page,
+                args=(browser,),
+            )
+        with col2:
+            pages = f" de {format_number(total_pages)}" if total_pages else ""
+            st.caption(f"Página {page_number}{pages}")
+        with col3:
+            st.button(
+                "Próxima ▶",
+                disabled=not has_next,
+                on_click=next_sales_page,
+                args=(browser, page_cursor(recent_sales)),
+            )
+    elif browser["page"] > 0:
+        st.info("Nenhuma venda nesta página.")
+        st.button("◀ Anterior", on_click=previous_sales_page, args=(browser,))
     else:
         st.info("Nenhuma venda recente encontrada.")
 
+    # Os painéis exatos substituem a estimativa assim que ficam prontos
+    if pending is not None:
+        try:
+            snapshot = pending.result(timeout=FETCH_CONFIG["timeout"])
+        except Exception as e:
+            print(f"Erro ao carregar o snapshot exato: {e!r}")
+            st.warning("Alguns painéis não puderam ser carregados: snapshot")
+            # Sem os valores exatos, a estimativa não fica na tela como se
+            # ainda fosse ser atualizada
+            show_snapshot(slots, empty_snapshot(), viz, None)
+        else:
+            _, period = period_sales(
+                sales_data, snapshot, start_date, end_date, filters
+            )
+            show_snapshot(slots, snapshot, viz, period)
+
     # Informações adicionais
     st.markdown("---")
     st.subheader("ℹ️ Informações do Sistema")
@@ -268,6 +620,7 @@ def main():
         - 🚗 Análise de vendas por modelo
         - 📅 Análise temporal de vendas
         - 🏢 Comparação entre concessionárias
+        - 🗺️ Heatmap de concessionárias por mês
         - 👥 Performance dos vendedores
         - 📋 Lista de vendas recentes
         """
@@ -279,11 +632,14 @@ def main():
         **Filtros disponíveis:**
         - Período de análise
         - Filtros por data
+        - Concessionária, estado, modelo e vendedor
         - Visualizações interativas
         - Exportação de dados
         """
         )
 
+    show_performance_panel(sales_data, viz, warmer)
+
     # Footer
     st.markdown("---")
     st.markdown(
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Benchmark das consultas de SalesData e dos gráficos de SalesVisualizations
+
+Carrega dados sintéticos determinísticos em um Postgres local, mede cada
+método get_* e cada create_* em cada escala e grava os resultados em JSON,
+comparando-os com os limites de benchmarks/thresholds.json e, se informado,
+com um resultado anterior.
+
+Uso:
+    python -m benchmarks.run_benchmarks --scales 10k 1m --output bench.json
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import psycopg2
+
+from benchmarks import synthetic_data
+from config import DB_CONFIG
+from database import SalesData
+from visualizations import SalesVisualizations
+
+THRESHOLDS_FILE = os.path.join(os.path.dirname(__file__), "thresholds.json")
+
+PERIOD = (synthetic_data.END_DATE - timedelta(days=90), synthetic_data.END_DATE)
+
+# Argumentos dos métodos get_* que não têm valores padrão suficientes
+QUERY_ARGS = {
+    "get_recent_sales": (1000,),
+    "get_sales_period": PERIOD,
+}
+
+
+# Entrada de cada builder de SalesVisualizations, a partir dos resultados das consultas
+CHART_INPUTS = {
+    "create_total_sales_card": lambda frames: frames["get_total_sales"],
+    "create_sales_by_model_chart": lambda frames: frames["get_sales_by_model"],
+    "create_sales_by_month_chart": lambda frames: frames["get_sales_timeseries"],
+    "create_sales_by_dealership_chart": lambda frames: frames[
+        "get_sales_by_dealership"
+    ],
+    "create_sales_by_salesperson_chart": lambda frames: frames[
+        "get_sales_by_salesperson"
+    ],
+    "create_pie_chart_models": lambda frames: frames["get_sales_by_model"],
+    "create_sales_trend_chart": lambda frames: frames["get_sales_timeseries"],
+    "create_heatmap_dealership_month": lambda frames: frames["get_sales_heatmap"],
+}
+
+
+def query_cases():
+    """Métodos get_* de SalesData com os argumentos usados no benchmark"""
+    cases = {}
+    for name, method in inspect.getmembers(SalesData, inspect.isfunction):
+        if not name.startswith("get_"):
+            continue
+        if name in QUERY_ARGS:
+            cases[name] = QUERY_ARGS[name]
+            continue
+        required = [
+            p
+            for p in list(inspect.signature(method).parameters.values())[1:]
+            if p.default is inspect.Parameter.empty
+        ]
+        if required:
+            print(f"Aviso: {name} ignorado (sem argumentos de benchmark)")
+            continue
+        cases[name] = ()
+    return cases
+
+
+def chart_cases():
+    """Builders create_* de SalesVisualizations com entrada conhecida"""
+    cases = {}
+    for name, _ in inspect.getmembers(SalesVisualizations, inspect.isfunction):
+        if not name.startswith("create_"):
+            continue
+        if name not in CHART_INPUTS:
+            print(f"Aviso: {name} ignorado (sem entrada de benchmark)")
+            continue
+        cases[name] = CHART_INPUTS[name]
+    return cases
+
+
+def measure(func, repeat, warmup=1):
+    """Executa a função repeat vezes e retorna (último resultado, tempos)
+
+    As execuções de aquecimento não são medidas.
+    """
+    for _ in range(warmup):
+        func()
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return result, timings
+
+
+def summarize(timings):
+    values = np.asarray(timings)
+    return {
+        "min": float(values.min()),
+        "median": float(np.median(values)),
+        "p95": float(np.percentile(values, 95)),
+    }
+
+
+def ensure_database(db_config):
+    """Cria o banco de benchmark se ainda não existir"""
+    admin = psycopg2.connect(**{**db_config, "database": "postgres"})
+    admin.autocommit = True
+    try:
+        with admin.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_database WHERE datname = %s",
+                (db_config["database"],),
+            )
+            if cursor.fetchone() is None:
+                cursor.execute(f'CREATE DATABASE "{db_config["database"]}"')
+    finally:
+        admin.close()
+
+
+def prepare_scale(db_config, scale, seed):
+    """Garante que a escala pedida esteja carregada no banco de benchmark"""
+    connection = psycopg2.connect(**db_config)
+    try:
+        if synthetic_data.loaded_scale(connection) == (scale, seed):
+            return 0.0
+        started = time.perf_counter()
+        synthetic_data.load(connection, scale, seed)
+        return time.perf_counter() - started
+    finally:
+        connection.close()
+
+
+def run_scale(db_config, scale, repeat, seed):
+    """Mede todas as consultas e gráficos em uma escala"""
+    load_seconds = prepare_scale(db_config, scale, seed)
+    print(f"[{scale}] dados prontos (carga: {load_seconds:.1f}s)")
+
+    sales_data = SalesData(
+        cache=False,
+        incremental=False,
+        use_rollups=False,
+        db_config=db_config,
+        cube=False,
+    )
+    if not sales_data.connected:
+        raise RuntimeError("Não foi possível conectar ao banco de benchmark")
+
+    results = []
+    frames = {}
+    try:
+        for name, args in query_cases().items():
+            method = getattr(sales_data, name)
+            frame, timings = measure(lambda: method(*args), repeat)
+            frames[name] = frame
+            rows = len(frame) if isinstance(frame, pd.DataFrame) else None
+            results.append(
+                {"scale": scale, "kind": "query", "name": name, "rows": rows}
+                | summarize(timings)
+            )
+            print(f"[{scale}] {name}: {results[-1]['median'] * 1000:.1f} ms")
+    finally:
+        sales_data.close_connection()
+
+    viz = SalesVisualizations(figure_cache=False)
+    for name, make_input in chart_cases().items():
+        data = make_input(frames)
+        builder = getattr(viz, name)
+        figure, timings = measure(lambda: builder(data), repeat)
+        size = len(figure.to_json()) if hasattr(figure, "to_json") else None
+        results.append(
+            {"scale": scale, "kind": "chart", "name": name, "rows": len(data)}
+            | summarize(timings)
+            | {"json_bytes": size}
+        )
+        print(f"[{scale}] {name}: {results[-1]['median'] * 1000:.1f} ms")
+
+    return results
+
+
+def check_regressions(
+    results, thresholds, baseline=None, max_slowdown=1.25, min_delta=0.02
+):
+    """Marca cada resultado como aprovado ou não e retorna as falhas
+
+    Em relação ao resultado anterior, só conta como regressão uma piora
+    relativa acima de max_slowdown que também some mais de min_delta
+    segundos, para não acusar ruído em medições de milissegundos.
+    """
+    previous = {}
+    if baseline:
+        previous = {(r["scale"], r["name"]): r for r in baseline["results"]}
+
+    failures = []
+    for result in results:
+        limits = thresholds.get(result["scale"], {})
+        limit = limits.get(result["name"], limits.get(f"default_{result['kind']}"))
+        result["threshold"] = limit
+        result["passed"] = limit is None or result["median"] <= limit
+
+        before = previous.get((result["scale"], result["name"]))
+        if before:
+            result["slowdown"] = result["median"] / max(before["median"], 1e-9)
+            delta = result["median"] - before["median"]
+            if result["slowdown"] > max_slowdown and delta > min_delta:
+                result["passed"] = False
+
+        if not result["passed"]:
+            failures.append(result)
+    return failures
+
+
+def main(argv=None):
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Benchmark do dashboard de vendas")
+    parser.add_argument(
+        "--scales",
+        nargs="+",
+        choices=list(synthetic_data.SCALES),
+        default=["10k"],
+    )
+    parser.add_argument(
+        "--database", default=os.getenv("BENCH_DB_NAME", "concessionaria_bench")
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--thresholds", default=THRESHOLDS_FILE)
+    parser.add_argument("--baseline", help="Resultado anterior para comparação")
+    parser.add_argument("--max-slowdown", type=float, default=1.25)
+    parser.add_argument("--min-delta", type=float, default=0.02)
+    args = parser.parse_args(argv)
+
+    # O carregamento recria as tabelas: nunca aponte para o banco da aplicação
+    if args.database == DB_CONFIG["database"]:
+        print("Erro: o banco de benchmark não pode ser o banco configurado em DB_NAME")
+        sys.exit(1)
+
+    db_config = {**DB_CONFIG, "database": args.database}
+    ensure_database(db_config)
+
+    results = []
+    for scale in args.scales:
+        results.extend(run_scale(db_config, scale, args.repeat, args.seed))
+
+    with open(args.thresholds, encoding="utf-8") as f:
+        thresholds = json.load(f)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    failures = check_regressions(
+        results, thresholds, baseline, args.max_slowdown, args.min_delta
+    )
+
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados gravados em {args.output}")
+
+    if failures:
+        for result in failures:
+            print(
+                f"❌ Regressão: [{result['scale']}] {result['name']} "
+                f"mediana {result['median'] * 1000:.1f} ms"
+            )
+        sys.exit(1)
+    print("✅ Nenhuma regressão encontrada")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Gerador determinístico de dados sintéticos para o schema da concessionária
+"""
+
+import io
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Número de vendas de cada escala de benchmark
+SCALES = {
+    "10k": 10_000,
+    "1m": 1_000_000,
+    "10m": 10_000_000,
+}
+
+START_DATE = datetime(2021, 1, 1)
+END_DATE = datetime(2025, 1, 1)
+
+CHUNK_SIZE = 500_000
+
+SCHEMA_DDL = """
+DROP TABLE IF EXISTS vendas, clientes, vendedores, veiculos,
+    concessionarias, cidades, estados, bench_meta CASCADE;
+
+CREATE TABLE estados (
+    id_estados integer PRIMARY KEY,
+    estado varchar(100) NOT NULL,
+    sigla char(2) NOT NULL,
+    data_inclusao timestamp NOT NULL DEFAULT now(),
+    data_atualizacao timestamp NOT NULL DEFAULT now()
+);
+CREATE TABLE cidades (
+    id_cidades integer PRIMARY KEY,
+    cidade varchar(255) NOT NULL,
+    id_estados integer NOT NULL REFERENCES estados,
+    data_inclusao timestamp NOT NULL DEFAULT now(),
+    data_atualizacao timestamp NOT NULL DEFAULT now()
+);
+CREATE TABLE concessionarias (
+    id_concessionarias integer PRIMARY KEY,
+    concessionaria varchar(255) NOT NULL,
+    id_cidades integer NOT NULL REFERENCES cidades,
+    data_inclusao timestamp NOT NULL DEFAULT now(),
+    data_atualizacao timestamp NOT NULL DEFAULT now()
+);
+CREATE TABLE veiculos (
+    id_veiculos integer PRIMARY KEY,
+    nome varchar(255) NOT NULL,
+    tipo varchar(100) NOT NULL,
+    valor decimal(10, 2) NOT NULL,
+    data_inclusao timestamp NOT NULL DEFAULT now(),
+    data_atualizacao timestamp NOT NULL DEFAULT now()
+);
+CREATE TABLE vendedores (
+    id_vendedores integer PRIMARY KEY,
+    nome varchar(255) NOT NULL,
+    id_concessionarias integer NOT NULL REFERENCES concessionarias,
+    data_inclusao timestamp NOT NULL DEFAULT now(),
+    data_atualizacao timestamp NOT NULL DEFAULT now()
+);
+CREATE TABLE clientes (
+    id_clientes integer PRIMARY KEY,
+    cliente varchar(255) NOT NULL,
+    endereco text NOT NULL,
+    id_concessionarias integer NOT NULL REFERENCES concessionarias,
+    data_inclusao timestamp NOT NULL DEFAULT now(),
+    data_atualizacao timestamp NOT NULL DEFAULT now()
+);
+CREATE TABLE vendas (
+    id_vendas integer PRIMARY KEY,
+    id_veiculos integer NOT NULL REFERENCES veiculos,
+    id_concessionarias integer NOT NULL REFERENCES concessionarias,
+    id_vendedores integer NOT NULL REFERENCES vendedores,
+    id_clientes integer NOT NULL REFERENCES clientes,
+    valor_pago decimal(10, 2) NOT NULL,
+    data_venda timestamp NOT NULL,
+    data_inclusao timestamp NOT NULL DEFAULT now(),
+    data_atualizacao timestamp NOT NULL DEFAULT now()
+);
+CREATE TABLE bench_meta (
+    escala varchar(20) NOT NULL,
+    semente integer NOT NULL,
+    vendas bigint NOT NULL
+);
+"""
+
+STATES = [
+    ("Acre", "AC"),
+    ("Alagoas", "AL"),
+    ("Amapá", "AP"),
+    ("Amazonas", "AM"),
+    ("Bahia", "BA"),
+    ("Ceará", "CE"),
+    ("Distrito Federal", "DF"),
+    ("Espírito Santo", "ES"),
+    ("Goiás", "GO"),
+    ("Maranhão", "MA"),
+    ("Mato Grosso", "MT"),
+    ("Mato Grosso do Sul", "MS"),
+    ("Minas Gerais", "MG"),
+    ("Pará", "PA"),
+    ("Paraíba", "PB"),
+    ("Paraná", "PR"),
+    ("Pernambuco", "PE"),
+    ("Piauí", "PI"),
+    ("Rio de Janeiro", "RJ"),
+    ("Rio Grande do Norte", "RN"),
+    ("Rio Grande do Sul", "RS"),
+    ("Rondônia", "RO"),
+    ("Roraima", "RR"),
+    ("Santa Catarina", "SC"),
+    ("São Paulo", "SP"),
+    ("Sergipe", "SE"),
+    ("Tocantins", "TO"),
+]
+
+VEHICLE_TYPES = ["Hatch", "Sedan", "SUV", "Picape", "Minivan"]
+
+
+def dimension_sizes(n_sales):
+    """Tamanho de cada tabela de dimensão para uma quantidade de vendas"""
+    return {
+        "estados": len(STATES),
+        "cidades": 300,
+        "concessionarias": 120,
+        "veiculos": 60,
+        "vendedores": 1_200,
+        "clientes": int(min(max(n_sales // 5, 1_000), 500_000)),
+    }
+
+
+def generate_dimensions(n_sales, seed=42):
+    """Gera as tabelas de dimensão de forma determinística"""
+    rng = np.random.default_rng(seed)
+    sizes = dimension_sizes(n_sales)
+
+    estados = pd.DataFrame(
+        {
+            "id_estados": np.arange(1, sizes["estados"] + 1),
+            "estado": [name for name, _ in STATES],
+            "sigla": [abbr for _, abbr in STATES],
+        }
+    )
+    n = sizes["cidades"]
+    cidades = pd.DataFrame(
+        {
+            "id_cidades": np.arange(1, n + 1),
+            "cidade": [f"Cidade {i}" for i in range(1, n + 1)],
+            "id_estados": rng.integers(1, sizes["estados"] + 1, n),
+        }
+    )
+    n = sizes["concessionarias"]
+    concessionarias = pd.DataFrame(
+        {
+            "id_concessionarias": np.arange(1, n + 1),
+            "concessionaria": [f"Concessionária {i}" for i in range(1, n + 1)],
+            "id_cidades": rng.integers(1, sizes["cidades"] + 1, n),
+        }
+    )
+    n = sizes["veiculos"]
+    veiculos = pd.DataFrame(
+        {
+            "id_veiculos": np.arange(1, n + 1),
+            "nome": [f"Modelo {i}" for i in range(1, n + 1)],
+            "tipo": rng.choice(VEHICLE_TYPES, n),
+            "valor": rng.uniform(45_000, 350_000, n).round(2),
+        }
+    )
+    n = sizes["vendedores"]
+    vendedores = pd.DataFrame(
+        {
+            "id_vendedores": np.arange(1, n + 1),
+            "nome": [f"Vendedor {i}" for i in range(1, n + 1)],
+            "id_concessionarias": rng.integers(1, sizes["concessionarias"] + 1, n),
+        }
+    )
+    n = sizes["clientes"]
+    clientes = pd.DataFrame(
+        {
+            "id_clientes": np.arange(1, n + 1),
+            "cliente": [f"Cliente {i}" for i in range(1, n + 1)],
+            "endereco": [f"Rua {i % 997}, {i % 1000}" for i in range(1, n + 1)],
+            "id_concessionarias": rng.integers(1, sizes["concessionarias"] + 1, n),
+        }
+    )
+    return {
+        "estados": estados,
+        "cidades": cidades,
+        "concessionarias": concessionarias,
+        "veiculos": veiculos,
+        "vendedores": vendedores,
+        "clientes": clientes,
+    }
+
+
+def generate_sales(n_sales, dimensions, seed=42, chunk_size=CHUNK_SIZE):
+    """Gera vendas em blocos, com datas crescentes ao longo de id_vendas"""
+    rng = np.random.default_rng(seed + 1)
+    prices = dimensions["veiculos"]["valor"].to_numpy()
+    seller_dealership = dimensions["vendedores"]["id_concessionarias"].to_numpy()
+    n_sellers = len(seller_dealership)
+    n_customers = len(dimensions["clientes"])
+
+    # Popularidade desigual de modelos e vendedores, como em dados reais
+    model_weights = rng.pareto(1.5, len(prices)) + 1
+    model_weights /= model_weights.sum()
+    seller_weights = rng.pareto(2.0, n_sellers) + 1
+    seller_weights /= seller_weights.sum()
+
+    span = (END_DATE - START_DATE).total_seconds()
+    start = np.datetime64(START_DATE, "s")
+
+    for first in range(0, n_sales, chunk_size):
+        n = min(chunk_size, n_sales - first)
+        models = rng.choice(len(prices), n, p=model_weights)
+        sellers = rng.choice(n_sellers, n, p=seller_weights)
+        offsets = np.sort(rng.uniform(first, first + n, n)) / n_sales * span
+        yield pd.DataFrame(
+            {
+                "id_vendas": np.arange(first + 1, first + n + 1),
+                "id_veiculos": models + 1,
+                "id_concessionarias": seller_dealership[sellers],
+                "id_vendedores": sellers + 1,
+                "id_clientes": rng.integers(1, n_customers + 1, n),
+                "valor_pago": (prices[models] * rng.uniform(0.85, 1.05, n)).round(2),
+                "data_venda": start + offsets.astype("timedelta64[s]"),
+            }
+        )
+
+
+def _copy_frame(cursor, table, frame):
+    """Carrega um DataFrame na tabela com COPY FROM STDIN"""
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    columns = ", ".join(frame.columns)
+    cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def loaded_scale(connection):
+    """Retorna (escala, semente) carregadas no banco de benchmark, se houver"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('bench_meta') IS NOT NULL")
+        if not cursor.fetchone()[0]:
+            return None
+        cursor.execute("SELECT escala, semente FROM bench_meta")
+        row = cursor.fetchone()
+    connection.rollback()
+    return tuple(row) if row else None
+
+
+def load(connection, scale, seed=42):
+    """Recria o schema e carrega a escala pedida no banco de benchmark"""
+    n_sales = SCALES[scale]
+    dimensions = generate_dimensions(n_sales, seed)
+
+    with connection.cursor() as cursor:
+        cursor.execute(SCHEMA_DDL)
+        for table, frame in dimensions.items():
+            _copy_frame(cursor, table, frame)
+        for chunk in generate_sales(n_sales, dimensions, seed):
+            _copy_frame(cursor, "vendas", chunk)
+        cursor.execute(
+            "INSERT INTO bench_meta (escala, semente, vendas) VALUES (%s, %s, %s)",
+            (scale, seed, n_sales),
+        )
+        cursor.execute("ANALYZE")
+    connection.commit()
@@ -13,5 +13,151 @@ DB_CONFIG = {
     "password": os.getenv("DB_PASSWORD", ""),
 }
 
+# Configurações do pool de conexões
+POOL_CONFIG = {
+    "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+    "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+    "timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+    "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "600")),
+    "check_after": float(os.getenv("DB_POOL_CHECK_AFTER", "30")),
+}
+
+# Consultas independentes executadas em paralelo (SalesData.fetch_many)
+FETCH_CONFIG = {
+    "max_workers": int(os.getenv("DB_FETCH_MAX_WORKERS", str(POOL_CONFIG["max_size"]))),
+    "timeout": float(os.getenv("DB_FETCH_TIMEOUT", "30")),
+}
+
+# Leitura em blocos com cursor no servidor (consultas de período)
+STREAM_CONFIG = {
+    "itersize": int(os.getenv("DB_STREAM_ITERSIZE", "20000")),
+    "chunksize": int(os.getenv("DB_STREAM_CHUNKSIZE", "50000")),
+}
+
+# Navegação paginada das vendas (keyset em data_venda, id_vendas)
+PAGINATION_CONFIG = {
+    "page_size": int(os.getenv("SALES_PAGE_SIZE", "50")),
+    "prefetch": os.getenv("SALES_PAGE_PREFETCH", "true").lower()
+    in ("1", "true", "yes"),
+}
+
+# Configurações do cache de resultados de SalesData
+CACHE_CONFIG = {
+    "enabled": os.getenv("CACHE_ENABLED", "true").lower() in ("1", "true", "yes"),
+    "default_ttl": float(os.getenv("CACHE_DEFAULT_TTL", "300")),
+    "max_bytes": int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+    # Tempo após o TTL em que o resultado vencido ainda é servido enquanto é
+    # recalculado em segundo plano (0 desativa)
+    "stale_ttl": float(os.getenv("CACHE_STALE_TTL", "600")),
+    # "memory" (por processo) ou "disk" (Arrow IPC em directory, compartilhado
+    # entre os processos do Streamlit, até disk_max_bytes)
+    "backend": os.getenv("CACHE_BACKEND", "memory").lower(),
+    "directory": os.getenv("CACHE_DIR", os.path.join("data", "cache")),
+    "disk_max_bytes": int(os.getenv("CACHE_DISK_MAX_BYTES", str(1024 * 1024 * 1024))),
+}
+
+# TTL em segundos de cada método de SalesData (sobrepõe o default_ttl)
+CACHE_TTLS = {
+    "get_total_sales": 300,
+    "get_sales_by_model": 600,
+    "get_sales_by_month": 600,
+    "get_sales_by_dealership": 600,
+    "get_sales_by_salesperson": 600,
+    "get_recent_sales": 60,
+    "get_sales_period": 120,
+    "get_sales_page": 120,
+    "get_sales_count_estimate": 300,
+    "get_sales_timeseries": 300,
+    "get_sales_heatmap": 600,
+    "get_dashboard_snapshot": 300,
+    "get_dashboard_estimate": 300,
+}
+
+# Pré-aquecimento do cache: as consultas da tela inicial são recalculadas em
+# segundo plano a cada interval segundos (± jitter), antes de vencerem; uma
+# rodada mais lenta que slow_after segundos multiplica o intervalo por até
+# max_backoff
+PREWARM_CONFIG = {
+    "enabled": os.getenv("PREWARM_ENABLED", "true").lower() in ("1", "true", "yes"),
+    "interval": float(os.getenv("PREWARM_INTERVAL", "240")),
+    "jitter": float(os.getenv("PREWARM_JITTER", "0.1")),
+    "slow_after": float(os.getenv("PREWARM_SLOW_AFTER", "10")),
+    "max_backoff": int(os.getenv("PREWARM_MAX_BACKOFF", "8")),
+}
+
+# Cache das figuras do plotly, endereçado pelo conteúdo dos dados de entrada
+FIGURE_CACHE_CONFIG = {
+    "enabled": os.getenv("FIGURE_CACHE_ENABLED", "true").lower()
+    in ("1", "true", "yes"),
+    "max_bytes": int(os.getenv("FIGURE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+}
+
+# Gráfico de tendência: máximo de pontos por série (LTTB; 0 desativa) e
+# quantidade de pontos a partir da qual o desenho passa para WebGL. O limite
+# do WebGL vale para a série já reduzida, então fica abaixo de max_points
+TREND_CHART_CONFIG = {
+    "max_points": int(os.getenv("TREND_MAX_POINTS", "1000")),
+    "webgl_threshold": int(os.getenv("TREND_WEBGL_THRESHOLD", "500")),
+}
+
+# Mantém os agregados sem filtro por marca d'água em vez de recalculá-los
+INCREMENTAL_AGGREGATES = os.getenv("INCREMENTAL_AGGREGATES", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Rollups diários (materialized view) para as consultas agregadas
+ROLLUP_CONFIG = {
+    "enabled": os.getenv("USE_ROLLUPS", "false").lower() in ("1", "true", "yes"),
+    "refresh_interval": float(os.getenv("ROLLUP_REFRESH_INTERVAL", "900")),
+}
+
+# Cubo OLAP em memória (dia × veículo × concessionária × vendedor); acima de
+# max_bytes estimados as consultas continuam no SQL
+CUBE_CONFIG = {
+    "enabled": os.getenv("USE_CUBE", "false").lower() in ("1", "true", "yes"),
+    "max_bytes": int(os.getenv("CUBE_MAX_BYTES", str(256 * 1024 * 1024))),
+    "ttl": float(os.getenv("CUBE_TTL", "900")),
+}
+
+# Modo aproximado: painéis estimados por TABLESAMPLE enquanto o snapshot exato
+# não chega. sample_rows é o tamanho-alvo da amostra; abaixo de min_rows linhas
+# a estimativa é dispensada; wait é quanto o exato pode levar antes dela; z
+# define a margem de erro (1.96 = 95%)
+APPROX_CONFIG = {
+    "enabled": os.getenv("APPROX_MODE", "false").lower() in ("1", "true", "yes"),
+    "sample_rows": int(os.getenv("APPROX_SAMPLE_ROWS", "100000")),
+    "min_rows": int(os.getenv("APPROX_MIN_ROWS", "1000000")),
+    "wait": float(os.getenv("APPROX_WAIT", "0.1")),
+    "z": float(os.getenv("APPROX_Z", "1.96")),
+    "seed": int(os.getenv("APPROX_SEED", "42")),
+}
+
+# Backend de dados do dashboard: "postgres" (ao vivo) ou "local" (snapshot Parquet)
+DATA_BACKEND = os.getenv("DATA_BACKEND", "postgres").lower()
+
+# Snapshot local das tabelas de vendas
+LOCAL_STORE_CONFIG = {
+    "directory": os.getenv("LOCAL_STORE_DIR", os.path.join("data", "snapshot")),
+    "max_age": float(os.getenv("LOCAL_STORE_MAX_AGE", "86400")),
+}
+
+# Dimensões em memória: as consultas de vendas trazem só as chaves inteiras
+DIMENSION_CACHE_CONFIG = {
+    "enabled": os.getenv("DIMENSION_CACHE", "true").lower() in ("1", "true", "yes"),
+    "ttl": float(os.getenv("DIMENSION_CACHE_TTL", "3600")),
+}
+
+# Instrumentação das chamadas de SalesData e painel de performance
+INSTRUMENTATION_CONFIG = {
+    "capacity": int(os.getenv("QUERY_STATS_CAPACITY", "2000")),
+    "explain": os.getenv("QUERY_STATS_EXPLAIN", "false").lower()
+    in ("1", "true", "yes"),
+    "show_panel": os.getenv("SHOW_PERFORMANCE_PANEL", "false").lower()
+    in ("1", "true", "yes"),
+}
+
 # String de conexão para SQLAlchemy
 DATABASE_URL = f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
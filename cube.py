@@ -0,0 +1,331 @@
+import calendar
+import threading
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from incremental import PANELS
+from rollups import day_bounds, year_bounds
+
+EPOCH = date(1970, 1, 1)
+
+# Células do cubo: contagem e soma por dia, veículo, concessionária e vendedor
+CELLS_QUERY = """
+SELECT
+    ven.data_venda::date - DATE '1970-01-01' as dia,
+    ven.id_veiculos,
+    ven.id_concessionarias,
+    ven.id_vendedores,
+    COUNT(*) as quantidade_vendida,
+    SUM(ven.valor_pago) as valor_total
+FROM vendas ven
+GROUP BY 1, 2, 3, 4
+ORDER BY 1
+"""
+
+# Limites para estimar o tamanho do cubo antes de carregá-lo
+SIZE_QUERY = """
+SELECT
+    (SELECT reltuples FROM pg_class WHERE relname = 'vendas')::bigint as vendas,
+    (SELECT MAX(data_venda)::date - MIN(data_venda)::date + 1 FROM vendas) as dias,
+    (SELECT COUNT(*) FROM veiculos) as veiculos,
+    (SELECT COUNT(*) FROM concessionarias) as concessionarias,
+    (SELECT COUNT(*) FROM vendedores) as vendedores
+"""
+
+# Rótulos de cada eixo, na ordem dos códigos usados nas células
+AXES = {
+    "model": (
+        "id_veiculos",
+        "SELECT id_veiculos, nome as modelo FROM veiculos ORDER BY id_veiculos",
+    ),
+    "dealership": (
+        "id_concessionarias",
+        """
+        SELECT c.id_concessionarias, c.concessionaria, ci.cidade, es.estado
+        FROM concessionarias c
+        JOIN cidades ci ON c.id_cidades = ci.id_cidades
+        JOIN estados es ON ci.id_estados = es.id_estados
+        ORDER BY c.id_concessionarias
+        """,
+    ),
+    "salesperson": (
+        "id_vendedores",
+        """
+        SELECT v.id_vendedores, v.nome as vendedor, c.concessionaria
+        FROM vendedores v
+        JOIN concessionarias c ON v.id_concessionarias = c.id_concessionarias
+        ORDER BY v.id_vendedores
+        """,
+    ),
+}
+
+# Eixo de cada painel agrupado por uma dimensão
+PANEL_AXES = {
+    "sales_by_model": "model",
+    "sales_by_dealership": "dealership",
+    "sales_by_salesperson": "salesperson",
+}
+
+# Bytes por célula: dia, mês e três códigos (int32), contagem (int64) e soma (float64)
+CELL_BYTES = 5 * 4 + 8 + 8
+# No cubo denso cada célula guarda só contagem e soma
+DENSE_CELL_BYTES = 8 + 8
+
+MONTH_NAMES = np.array([name.ljust(9) for name in calendar.month_name])
+
+
+class SalesCube:
+    """Cubo OLAP em memória de vendas por dia, veículo, concessionária e vendedor
+
+    As células não vazias ficam em arrays NumPy paralelos (formato esparso),
+    ordenados por dia: o cubo denso seria quase todo zeros, pois cada
+    vendedor pertence a uma só concessionária. Um período vira uma fatia
+    contígua (searchsorted), os filtros de dimensão viram máscaras e cada
+    painel é um np.bincount sobre o eixo do painel.
+
+    Só responde períodos em dias inteiros; nos demais casos, ou quando o
+    cubo estimado passa de max_bytes, query retorna None e a consulta segue
+    para o SQL.
+    """
+
+    def __init__(self, db, max_bytes=256 * 1024 * 1024, ttl=900.0):
+        self.db = db
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.estimate = None
+        # (células, eixos): trocados juntos em uma só atribuição, para que
+        # quem lê nunca combine códigos de uma carga com rótulos de outra
+        self._data = None
+        self._loaded_at = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def estimate_size(self):
+        """Estima células e memória do cubo esparso e do denso equivalente"""
+        sizes = self.db.execute_query(SIZE_QUERY)
+        if sizes.empty or pd.isna(sizes["dias"].iloc[0]):
+            return None
+
+        row = sizes.iloc[0]
+        days = int(row["dias"])
+        # Vendedor determina a concessionária: o limite usa só dia × veículo × vendedor
+        bound = days * int(row["veiculos"]) * int(row["vendedores"])
+        cells = min(int(row["vendas"]), bound) if row["vendas"] >= 0 else bound
+        dense = bound * int(row["concessionarias"])
+        return {
+            "celulas": cells,
+            "bytes": cells * CELL_BYTES,
+            "bytes_denso": dense * DENSE_CELL_BYTES,
+        }
+
+    def is_stale(self):
+        """Indica se o cubo precisa ser (re)carregado"""
+        checked = self._loaded_at if self._data is not None else self._checked_at
+        if checked is None:
+            return True
+        return bool(self.ttl) and time.monotonic() - checked > self.ttl
+
+    def refresh(self):
+        """Recarrega o cubo; mantém o anterior se a carga falhar e o descarta
+        se a estimativa passar de max_bytes"""
+        self._checked_at = time.monotonic()
+        estimate = self.estimate_size()
+        if estimate is None:
+            print("Erro ao estimar o tamanho do cubo de vendas")
+            return False
+        self.estimate = estimate
+        if estimate["bytes"] > self.max_bytes:
+            print(
+                f"Cubo de vendas excederia {self.max_bytes} bytes "
+                f"(estimado: {estimate['bytes']}); usando SQL"
+            )
+            self._data = None
+            return False
+
+        axes = {}
+        for name, (key, query) in AXES.items():
+            frame = self.db.execute_query(query)
+            if frame.columns.empty:
+                print(f"Erro ao carregar o eixo {name} do cubo de vendas")
+                return False
+            axes[name] = frame
+        rows = self.db.execute_query(CELLS_QUERY)
+        if rows.columns.empty:
+            print("Erro ao carregar as células do cubo de vendas")
+            return False
+
+        cells = {"day": rows["dia"].to_numpy("int32")}
+        for name, (key, _) in AXES.items():
+            codes = pd.Index(axes[name][key]).get_indexer(rows[key])
+            if (codes < 0).any():
+                print(f"Erro: vendas com {key} desconhecido; cubo não carregado")
+                return False
+            cells[name] = codes.astype("int32")
+        cells["count"] = rows["quantidade_vendida"].to_numpy("int64")
+        cells["total"] = rows["valor_total"].to_numpy("float64")
+
+        # Mês de cada célula, em meses desde 1970, para o painel mensal
+        months = cells["day"].astype("datetime64[D]").astype("datetime64[M]")
+        cells["month"] = months.astype("int32")
+
+        self._data = (cells, axes)
+        self._loaded_at = time.monotonic()
+        return True
+
+    def ensure_loaded(self):
+        """Carrega o cubo quando necessário e indica se está disponível"""
+        if self.is_stale():
+            with self._lock:
+                if self.is_stale():
+                    self.refresh()
+        return self._data is not None
+
+    def nbytes(self):
+        """Memória ocupada pelas células carregadas"""
+        data = self._data
+        return sum(values.nbytes for values in data[0].values()) if data else 0
+
+    def stats(self):
+        """Resumo do cubo para o painel de performance"""
+        data = self._data
+        return {
+            "carregado": data is not None,
+            "celulas": len(data[0]["count"]) if data else 0,
+            "bytes": self.nbytes(),
+            "max_bytes": self.max_bytes,
+            "estimativa": self.estimate,
+        }
+
+    def _select(self, cells, axes, start_date, end_date, year, dimensions):
+        """Índices das células que atendem aos filtros, ou None se o cubo
+        não consegue responder ao período"""
+        bounds = day_bounds(start_date, end_date)
+        if bounds is None:
+            return None
+        first_day, last_day = bounds
+
+        days = cells["day"]
+        lo, hi = 0, len(days)
+        if first_day is not None:
+            lo = np.searchsorted(days, (first_day - EPOCH).days, "left")
+        if last_day is not None:
+            hi = np.searchsorted(days, (last_day - EPOCH).days, "right")
+        if year:
+            start, stop = year_bounds(year)
+            lo = max(lo, np.searchsorted(days, (start - EPOCH).days, "left"))
+            hi = min(hi, np.searchsorted(days, (stop - EPOCH).days, "left"))
+        selected = np.arange(lo, max(lo, hi))
+
+        filters = {
+            "model": ("model", axes["model"]["modelo"], dimensions.get("model")),
+            "dealership": (
+                "dealership",
+                axes["dealership"]["concessionaria"],
+                dimensions.get("dealership"),
+            ),
+            "state": (
+                "dealership",
+                axes["dealership"]["estado"],
+                dimensions.get("state"),
+            ),
+            "salesperson": (
+                "salesperson",
+                axes["salesperson"]["vendedor"],
+                dimensions.get("salesperson"),
+            ),
+        }
+        for axis, labels, values in filters.values():
+            if not values:
+                continue
+            allowed = labels.isin(values).to_numpy()
+            selected = selected[allowed[cells[axis][selected]]]
+        return selected
+
+    def query(self, panel, start_date=None, end_date=None, year=None, **dimensions):
+        """Responde um painel a partir do cubo, ou None para usar o SQL
+
+        panel é "total_sales", "sales_by_month" ou um dos painéis de
+        PANEL_AXES; o resultado tem as colunas e a ordenação do método SQL.
+        """
+        if not self.ensure_loaded():
+            return None
+        data = self._data
+        if data is None:
+            return None
+        cells, axes = data
+        selected = self._select(cells, axes, start_date, end_date, year, dimensions)
+        if selected is None:
+            return None
+
+        count = cells["count"][selected]
+        total = cells["total"][selected]
+        if panel == "total_sales":
+            quantity = int(count.sum())
+            value = float(total.sum()) if quantity else np.nan
+            return pd.DataFrame(
+                {
+                    "total_vendas": [quantity],
+                    "valor_total_vendas": [value],
+                    "valor_medio_venda": [value / quantity if quantity else np.nan],
+                }
+            )
+        if panel == "sales_by_month":
+            return self._by_month(cells["month"][selected], count, total, year)
+
+        axis = PANEL_AXES[panel]
+        labels = axes[axis]
+        codes = cells[axis][selected]
+        quantities = np.bincount(codes, weights=count, minlength=len(labels))
+        totals = np.bincount(codes, weights=total, minlength=len(labels))
+        present = quantities > 0
+
+        spec = PANELS[panel]
+        result = labels.loc[present, spec["labels"]].reset_index(drop=True)
+        result["quantidade_vendida"] = quantities[present].astype("int64")
+        result["valor_total"] = totals[present]
+        result["valor_medio"] = totals[present] / quantities[present]
+        by, ascending = spec["sort"]
+        return result.sort_values(by, ascending=ascending, kind="stable").reset_index(
+            drop=True
+        )[spec["columns"]]
+
+    @staticmethod
+    def _by_month(months, count, total, year):
+        """Painel mensal: contagem e soma por mês presente na seleção"""
+        if len(months) == 0:
+            columns = PANELS["sales_by_month"]["columns"]
+            return pd.DataFrame(columns=columns[1:] if year else columns)
+
+        base = months.min()
+        offsets = months - base
+        quantities = np.bincount(offsets, weights=count)
+        totals = np.bincount(offsets, weights=total)
+        present = np.flatnonzero(quantities > 0)
+        month_index = base + present
+        result = pd.DataFrame(
+            {
+                "ano": (1970 + month_index // 12).astype("int64"),
+                "mes": (month_index % 12 + 1).astype("int64"),
+                "nome_mes": MONTH_NAMES[month_index % 12 + 1],
+                "quantidade_vendida": quantities[present].astype("int64"),
+                "valor_total": totals[present],
+            }
+        )
+        if year:
+            return result.drop(columns="ano").reset_index(drop=True)
+        return result.sort_values(
+            ["ano", "mes"], ascending=[False, True], kind="stable"
+        ).reset_index(drop=True)
+
+    def snapshot(self, start_date=None, end_date=None, **dimensions):
+        """Todos os painéis de get_dashboard_snapshot, ou None para usar o SQL"""
+        total = self.query("total_sales", start_date, end_date, **dimensions)
+        if total is None:
+            return None
+        panels = {"total_sales": total}
+        for name in PANEL_AXES:
+            panels[name] = self.query(name, start_date, end_date, **dimensions)
+        return panels
@@ -1,24 +1,569 @@
+import functools
+import inspect
+import itertools
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from contextlib import contextmanager
+from datetime import date, datetime
+
 import pandas as pd
 import psycopg2
+from psycopg2 import extensions
 from sqlalchemy import create_engine, text
-from config import DATABASE_URL, DB_CONFIG
+from config import (
+    APPROX_CONFIG,
+    CACHE_CONFIG,
+    CACHE_TTLS,
+    CUBE_CONFIG,
+    DATABASE_URL,
+    DB_CONFIG,
+    DIMENSION_CACHE_CONFIG,
+    FETCH_CONFIG,
+    INCREMENTAL_AGGREGATES,
+    INSTRUMENTATION_CONFIG,
+    PAGINATION_CONFIG,
+    POOL_CONFIG,
+    ROLLUP_CONFIG,
+    STREAM_CONFIG,
+)
+from cube import SalesCube
+from dimensions import DimensionCache
+from incremental import IncrementalAggregates
+from instrumentation import QueryStats, current_call, track_call
+from rollups import (
+    ROLLUP_QUERIES,
+    ROLLUP_VIEW,
+    RollupManager,
+    day_bounds,
+    year_bounds,
+)
+from schemas import apply_schema
+
+
+SALES_ROWS_SELECT = """
+        SELECT 
+            ven.data_venda,
+            v.nome as modelo,
+            c.concessionaria,
+            vend.nome as vendedor,
+            cli.cliente,
+            ven.valor_pago
+        FROM vendas ven
+        JOIN veiculos v ON ven.id_veiculos = v.id_veiculos
+        JOIN concessionarias c ON ven.id_concessionarias = c.id_concessionarias
+        JOIN vendedores vend ON ven.id_vendedores = vend.id_vendedores
+        JOIN clientes cli ON ven.id_clientes = cli.id_clientes
+"""
+
+# Mesmas vendas só com as chaves inteiras, decodificadas pelo DimensionCache
+SALES_KEYS_SELECT = """
+        SELECT 
+            ven.data_venda,
+            ven.id_veiculos,
+            ven.id_concessionarias,
+            ven.id_vendedores,
+            ven.id_clientes,
+            ven.valor_pago
+        FROM vendas ven
+"""
+
+# Condição de keyset: vendas estritamente depois do cursor na ordem decrescente
+SALES_PAGE_KEYSET = "(ven.data_venda, ven.id_vendas) < (%s, %s)"
+
+# Vendas com os nomes das dimensões para exportação; {where} vem de sales_where
+SALES_PERIOD_QUERY = (
+    SALES_ROWS_SELECT
+    + """
+        {where}
+        ORDER BY ven.data_venda DESC
+        """
+)
+
+# Filtros de dimensão: coluna de vendas e subconsulta que a resolve a partir dos nomes
+DIMENSION_FILTERS = {
+    "dealership": (
+        "id_concessionarias",
+        """
+        SELECT id_concessionarias FROM concessionarias
+        WHERE concessionaria = ANY(%s)
+        """,
+    ),
+    "state": (
+        "id_concessionarias",
+        """
+        SELECT c.id_concessionarias
+        FROM concessionarias c
+        JOIN cidades ci ON c.id_cidades = ci.id_cidades
+        JOIN estados es ON ci.id_estados = es.id_estados
+        WHERE es.estado = ANY(%s)
+        """,
+    ),
+    "model": (
+        "id_veiculos",
+        "SELECT id_veiculos FROM veiculos WHERE nome = ANY(%s)",
+    ),
+    "salesperson": (
+        "id_vendedores",
+        "SELECT id_vendedores FROM vendedores WHERE nome = ANY(%s)",
+    ),
+}
+
+# Passo do calendário de get_sales_timeseries para cada granularidade de DATE_TRUNC
+TIMESERIES_GRANULARITIES = {
+    "day": "1 day",
+    "week": "1 week",
+    "month": "1 month",
+    "quarter": "3 months",
+}
+
+# Série temporal com os períodos sem vendas preenchidos por generate_series;
+# {bucket}, {count}, {total} e {source} vêm de AGGREGATE_SOURCES
+TIMESERIES_QUERY = """
+        WITH serie AS (
+            SELECT 
+                {bucket} as periodo,
+                {count} as quantidade_vendida,
+                {total} as valor_total
+            FROM {source}
+            {where}
+            GROUP BY 1
+        ),
+        limites AS (
+            SELECT 
+                COALESCE(DATE_TRUNC(%s, %s::timestamp), MIN(periodo)) as inicio,
+                COALESCE(DATE_TRUNC(%s, %s::timestamp), MAX(periodo)) as fim
+            FROM serie
+        )
+        SELECT 
+            cal.periodo,
+            COALESCE(s.quantidade_vendida, 0) as quantidade_vendida,
+            COALESCE(s.valor_total, 0) as valor_total
+        FROM limites l
+        CROSS JOIN generate_series(l.inicio, l.fim, %s::interval) as cal(periodo)
+        LEFT JOIN serie s ON s.periodo = cal.periodo
+        ORDER BY cal.periodo
+        """
+
+# Células concessionária × mês já em ordem de linha, com zero nos meses sem
+# vendas; {month}, {dealership}, {total} e {source} vêm de AGGREGATE_SOURCES
+HEATMAP_QUERY = """
+        WITH celulas AS (
+            SELECT 
+                {dealership} as id_concessionarias,
+                {month} as mes,
+                {total} as valor_total
+            FROM {source}
+            {where}
+            GROUP BY 1, 2
+        ),
+        limites AS (
+            SELECT 
+                COALESCE(DATE_TRUNC('month', %s::timestamp), MIN(mes)) as inicio,
+                COALESCE(DATE_TRUNC('month', %s::timestamp), MAX(mes)) as fim
+            FROM celulas
+        )
+        SELECT 
+            c.concessionaria,
+            cal.mes,
+            COALESCE(ce.valor_total, 0) as valor_total
+        FROM (SELECT DISTINCT id_concessionarias FROM celulas) lojas
+        JOIN concessionarias c ON c.id_concessionarias = lojas.id_concessionarias
+        CROSS JOIN limites l
+        CROSS JOIN generate_series(l.inicio, l.fim, '1 month'::interval) as cal(mes)
+        LEFT JOIN celulas ce
+            ON ce.id_concessionarias = lojas.id_concessionarias AND ce.mes = cal.mes
+        ORDER BY c.concessionaria, c.id_concessionarias, cal.mes
+        """
+
+# Trechos das consultas de agregação para cada fonte: o rollup diário (alias
+# r) ou a tabela de vendas (alias ven), na mesma forma de _aggregate_source
+AGGREGATE_SOURCES = {
+    True: {
+        "source": f"{ROLLUP_VIEW} r",
+        "bucket": "DATE_TRUNC(%s, r.dia::timestamp)",
+        "month": "DATE_TRUNC('month', r.dia::timestamp)",
+        "dealership": "r.id_concessionarias",
+        "count": "SUM(r.quantidade_vendida)::bigint",
+        "total": "SUM(r.valor_total)",
+    },
+    False: {
+        "source": "vendas ven",
+        "bucket": "DATE_TRUNC(%s, ven.data_venda)",
+        "month": "DATE_TRUNC('month', ven.data_venda)",
+        "dealership": "ven.id_concessionarias",
+        "count": "COUNT(*)",
+        "total": "SUM(ven.valor_pago)",
+    },
+}
+
+# Snapshot: uma única varredura de vendas alimenta todos os GROUPING SETS; as
+# dimensões são unidas só depois da agregação, sobre poucas linhas
+SNAPSHOT_QUERY = """
+        WITH base AS (
+            SELECT 
+                ven.id_veiculos,
+                ven.id_concessionarias,
+                ven.id_vendedores,
+                {measures}
+            FROM {source}
+            {where}
+        ),
+        agregados AS (
+            SELECT 
+                CASE
+                    WHEN GROUPING(b.id_veiculos) = 0 THEN 'sales_by_model'
+                    WHEN GROUPING(b.id_concessionarias) = 0 THEN 'sales_by_dealership'
+                    WHEN GROUPING(b.id_vendedores) = 0 THEN 'sales_by_salesperson'
+                    ELSE 'total_sales'
+                END as painel,
+                b.id_veiculos,
+                b.id_concessionarias,
+                b.id_vendedores,
+                {aggregates}
+        FROM base b
+            GROUP BY GROUPING SETS (
+                (),
+                (b.id_veiculos),
+                (b.id_concessionarias),
+                (b.id_vendedores)
+            )
+        )
+        SELECT 
+            a.*,
+            v.nome as modelo,
+            c.concessionaria,
+            ci.cidade,
+            es.estado,
+            vend.nome as vendedor,
+            cv.concessionaria as concessionaria_vendedor
+        FROM agregados a
+        LEFT JOIN veiculos v ON a.id_veiculos = v.id_veiculos
+        LEFT JOIN concessionarias c ON a.id_concessionarias = c.id_concessionarias
+        LEFT JOIN cidades ci ON c.id_cidades = ci.id_cidades
+        LEFT JOIN estados es ON ci.id_estados = es.id_estados
+        LEFT JOIN vendedores vend ON a.id_vendedores = vend.id_vendedores
+        LEFT JOIN concessionarias cv ON vend.id_concessionarias = cv.id_concessionarias
+        """
+
+# Linhas de vendas segundo as estatísticas do planejador (sem COUNT(*))
+TABLE_ROWS_QUERY = (
+    "SELECT reltuples::bigint as linhas FROM pg_class WHERE relname = 'vendas'"
+)
+
+# Amostra de páginas de vendas; a semente fixa repete a mesma amostra
+SAMPLE_SOURCE = (
+    f"vendas ven TABLESAMPLE SYSTEM (%s) REPEATABLE ({APPROX_CONFIG['seed']})"
+)
+
+# Margens de erro mantidas nos painéis estimados
+ESTIMATE_MARGINS = ("margem_quantidade", "margem_valor")
+
+FILTER_OPTIONS_QUERY = """
+SELECT 'dealership' as filtro, concessionaria as valor FROM concessionarias
+UNION ALL
+SELECT 'state' as filtro, estado as valor FROM estados
+UNION ALL
+SELECT 'model' as filtro, nome as valor FROM veiculos
+UNION ALL
+SELECT DISTINCT 'salesperson' as filtro, nome as valor FROM vendedores
+ORDER BY filtro, valor
+"""
+
+
+def filter_values(value):
+    """Normaliza um filtro de dimensão em lista; None ou vazio não filtra"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return [value]
+    return list(value) or None
+
+
+def has_filters(start_date=None, end_date=None, year=None, **dimensions):
+    """Verifica se algum filtro de período ou de dimensão foi informado"""
+    if start_date is not None or end_date is not None or year:
+        return True
+    return any(filter_values(value) for value in dimensions.values())
+
+
+def sales_where(
+    alias, start_date=None, end_date=None, year=None, rollup=False, **dimensions
+):
+    """Monta o WHERE parametrizado dos filtros de período e de dimensão
+
+    Retorna (where, params). Sobre o rollup diário (rollup=True) o período
+    precisa cair em dias inteiros; quando não cai, retorna None.
+    """
+    conditions = []
+    params = []
+    if rollup:
+        bounds = day_bounds(start_date, end_date)
+        if bounds is None:
+            return None
+        first_day, last_day = bounds
+        if first_day is not None:
+            conditions.append(f"{alias}.dia >= %s")
+            params.append(first_day)
+        if last_day is not None:
+            conditions.append(f"{alias}.dia <= %s")
+            params.append(last_day)
+        column = f"{alias}.dia"
+    else:
+        if start_date is not None:
+            conditions.append(f"{alias}.data_venda >= %s")
+            params.append(start_date)
+        if end_date is not None:
+            conditions.append(f"{alias}.data_venda <= %s")
+            params.append(end_date)
+        column = f"{alias}.data_venda"
+
+    if year:
+        conditions.append(f"{column} >= %s AND {column} < %s")
+        params.extend(year_bounds(year))
+
+    for name, value in dimensions.items():
+        values = filter_values(value)
+        if values:
+            key, subquery = DIMENSION_FILTERS[name]
+            conditions.append(f"{alias}.{key} IN ({subquery.strip()})")
+            params.append(values)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params
+
+
+def page_cursor(page):
+    """Cursor (data_venda, id_vendas) da última venda de uma página
+
+    Retorna None para páginas vazias. É passado como after para obter a
+    página seguinte de get_sales_page.
+    """
+    if page is None or page.empty:
+        return None
+    last = page.iloc[-1]
+    return pd.Timestamp(last["data_venda"]).to_pydatetime(), int(last["id_vendas"])
+
+
+# NUMERIC chega como float em vez de decimal.Decimal, sem colunas object
+DECIMAL_AS_FLOAT = extensions.new_type(
+    extensions.DECIMAL.values,
+    "DECIMAL_AS_FLOAT",
+    lambda value, cursor: float(value) if value is not None else None,
+)
+
+
+class PoolTimeoutError(Exception):
+    """Nenhuma conexão do pool ficou disponível dentro do tempo limite"""
+
+
+class QueryError(Exception):
+    """Uma consulta de um recálculo falhou no banco (já registrada no log)"""
+
+
+class ConnectionPool:
+    """Pool de conexões psycopg2 limitado e seguro para uso entre threads"""
+
+    def __init__(
+        self,
+        connect_kwargs,
+        min_size=1,
+        max_size=10,
+        timeout=30.0,
+        max_lifetime=1800.0,
+        max_idle=600.0,
+        check_after=30.0,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Tamanhos de pool inválidos")
+
+        self.connect_kwargs = connect_kwargs
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.check_after = check_after
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conexão, último uso)
+        self._created_at = {}
+        self._size = 0
+        self.closed = False
+
+        try:
+            for _ in range(min_size):
+                conn = self._open()
+                self._size += 1
+                self._idle.append((conn, time.monotonic()))
+        except Exception:
+            # Não deixa abertas as conexões criadas antes da falha
+            self.closeall()
+            raise
+
+    def _open(self):
+        """Abre uma nova conexão física com o banco"""
+        conn = psycopg2.connect(**self.connect_kwargs)
+        extensions.register_type(DECIMAL_AS_FLOAT, conn)
+        self._created_at[conn] = time.monotonic()
+        return conn
+
+    def _close(self, conn):
+        """Fecha uma conexão física, ignorando erros"""
+        self._created_at.pop(conn, None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_stale(self, conn, last_used, now):
+        """Indica se a conexão excedeu o tempo de vida ou de ociosidade"""
+        created_at = self._created_at.get(conn, now)
+        if self.max_lifetime and now - created_at > self.max_lifetime:
+            return True
+        return bool(self.max_idle) and now - last_used > self.max_idle
+
+    def _is_healthy(self, conn, last_used, now):
+        """Valida a conexão antes de entregá-la ao chamador"""
+        if conn.closed:
+            return False
+        if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        if now - last_used < self.check_after:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def getconn(self):
+        """Retira uma conexão do pool, aguardando até o tempo limite"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._cond:
+                entry = None
+                while entry is None:
+                    if self.closed:
+                        raise PoolTimeoutError("O pool de conexões está fechado")
+                    if self._idle:
+                        entry = self._idle.pop()
+                    elif self._size < self.max_size:
+                        self._size += 1
+                        entry = (None, None)
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise PoolTimeoutError(
+                                "Tempo esgotado aguardando conexão do pool"
+                            )
+                        self._cond.wait(remaining)
+
+            conn, last_used = entry
+            if conn is None:
+                try:
+                    return self._open()
+                except Exception:
+                    self._release_slot()
+                    raise
+
+            now = time.monotonic()
+            if not self._is_stale(conn, last_used, now) and self._is_healthy(
+                conn, last_used, now
+            ):
+                return conn
+
+            # Conexão vencida ou quebrada: recicla e tenta a próxima
+            self._close(conn)
+            self._release_slot()
+
+    def putconn(self, conn, discard=False):
+        """Devolve uma conexão ao pool"""
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            if discard or conn.closed or self.closed:
+                self._close(conn)
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def _release_slot(self):
+        """Libera a vaga de uma conexão que não chegou a ser entregue"""
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Empresta uma conexão durante o bloco e a devolve ao final"""
+        conn = self.getconn()
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+
+    def stats(self):
+        """Retorna o estado atual do pool"""
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "max_size": self.max_size,
+            }
+
+    def closeall(self):
+        """Fecha todas as conexões ociosas e impede novos empréstimos"""
+        with self._cond:
+            self.closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._close(conn)
+                self._size -= 1
+            self._cond.notify_all()
 
 
 class DatabaseConnection:
-    def __init__(self):
+    def __init__(self, db_config=None):
         self.engine = None
-        self.connection = None
+        self.pool = None
+        self.db_config = db_config or DB_CONFIG
 
     def connect(self):
-        """Estabelece conexão com o banco de dados"""
+        """Estabelece o pool de conexões com o banco de dados"""
         try:
+            # Um novo connect substitui o pool anterior, que é fechado antes
+            if self.pool is not None:
+                self.pool.closeall()
+                self.pool = None
             # Usa psycopg2 diretamente para conexão remota
-            self.connection = psycopg2.connect(
-                host=DB_CONFIG["host"],
-                port=DB_CONFIG["port"],
-                database=DB_CONFIG["database"],
-                user=DB_CONFIG["user"],
-                password=DB_CONFIG["password"],
+            self.pool = ConnectionPool(
+                connect_kwargs={
+                    "host": self.db_config["host"],
+                    "port": self.db_config["port"],
+                    "database": self.db_config["database"],
+                    "user": self.db_config["user"],
+                    "password": self.db_config["password"],
+                },
+                **POOL_CONFIG,
             )
             return True
         except Exception as e:
@@ -26,59 +571,624 @@ class DatabaseConnection:
             return False
 
     def is_connected(self):
-        """Verifica se a conexão está ativa"""
-        return self.connection is not None
+        """Verifica se o pool de conexões está ativo"""
+        return self.pool is not None and not self.pool.closed
 
     def disconnect(self):
-        """Fecha a conexão com o banco de dados"""
-        if self.connection:
-            self.connection.close()
+        """Fecha as conexões com o banco de dados"""
+        if self.pool:
+            self.pool.closeall()
         if self.engine:
             self.engine.dispose()
 
     def execute_query(self, query, params=None):
-        """Executa uma consulta SQL e retorna um DataFrame"""
+        """Executa uma consulta SQL em uma conexão do pool e retorna um DataFrame"""
+        call = current_call()
         try:
             if not self.is_connected():
                 print("Erro: Não há conexão ativa com o banco de dados")
                 return pd.DataFrame()
 
-            if params:
-                df = pd.read_sql_query(query, self.connection, params=params)
-            else:
-                df = pd.read_sql_query(query, self.connection)
+            with self.pool.connection() as connection:
+                # Consultas que já são EXPLAIN (estimativa de contagem) não
+                # aceitam outro EXPLAIN na frente
+                explained = query.lstrip().upper().startswith("EXPLAIN")
+                if call is not None and call.explain and not explained:
+                    call.plan = self._explain(connection, query, params)
+                if params:
+                    df = pd.read_sql_query(query, connection, params=params)
+                else:
+                    df = pd.read_sql_query(query, connection)
             return df
         except Exception as e:
             print(f"Erro ao executar consulta: {e}")
+            if call is not None:
+                call.errors.append(str(e))
             return pd.DataFrame()
 
+    def _explain(self, connection, query, params=None):
+        """Captura o plano de execução (EXPLAIN, sem executar a consulta)"""
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {query}", params)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        connection.rollback()
+        return plan
+
+    def stream_query(self, query, params=None, itersize=None, chunksize=None):
+        """Executa a consulta com cursor no servidor e gera blocos de DataFrame
+
+        As linhas são buscadas do servidor em lotes de itersize e entregues em
+        DataFrames de chunksize linhas; a conexão volta ao pool quando o
+        gerador termina ou é descartado. Um erro no meio da transmissão é
+        propagado ao chamador, para que um resultado parcial não pareça
+        completo.
+        """
+        itersize = itersize or STREAM_CONFIG["itersize"]
+        chunksize = chunksize or STREAM_CONFIG["chunksize"]
+        if not self.is_connected():
+            print("Erro: Não há conexão ativa com o banco de dados")
+            return
+
+        try:
+            with self.pool.connection() as connection:
+                cursor_name = f"stream_{uuid.uuid4().hex}"
+                with connection.cursor(name=cursor_name) as cursor:
+                    # Iterar o cursor nomeado busca itersize linhas por FETCH
+                    cursor.itersize = itersize
+                    cursor.execute(query, params)
+                    rows = iter(cursor)
+                    columns = None
+                    while True:
+                        chunk = list(itertools.islice(rows, chunksize))
+                        if columns is None:
+                            columns = [col[0] for col in cursor.description]
+                        if not chunk:
+                            break
+                        yield pd.DataFrame.from_records(
+                            chunk, columns=columns, coerce_float=True
+                        )
+        except Exception as e:
+            print(f"Erro ao transmitir consulta: {e}")
+            raise
+
+    def copy_to(self, query, params, target, options="FORMAT csv, HEADER true"):
+        """Transmite o resultado da consulta via COPY ... TO STDOUT para um arquivo
+
+        target pode ser um caminho ou um objeto de arquivo (texto ou binário).
+        Retorna o número de linhas copiadas, ou None em caso de erro.
+        """
+        try:
+            if not self.is_connected():
+                print("Erro: Não há conexão ativa com o banco de dados")
+                return None
+
+            with self.pool.connection() as connection:
+                with connection.cursor() as cursor:
+                    encoding = extensions.encodings[connection.encoding]
+                    bound = cursor.mogrify(query, params).decode(encoding)
+                    copy = f"COPY ({bound}) TO STDOUT WITH ({options})"
+                    if isinstance(target, (str, os.PathLike)):
+                        with open(target, "wb") as f:
+                            cursor.copy_expert(copy, f)
+                    else:
+                        cursor.copy_expert(copy, target)
+                    return cursor.rowcount
+        except Exception as e:
+            print(f"Erro ao exportar consulta: {e}")
+            return None
+
+    def execute_command(self, command, params=None, autocommit=False):
+        """Executa um comando SQL sem resultado (DDL, REFRESH) e confirma"""
+        try:
+            if not self.is_connected():
+                print("Erro: Não há conexão ativa com o banco de dados")
+                return False
+
+            with self.pool.connection() as connection:
+                connection.autocommit = autocommit
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute(command, params)
+                    if not autocommit:
+                        connection.commit()
+                finally:
+                    connection.autocommit = False
+            return True
+        except Exception as e:
+            print(f"Erro ao executar comando: {e}")
+            return False
+
+
+class ResultCache:
+    """Cache de resultados em memória com TTL por método e despejo LRU
+
+    As chaves são formadas pelo nome do método e pelos parâmetros
+    normalizados. Os valores guardados são compartilhados entre os
+    chamadores e não devem ser modificados no lugar. Com stale_ttl, uma
+    entrada vencida continua disponível por mais stale_ttl segundos como
+    "stale", para ser servida enquanto é recalculada.
+    """
+
+    def __init__(
+        self,
+        max_bytes=256 * 1024 * 1024,
+        default_ttl=300.0,
+        ttls=None,
+        stale_ttl=0.0,
+    ):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.ttls = dict(ttls or {})
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # chave -> (valor, expira_em, tamanho)
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_config(cls):
+        """Cria o cache a partir de CACHE_CONFIG, ou None se desabilitado
+
+        CACHE_BACKEND=disk troca o cache em memória pelo DiskResultCache,
+        compartilhado pelos processos que usam o mesmo CACHE_DIR.
+        """
+        if not CACHE_CONFIG["enabled"]:
+            return None
+        if CACHE_CONFIG["backend"] == "disk":
+            # Importado aqui: disk_cache estende esta classe
+            from disk_cache import DiskResultCache
+
+            return DiskResultCache.from_config()
+        return cls(
+            max_bytes=CACHE_CONFIG["max_bytes"],
+            default_ttl=CACHE_CONFIG["default_ttl"],
+            ttls=CACHE_TTLS,
+            stale_ttl=CACHE_CONFIG["stale_ttl"],
+        )
+
+    @staticmethod
+    def normalize(value):
+        """Converte parâmetros em uma forma estável e hashable"""
+        if isinstance(value, dict):
+            return tuple(
+                sorted((k, ResultCache.normalize(v)) for k, v in value.items())
+            )
+        if isinstance(value, (list, tuple)):
+            return tuple(ResultCache.normalize(v) for v in value)
+        if isinstance(value, (set, frozenset)):
+            return tuple(sorted(ResultCache.normalize(v) for v in value))
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return value
+
+    def make_key(self, method, params):
+        """Monta a chave do cache para um método e seus parâmetros"""
+        return (method, self.normalize(params))
+
+    def ttl_for(self, method):
+        """Retorna o TTL configurado para o método"""
+        return self.ttls.get(method, self.default_ttl)
+
+    @staticmethod
+    def size_of(value):
+        """Estima o espaço em memória ocupado por um valor"""
+        if isinstance(value, pd.DataFrame):
+            return int(value.memory_usage(index=True, deep=True).sum())
+        if isinstance(value, dict):
+            return sum(ResultCache.size_of(v) for v in value.values())
+        return sys.getsizeof(value)
+
+    def lookup(self, key):
+        """Retorna (estado, valor): estado é "fresh", "stale" ou None (ausente)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, None
+
+            value, expires_at, _ = entry
+            now = time.monotonic()
+            if expires_at > now:
+                state = "fresh"
+                self.hits += 1
+            elif expires_at + self.stale_ttl > now:
+                state = "stale"
+                self.stale_hits += 1
+            else:
+                self._remove(key)
+                self.misses += 1
+                return None, None
+
+            self._entries.move_to_end(key)
+            return state, value
+
+    def get(self, key):
+        """Retorna (encontrado, valor) para a chave, aceitando entradas stale"""
+        state, value = self.lookup(key)
+        return state is not None, value
+
+    def set(self, key, value, ttl=None):
+        """Guarda um valor, despejando os menos usados se exceder o limite
+
+        Substitui a entrada anterior de uma vez: quem lê recebe o valor
+        antigo ou o novo, nunca um intermediário.
+        """
+        size = self.size_of(value)
+        ttl = self.ttl_for(key[0]) if ttl is None else ttl
+        with self._lock:
+            if size > self.max_bytes:
+                # Não cabe no cache: descarta também o valor anterior
+                if key in self._entries:
+                    self._remove(key)
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def claim(self, name, seconds):
+        """Reserva o recálculo de name por seconds segundos
+
+        O cache em memória é exclusivo do processo: a reserva é sempre
+        concedida. Caches compartilhados concedem a um processo só.
+        """
+        return True
+
+    def invalidate(self, method=None):
+        """Remove as entradas de um método, ou todas se nenhum for informado"""
+        with self._lock:
+            if method is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            for key in [k for k in self._entries if k[0] == method]:
+                self._remove(key)
+
+    def stats(self):
+        """Retorna contadores de acertos, falhas e ocupação"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "stale_ttl": self.stale_ttl,
+            }
+
+
+def _is_cacheable(value):
+    """Resultados vazios (inclusive de consultas com erro) não são guardados"""
+    if isinstance(value, pd.DataFrame):
+        return not value.empty
+    if isinstance(value, dict):
+        return any(_is_cacheable(v) for v in value.values())
+    return value is not None
+
+
+def cached_query(method):
+    """Memoiza, tipa e instrumenta um método de SalesData
+
+    O resultado recebe os tipos declarados em schemas.SCHEMAS, é guardado
+    no cache de resultados da instância e cada chamada (acerto ou falha
+    de cache) é registrada em self.stats. Um resultado stale é devolvido
+    na hora e recalculado em segundo plano (stale-while-revalidate);
+    wrapper.refresh recalcula ignorando o cache e substitui a entrada, ou
+    levanta QueryError se a consulta falhou no banco.
+    """
+    signature = inspect.signature(method)
+
+    def cache_key(self, args, kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        params = dict(bound.arguments)
+        params.pop("self")
+        return self.cache.make_key(method.__name__, params)
+
+    def refresh(self, *args, **kwargs):
+        # execute_query devolve um DataFrame vazio em caso de erro; aqui o
+        # erro registrado na chamada é levantado, para quem recalcula saber
+        with track_call(method.__name__) as call:
+            value = apply_schema(method.__name__, method(self, *args, **kwargs))
+        if call.errors:
+            raise QueryError("; ".join(call.errors))
+        if self.cache is not None and _is_cacheable(value):
+            self.cache.set(cache_key(self, args, kwargs), value)
+        return value
+
+    def cached_call(self, call, args, kwargs):
+        if self.cache is None:
+            return apply_schema(method.__name__, method(self, *args, **kwargs))
+
+        self._check_source()
+        key = cache_key(self, args, kwargs)
+        state, value = self.cache.lookup(key)
+        if state is not None:
+            call.cache_hit = True
+            if state == "stale":
+                self._revalidate(key, refresh, args, kwargs)
+            return value
+
+        value = apply_schema(method.__name__, method(self, *args, **kwargs))
+        if _is_cacheable(value):
+            self.cache.set(key, value)
+        return value
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with track_call(
+            method.__name__, explain=INSTRUMENTATION_CONFIG["explain"]
+        ) as call:
+            started = time.perf_counter()
+            value = cached_call(self, call, args, kwargs)
+            if self.stats is not None:
+                self.stats.record(call, time.perf_counter() - started, value)
+            return value
+
+    wrapper.refresh = refresh
+    return wrapper
+
+
+def empty_snapshot():
+    """Painéis vazios no formato retornado por get_dashboard_snapshot"""
+    return {
+        "total_sales": pd.DataFrame(),
+        "sales_by_model": pd.DataFrame(),
+        "sales_by_dealership": pd.DataFrame(),
+        "sales_by_salesperson": pd.DataFrame(),
+    }
+
 
 class SalesData:
-    def __init__(self):
-        self.db = DatabaseConnection()
-        self.connected = self.db.connect()
+    # get_sales_count_estimate vem das estatísticas do planejador: aproximada
+    exact_count = False
+
+    def __init__(
+        self,
+        cache=None,
+        incremental=None,
+        use_rollups=None,
+        db_config=None,
+        cube=None,
+    ):
+        """Conecta ao banco; cache=False desativa a memoização"""
+        self.connected = self._connect(db_config)
+        if cache is None:
+            cache = ResultCache.from_config()
+        self.cache = cache or None
+        self.stats = QueryStats(INSTRUMENTATION_CONFIG["capacity"])
+        self.dimensions = None
+        if DIMENSION_CACHE_CONFIG["enabled"]:
+            self.dimensions = DimensionCache(self.db, DIMENSION_CACHE_CONFIG["ttl"])
+        if incremental is None:
+            incremental = INCREMENTAL_AGGREGATES
+        self.incremental = IncrementalAggregates(self.db) if incremental else None
+        if use_rollups is None:
+            use_rollups = ROLLUP_CONFIG["enabled"]
+        self.use_rollups = use_rollups
+        self._rollup_available = None
+        self._rollup_checked_at = None
+        if cube is None:
+            cube = CUBE_CONFIG["enabled"]
+        self.cube = None
+        if cube:
+            self.cube = SalesCube(self.db, CUBE_CONFIG["max_bytes"], CUBE_CONFIG["ttl"])
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._revalidating = set()
+
+    def _connect(self, db_config):
+        """Abre a fonte dos dados e indica se ela está disponível"""
+        self.db = DatabaseConnection(db_config)
+        return self.db.connect()
+
+    def _check_source(self):
+        """Chamado antes de cada consulta ao cache; o banco ao vivo não muda de versão"""
+
+    def data_freshness(self):
+        """Momento dos dados exibidos; None indica dados ao vivo do banco"""
+        return None
+
+    def refresh_incremental(self):
+        """Incorpora as vendas novas aos agregados incrementais"""
+        if self.incremental is None or not self.connected:
+            return 0
+        return self.incremental.refresh()
+
+    def _cube_answer(self, panel, start_date, end_date, year=None, **dimensions):
+        """Responde o painel (ou o snapshot) pelo cubo em memória
+
+        Retorna None quando o cubo está desativado, grande demais ou não
+        cobre o período, e a consulta segue para o SQL.
+        """
+        if self.cube is None:
+            return None
+        dimensions = {name: filter_values(value) for name, value in dimensions.items()}
+        if panel == "snapshot":
+            return self.cube.snapshot(start_date, end_date, **dimensions)
+        return self.cube.query(panel, start_date, end_date, year, **dimensions)
+
+    def _aggregate_source(self, start_date, end_date, year=None, **dimensions):
+        """Escolhe entre o rollup diário e vendas e monta o WHERE dos filtros
+
+        Retorna (usa_rollup, where, params); o rollup usa o alias r e
+        vendas, o alias ven.
+        """
+        if self._rollup_ready():
+            filtered = sales_where(
+                "r", start_date, end_date, year, rollup=True, **dimensions
+            )
+            if filtered is not None:
+                return (True, *filtered)
+        return (False, *sales_where("ven", start_date, end_date, year, **dimensions))
+
+    def _rollup_ready(self):
+        """Indica se o rollup diário existe e pode responder às consultas
+
+        A verificação é guardada por refresh_interval segundos: sem a view
+        (ainda não criada, ou removida), as consultas usam vendas.
+        """
+        if not self.use_rollups or not self.connected:
+            return False
+        now = time.monotonic()
+        if (
+            self._rollup_checked_at is None
+            or now - self._rollup_checked_at > ROLLUP_CONFIG["refresh_interval"]
+        ):
+            self._rollup_available = RollupManager(self.db).exists()
+            self._rollup_checked_at = now
+            if not self._rollup_available:
+                print(f"Rollup {ROLLUP_VIEW} indisponível; usando a tabela de vendas")
+        return self._rollup_available
+
+    def _rollup_query(self, query, params=None):
+        """Executa a consulta no rollup, ou retorna None se ela falhar
+
+        A falha marca o rollup como indisponível e não fica registrada na
+        chamada: quem chamou refaz a consulta sobre vendas.
+        """
+        call = current_call()
+        recorded = len(call.errors) if call is not None else 0
+        result = self.db.execute_query(query, params)
+        if not result.columns.empty:
+            return result
+        print(f"Erro na consulta ao rollup {ROLLUP_VIEW}; usando a tabela de vendas")
+        self._rollup_available = False
+        self._rollup_checked_at = time.monotonic()
+        if call is not None:
+            del call.errors[recorded:]
+        return None
+
+    def _query_aggregate(self, run, start_date, end_date, year=None, **dimensions):
+        """Executa run(rollup, where, params) no rollup diário, quando ele
+        atende ao período, e sobre vendas se não atende ou se falhar"""
+        rollup, where, params = self._aggregate_source(
+            start_date, end_date, year, **dimensions
+        )
+        if rollup:
+            result = run(True, where, params)
+            if result is not None:
+                return result
+            where, params = sales_where("ven", start_date, end_date, year, **dimensions)
+        return run(False, where, params)
 
-    def get_total_sales(self):
+    @cached_query
+    def get_filter_options(self):
+        """Retorna os valores disponíveis para os filtros de dimensão"""
+        if not self.connected:
+            return {}
+
+        options = self.db.execute_query(FILTER_OPTIONS_QUERY)
+        if options.empty:
+            return {}
+        return {
+            name: rows["valor"].tolist()
+            for name, rows in options.groupby("filtro", sort=False)
+        }
+
+    @cached_query
+    def get_total_sales(
+        self,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
         """Retorna o total de vendas"""
         if not self.connected:
             print("Erro: Não foi possível conectar com o banco de dados")
             return pd.DataFrame()
 
-        query = """
+        dimensions = {
+            "dealership": dealership,
+            "state": state,
+            "model": model,
+            "salesperson": salesperson,
+        }
+        answer = self._cube_answer("total_sales", start_date, end_date, **dimensions)
+        if answer is not None:
+            return answer
+        if self.incremental is not None and not has_filters(
+            start_date, end_date, **dimensions
+        ):
+            self.incremental.refresh()
+            return self.incremental.get_total()
+
+        rollup, where, params = self._aggregate_source(
+            start_date, end_date, **dimensions
+        )
+        if rollup:
+            query = ROLLUP_QUERIES["get_total_sales"].format(where=where)
+            result = self._rollup_query(query, tuple(params) or None)
+            if result is not None:
+                return result
+            where, params = sales_where("ven", start_date, end_date, **dimensions)
+
+        query = f"""
         SELECT 
             COUNT(*) as total_vendas,
             SUM(valor_pago) as valor_total_vendas,
             AVG(valor_pago) as valor_medio_venda
-        FROM vendas
+        FROM vendas ven
+        {where}
         """
-        return self.db.execute_query(query)
+        return self.db.execute_query(query, tuple(params) or None)
 
-    def get_sales_by_model(self):
+    @cached_query
+    def get_sales_by_model(
+        self,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
         """Retorna vendas por modelo de veículo"""
         if not self.connected:
             return pd.DataFrame()
 
-        query = """
+        dimensions = {
+            "dealership": dealership,
+            "state": state,
+            "model": model,
+            "salesperson": salesperson,
+        }
+        answer = self._cube_answer("sales_by_model", start_date, end_date, **dimensions)
+        if answer is not None:
+            return answer
+        if self.incremental is not None and not has_filters(
+            start_date, end_date, **dimensions
+        ):
+            self.incremental.refresh()
+            return self.incremental.get("sales_by_model")
+
+        rollup, where, params = self._aggregate_source(
+            start_date, end_date, **dimensions
+        )
+        if rollup:
+            query = ROLLUP_QUERIES["get_sales_by_model"].format(where=where)
+            result = self._rollup_query(query, tuple(params) or None)
+            if result is not None:
+                return result
+            where, params = sales_where("ven", start_date, end_date, **dimensions)
+
+        query = f"""
         SELECT 
             v.nome as modelo,
             COUNT(*) as quantidade_vendida,
@@ -86,49 +1196,148 @@ class SalesData:
             AVG(ven.valor_pago) as valor_medio
         FROM vendas ven
         JOIN veiculos v ON ven.id_veiculos = v.id_veiculos
+        {where}
         GROUP BY v.id_veiculos, v.nome
         ORDER BY quantidade_vendida DESC
         """
-        return self.db.execute_query(query)
+        return self.db.execute_query(query, tuple(params) or None)
 
-    def get_sales_by_month(self, year=None):
-        """Retorna vendas por mês"""
+    @cached_query
+    def get_sales_by_month(
+        self,
+        year=None,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Retorna vendas por mês
+
+        Agrupa por DATE_TRUNC('month') e só depois extrai ano, mês e nome,
+        uma vez por mês em vez de uma vez por venda.
+        """
         if not self.connected:
             return pd.DataFrame()
 
+        dimensions = {
+            "dealership": dealership,
+            "state": state,
+            "model": model,
+            "salesperson": salesperson,
+        }
+        answer = self._cube_answer(
+            "sales_by_month", start_date, end_date, year, **dimensions
+        )
+        if answer is not None:
+            return answer
+        if self.incremental is not None and not has_filters(
+            start_date, end_date, **dimensions
+        ):
+            self.incremental.refresh()
+            by_month = self.incremental.get("sales_by_month")
+            if year and not by_month.empty:
+                by_month = (
+                    by_month[by_month["ano"] == year]
+                    .drop(columns="ano")
+                    .sort_values("mes")
+                    .reset_index(drop=True)
+                )
+            return by_month
+
+        rollup, where, params = self._aggregate_source(
+            start_date, end_date, year, **dimensions
+        )
+        if rollup:
+            name = "get_sales_by_month_year" if year else "get_sales_by_month"
+            query = ROLLUP_QUERIES[name].format(where=where)
+            result = self._rollup_query(query, tuple(params) or None)
+            if result is not None:
+                return result
+            where, params = sales_where("ven", start_date, end_date, year, **dimensions)
+
         if year:
-            query = """
+            query = f"""
             SELECT 
-                EXTRACT(MONTH FROM data_venda) as mes,
-                TO_CHAR(data_venda, 'Month') as nome_mes,
-                COUNT(*) as quantidade_vendida,
-                SUM(valor_pago) as valor_total
-            FROM vendas
-            WHERE EXTRACT(YEAR FROM data_venda) = %s
-            GROUP BY EXTRACT(MONTH FROM data_venda), TO_CHAR(data_venda, 'Month')
+                EXTRACT(MONTH FROM m.mes_ref) as mes,
+                TO_CHAR(m.mes_ref, 'Month') as nome_mes,
+                m.quantidade_vendida,
+                m.valor_total
+            FROM (
+                SELECT 
+                    DATE_TRUNC('month', data_venda) as mes_ref,
+                    COUNT(*) as quantidade_vendida,
+                    SUM(valor_pago) as valor_total
+                FROM vendas ven
+                {where}
+                GROUP BY DATE_TRUNC('month', data_venda)
+            ) m
             ORDER BY mes
             """
-            return self.db.execute_query(query, (year,))
         else:
-            query = """
+            query = f"""
             SELECT 
-                EXTRACT(YEAR FROM data_venda) as ano,
-                EXTRACT(MONTH FROM data_venda) as mes,
-                TO_CHAR(data_venda, 'Month') as nome_mes,
-                COUNT(*) as quantidade_vendida,
-                SUM(valor_pago) as valor_total
-            FROM vendas
-            GROUP BY EXTRACT(YEAR FROM data_venda), EXTRACT(MONTH FROM data_venda), TO_CHAR(data_venda, 'Month')
+                EXTRACT(YEAR FROM m.mes_ref) as ano,
+                EXTRACT(MONTH FROM m.mes_ref) as mes,
+                TO_CHAR(m.mes_ref, 'Month') as nome_mes,
+                m.quantidade_vendida,
+                m.valor_total
+            FROM (
+                SELECT 
+                    DATE_TRUNC('month', data_venda) as mes_ref,
+                    COUNT(*) as quantidade_vendida,
+                    SUM(valor_pago) as valor_total
+                FROM vendas ven
+                {where}
+                GROUP BY DATE_TRUNC('month', data_venda)
+            ) m
             ORDER BY ano DESC, mes
             """
-            return self.db.execute_query(query)
+        return self.db.execute_query(query, tuple(params) or None)
 
-    def get_sales_by_dealership(self):
+    @cached_query
+    def get_sales_by_dealership(
+        self,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
         """Retorna vendas por concessionária"""
         if not self.connected:
             return pd.DataFrame()
 
-        query = """
+        dimensions = {
+            "dealership": dealership,
+            "state": state,
+            "model": model,
+            "salesperson": salesperson,
+        }
+        answer = self._cube_answer(
+            "sales_by_dealership", start_date, end_date, **dimensions
+        )
+        if answer is not None:
+            return answer
+        if self.incremental is not None and not has_filters(
+            start_date, end_date, **dimensions
+        ):
+            self.incremental.refresh()
+            return self.incremental.get("sales_by_dealership")
+
+        rollup, where, params = self._aggregate_source(
+            start_date, end_date, **dimensions
+        )
+        if rollup:
+            query = ROLLUP_QUERIES["get_sales_by_dealership"].format(where=where)
+            result = self._rollup_query(query, tuple(params) or None)
+            if result is not None:
+                return result
+            where, params = sales_where("ven", start_date, end_date, **dimensions)
+
+        query = f"""
         SELECT 
             c.concessionaria,
             ci.cidade,
@@ -140,17 +1349,54 @@ class SalesData:
         JOIN concessionarias c ON ven.id_concessionarias = c.id_concessionarias
         JOIN cidades ci ON c.id_cidades = ci.id_cidades
         JOIN estados es ON ci.id_estados = es.id_estados
+        {where}
         GROUP BY c.id_concessionarias, c.concessionaria, ci.cidade, es.estado
         ORDER BY valor_total DESC
         """
-        return self.db.execute_query(query)
+        return self.db.execute_query(query, tuple(params) or None)
 
-    def get_sales_by_salesperson(self):
+    @cached_query
+    def get_sales_by_salesperson(
+        self,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
         """Retorna vendas por vendedor"""
         if not self.connected:
             return pd.DataFrame()
 
-        query = """
+        dimensions = {
+            "dealership": dealership,
+            "state": state,
+            "model": model,
+            "salesperson": salesperson,
+        }
+        answer = self._cube_answer(
+            "sales_by_salesperson", start_date, end_date, **dimensions
+        )
+        if answer is not None:
+            return answer
+        if self.incremental is not None and not has_filters(
+            start_date, end_date, **dimensions
+        ):
+            self.incremental.refresh()
+            return self.incremental.get("sales_by_salesperson")
+
+        rollup, where, params = self._aggregate_source(
+            start_date, end_date, **dimensions
+        )
+        if rollup:
+            query = ROLLUP_QUERIES["get_sales_by_salesperson"].format(where=where)
+            result = self._rollup_query(query, tuple(params) or None)
+            if result is not None:
+                return result
+            where, params = sales_where("ven", start_date, end_date, **dimensions)
+
+        query = f"""
         SELECT 
             v.nome as vendedor,
             c.concessionaria,
@@ -160,57 +1406,691 @@ class SalesData:
         FROM vendas ven
         JOIN vendedores v ON ven.id_vendedores = v.id_vendedores
         JOIN concessionarias c ON v.id_concessionarias = c.id_concessionarias
+        {where}
         GROUP BY v.id_vendedores, v.nome, c.concessionaria
         ORDER BY valor_total DESC
         """
-        return self.db.execute_query(query)
+        return self.db.execute_query(query, tuple(params) or None)
 
-    def get_recent_sales(self, limit=10):
-        """Retorna as vendas mais recentes"""
+    @cached_query
+    def get_sales_timeseries(
+        self,
+        granularity="day",
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Retorna vendas agrupadas por dia, semana, mês ou trimestre
+
+        Os períodos sem vendas entram com zero: o calendário vai do período
+        de start_date (ou da primeira venda) ao de end_date (ou da última).
+        """
+        if granularity not in TIMESERIES_GRANULARITIES:
+            raise ValueError(f"Granularidade desconhecida: {granularity}")
         if not self.connected:
             return pd.DataFrame()
 
-        query = """
-        SELECT 
-            ven.data_venda,
-            v.nome as modelo,
-            c.concessionaria,
-            vend.nome as vendedor,
-            cli.cliente,
-            ven.valor_pago
-        FROM vendas ven
-        JOIN veiculos v ON ven.id_veiculos = v.id_veiculos
-        JOIN concessionarias c ON ven.id_concessionarias = c.id_concessionarias
-        JOIN vendedores vend ON ven.id_vendedores = vend.id_vendedores
-        JOIN clientes cli ON ven.id_clientes = cli.id_clientes
-        ORDER BY ven.data_venda DESC
-        LIMIT %s
+        dimensions = {
+            "dealership": dealership,
+            "state": state,
+            "model": model,
+            "salesperson": salesperson,
+        }
+        step = TIMESERIES_GRANULARITIES[granularity]
+
+        def run(rollup, where, params):
+            query = TIMESERIES_QUERY.format(where=where, **AGGREGATE_SOURCES[rollup])
+            params = (
+                granularity,
+                *params,
+                granularity,
+                start_date,
+                granularity,
+                end_date,
+                step,
+            )
+            if rollup:
+                return self._rollup_query(query, params)
+            return self.db.execute_query(query, params)
+
+        return self._query_aggregate(run, start_date, end_date, **dimensions)
+
+    @cached_query
+    def get_sales_heatmap(
+        self,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Retorna a matriz densa de valor vendido por concessionária e mês
+
+        Uma linha por concessionária (ordenadas pelo nome) e uma coluna por
+        mês, com zero nos meses sem vendas. A consulta já entrega as células
+        em ordem de linha, então a matriz é só um reshape do resultado.
+        """
+        if not self.connected:
+            return pd.DataFrame()
+
+        dimensions = {
+            "dealership": dealership,
+            "state": state,
+            "model": model,
+            "salesperson": salesperson,
+        }
+
+        def run(rollup, where, params):
+            query = HEATMAP_QUERY.format(where=where, **AGGREGATE_SOURCES[rollup])
+            params = (*params, start_date, end_date)
+            if rollup:
+                return self._rollup_query(query, params)
+            return self.db.execute_query(query, params)
+
+        cells = self._query_aggregate(run, start_date, end_date, **dimensions)
+        if cells.empty:
+            return pd.DataFrame()
+
+        months = cells["mes"].nunique()
+        values = cells["valor_total"].to_numpy("float64").reshape(-1, months)
+        return pd.DataFrame(
+            values,
+            index=pd.Index(
+                cells["concessionaria"].to_numpy()[::months], name="concessionaria"
+            ),
+            columns=pd.DatetimeIndex(cells["mes"].to_numpy()[:months], name="mes"),
+        )
+
+    def _sales_rows_query(self, where, params, limit=None, keyset=False):
+        """Consulta das vendas linha a linha com os filtros informados
+
+        Retorna (consulta, parâmetros, decodificar). Com o cache de
+        dimensões, a consulta traz só as chaves inteiras e os nomes são
+        resolvidos localmente por decode_sales. Com keyset=True a consulta
+        também traz id_vendas, que desempata a ordenação das páginas.
         """
-        return self.db.execute_query(query, (limit,))
+        decode = self.dimensions is not None and self.dimensions.ensure_loaded()
+        select = SALES_KEYS_SELECT if decode else SALES_ROWS_SELECT
+        order = "ven.data_venda DESC"
+        if keyset:
+            select = select.replace("SELECT", "SELECT\n            ven.id_vendas,", 1)
+            order += ", ven.id_vendas DESC"
+        query = f"""{select}
+        {where}
+        ORDER BY {order}
+        """
+        params = list(params)
+        if limit is not None:
+            query += "LIMIT %s\n"
+            params.append(limit)
+        return query, tuple(params), decode
+
+    @cached_query
+    def get_recent_sales(
+        self, limit=10, dealership=None, state=None, model=None, salesperson=None
+    ):
+        """Retorna as vendas mais recentes"""
+        if not self.connected:
+            return pd.DataFrame()
 
-    def get_sales_period(self, start_date, end_date):
+        where, params = sales_where(
+            "ven",
+            dealership=dealership,
+            state=state,
+            model=model,
+            salesperson=salesperson,
+        )
+        query, params, decode = self._sales_rows_query(where, params, limit)
+        rows = self.db.execute_query(query, params)
+        return self.dimensions.decode_sales(rows) if decode else rows
+
+    @cached_query
+    def get_sales_period(
+        self,
+        start_date,
+        end_date,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
         """Retorna vendas em um período específico"""
         if not self.connected:
             return pd.DataFrame()
 
-        query = """
-        SELECT 
-            ven.data_venda,
-            v.nome as modelo,
-            c.concessionaria,
-            vend.nome as vendedor,
-            cli.cliente,
-            ven.valor_pago
-        FROM vendas ven
-        JOIN veiculos v ON ven.id_veiculos = v.id_veiculos
-        JOIN concessionarias c ON ven.id_concessionarias = c.id_concessionarias
-        JOIN vendedores vend ON ven.id_vendedores = vend.id_vendedores
-        JOIN clientes cli ON ven.id_clientes = cli.id_clientes
-        WHERE ven.data_venda BETWEEN %s AND %s
-        ORDER BY ven.data_venda DESC
+        where, params = sales_where(
+            "ven",
+            start_date,
+            end_date,
+            dealership=dealership,
+            state=state,
+            model=model,
+            salesperson=salesperson,
+        )
+        query, params, decode = self._sales_rows_query(where, params)
+        rows = self.db.execute_query(query, params)
+        return self.dimensions.decode_sales(rows) if decode else rows
+
+    @cached_query
+    def get_sales_page(
+        self,
+        after=None,
+        page_size=None,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Retorna uma página de vendas por keyset em (data_venda, id_vendas)
+
+        after é o cursor da página anterior (page_cursor); None retorna a
+        primeira página. Cada página custa o mesmo que a primeira, seja qual
+        for a profundidade, pois não há OFFSET.
+        """
+        if not self.connected:
+            return pd.DataFrame()
+
+        page_size = page_size or PAGINATION_CONFIG["page_size"]
+        where, params = sales_where(
+            "ven",
+            start_date,
+            end_date,
+            dealership=dealership,
+            state=state,
+            model=model,
+            salesperson=salesperson,
+        )
+        if after is not None:
+            where = (
+                f"{where} AND {SALES_PAGE_KEYSET}"
+                if where
+                else f"WHERE {SALES_PAGE_KEYSET}"
+            )
+            params = [*params, *after]
+        query, params, decode = self._sales_rows_query(
+            where, params, page_size, keyset=True
+        )
+        rows = self.db.execute_query(query, params)
+        if not decode or rows.empty:
+            return rows
+
+        page = self.dimensions.decode_sales(rows)
+        page.insert(0, "id_vendas", rows["id_vendas"].to_numpy())
+        return page
+
+    def prefetch_sales_page(self, page, page_size=None, **filters):
+        """Carrega em segundo plano a página seguinte, deixando-a no cache
+
+        Retorna o Future da consulta, ou None quando não há próxima página
+        ou cache para guardá-la.
+        """
+        page_size = page_size or PAGINATION_CONFIG["page_size"]
+        cursor = page_cursor(page)
+        if self.cache is None or cursor is None or len(page) < page_size:
+            return None
+        return self._get_executor().submit(
+            self.get_sales_page, cursor, page_size, **filters
+        )
+
+    @cached_query
+    def get_sales_count_estimate(
+        self,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Estimativa do planejador para o número de vendas com os filtros
+
+        Evita o COUNT(*) sobre o período inteiro; serve para o total de
+        páginas quando a contagem exata dos agregados não está disponível.
+        """
+        if not self.connected:
+            return None
+
+        where, params = sales_where(
+            "ven",
+            start_date,
+            end_date,
+            dealership=dealership,
+            state=state,
+            model=model,
+            salesperson=salesperson,
+        )
+        plan = self.db.execute_query(
+            f"EXPLAIN (FORMAT JSON) SELECT 1 FROM vendas ven {where}", params
+        )
+        if plan.empty:
+            return None
+        return int(plan.iloc[0, 0][0]["Plan"]["Plan Rows"])
+
+    def iter_recent_sales(
+        self,
+        limit=10,
+        chunksize=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Transmite as vendas mais recentes em blocos de DataFrame"""
+        if not self.connected:
+            return iter(())
+
+        where, params = sales_where(
+            "ven",
+            dealership=dealership,
+            state=state,
+            model=model,
+            salesperson=salesperson,
+        )
+        query, params, decode = self._sales_rows_query(where, params, limit)
+        chunks = self.db.stream_query(query, params, chunksize=chunksize)
+        if decode:
+            return (self.dimensions.decode_sales(chunk) for chunk in chunks)
+        return chunks
+
+    def iter_sales_period(
+        self,
+        start_date,
+        end_date,
+        chunksize=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Transmite as vendas de um período em blocos, sem carregar tudo em memória"""
+        if not self.connected:
+            return iter(())
+
+        where, params = sales_where(
+            "ven",
+            start_date,
+            end_date,
+            dealership=dealership,
+            state=state,
+            model=model,
+            salesperson=salesperson,
+        )
+        query, params, decode = self._sales_rows_query(where, params)
+        chunks = self.db.stream_query(query, params, chunksize=chunksize)
+        if decode:
+            return (self.dimensions.decode_sales(chunk) for chunk in chunks)
+        return chunks
+
+    @cached_query
+    def get_dashboard_snapshot(
+        self,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Retorna os agregados de todos os painéis em uma única consulta"""
+        panels = empty_snapshot()
+        if not self.connected:
+            return panels
+
+        dimensions = {
+            "dealership": dealership,
+            "state": state,
+            "model": model,
+            "salesperson": salesperson,
+        }
+        answer = self._cube_answer("snapshot", start_date, end_date, **dimensions)
+        if answer is not None:
+            return answer
+        if self.incremental is not None and not has_filters(
+            start_date, end_date, **dimensions
+        ):
+            self.incremental.refresh()
+            panels["total_sales"] = self.incremental.get_total()
+            for name in panels:
+                if name != "total_sales":
+                    panels[name] = self.incremental.get(name)
+            return panels
+
+        result = None
+        filtered = None
+        if self._rollup_ready():
+            filtered = sales_where(
+                "ven", start_date, end_date, rollup=True, **dimensions
+            )
+        if filtered is not None:
+            # Limites em dias inteiros: o rollup diário responde a consulta
+            where, params = filtered
+            query = SNAPSHOT_QUERY.format(
+                source=f"{ROLLUP_VIEW} ven",
+                where=where,
+                measures="ven.quantidade_vendida, ven.valor_total",
+                aggregates="""
+                COALESCE(SUM(b.quantidade_vendida), 0)::bigint as quantidade_vendida,
+                SUM(b.valor_total) as valor_total,
+                SUM(b.valor_total) / NULLIF(SUM(b.quantidade_vendida), 0) as valor_medio
+            """,
+            )
+            result = self._rollup_query(query, tuple(params) or None)
+        if result is None:
+            where, params = sales_where("ven", start_date, end_date, **dimensions)
+            query = SNAPSHOT_QUERY.format(
+                source="vendas ven",
+                where=where,
+                measures="ven.valor_pago",
+                aggregates="""
+                COUNT(*) as quantidade_vendida,
+                SUM(b.valor_pago) as valor_total,
+                AVG(b.valor_pago) as valor_medio
+            """,
+            )
+            result = self.db.execute_query(query, tuple(params) or None)
+        if result.empty:
+            return panels
+
+        return self._split_snapshot(result)
+
+    def _split_snapshot(self, result, extra=()):
+        """Separa o resultado do snapshot nos DataFrames de cada painel
+
+        As colunas de extra (as margens de erro da estimativa) são mantidas
+        em todos os painéis.
         """
-        return self.db.execute_query(query, (start_date, end_date))
+        extra = list(extra)
+        by_panel = {name: rows for name, rows in result.groupby("painel")}
+        empty = result.iloc[0:0]
+
+        total = by_panel.get("total_sales", empty)
+        model = by_panel.get("sales_by_model", empty)
+        dealership = by_panel.get("sales_by_dealership", empty)
+        salesperson = by_panel.get("sales_by_salesperson", empty)
+
+        return {
+            "total_sales": total[
+                ["quantidade_vendida", "valor_total", "valor_medio", *extra]
+            ]
+            .rename(
+                columns={
+                    "quantidade_vendida": "total_vendas",
+                    "valor_total": "valor_total_vendas",
+                    "valor_medio": "valor_medio_venda",
+                }
+            )
+            .reset_index(drop=True),
+            "sales_by_model": model[
+                ["modelo", "quantidade_vendida", "valor_total", "valor_medio", *extra]
+            ]
+            .sort_values("quantidade_vendida", ascending=False)
+            .reset_index(drop=True),
+            "sales_by_dealership": dealership[
+                [
+                    "concessionaria",
+                    "cidade",
+                    "estado",
+                    "quantidade_vendida",
+                    "valor_total",
+                    "valor_medio",
+                    *extra,
+                ]
+            ]
+            .sort_values("valor_total", ascending=False)
+            .reset_index(drop=True),
+            "sales_by_salesperson": salesperson[
+                [
+                    "vendedor",
+                    "concessionaria_vendedor",
+                    "quantidade_vendida",
+                    "valor_total",
+                    "valor_medio",
+                    *extra,
+                ]
+            ]
+            .rename(columns={"concessionaria_vendedor": "concessionaria"})
+            .sort_values("valor_total", ascending=False)
+            .reset_index(drop=True),
+        }
+
+    def _sample_fraction(self):
+        """Percentual de páginas a amostrar e fração de vendas efetivamente
+        amostrada, ou None se a tabela é pequena o bastante para o snapshot
+        exato responder rápido"""
+        rows = self.db.execute_query(TABLE_ROWS_QUERY)
+        if rows.empty:
+            return None
+        rows = int(rows["linhas"].iloc[0])
+        if rows < APPROX_CONFIG["min_rows"]:
+            return None
+        percent = min(100.0, 100.0 * APPROX_CONFIG["sample_rows"] / rows)
+
+        # SYSTEM sorteia páginas inteiras: o número de linhas varia e a escala
+        # usa a contagem real da mesma amostra (REPEATABLE)
+        sampled = self.db.execute_query(
+            f"SELECT COUNT(*) as amostra FROM {SAMPLE_SOURCE}", (percent,)
+        )
+        if sampled.empty or not sampled["amostra"].iloc[0]:
+            return None
+        return percent, min(1.0, int(sampled["amostra"].iloc[0]) / rows)
+
+    @staticmethod
+    def _scale_sample(result, fraction):
+        """Extrapola contagens e somas da amostra e calcula as margens de erro
+
+        Cada venda entra na amostra com probabilidade fraction: o total é
+        estimado por soma / fraction (Horvitz-Thompson), com variância
+        (1 - fraction) / fraction² × soma dos quadrados. A amostragem por
+        blocos agrupa vendas próximas, então a margem é uma aproximação.
+        """
+        z = APPROX_CONFIG["z"]
+        sample = result["amostra"]
+        spread = (1 - fraction) ** 0.5 / fraction
+        return result.assign(
+            quantidade_vendida=(sample / fraction).round(),
+            valor_total=result["soma"] / fraction,
+            valor_medio=result["soma"] / sample,
+            margem_quantidade=z * spread * sample**0.5,
+            margem_valor=z * spread * result["soma_quadrados"] ** 0.5,
+        )
+
+    @cached_query
+    def get_dashboard_estimate(
+        self,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Estima os painéis de get_dashboard_snapshot com TABLESAMPLE SYSTEM
+
+        Lê só uma fração das páginas de vendas (cerca de
+        APPROX_CONFIG["sample_rows"] linhas) e extrapola os totais; cada
+        painel traz margem_quantidade e margem_valor (z × erro padrão).
+        Retorna None quando a tabela é pequena ou a amostra não tem vendas
+        com os filtros: nesses casos só vale esperar pelo exato.
+        """
+        if not self.connected:
+            return None
+        sample = self._sample_fraction()
+        if sample is None:
+            return None
+        percent, fraction = sample
+
+        where, params = sales_where(
+            "ven",
+            start_date,
+            end_date,
+            dealership=dealership,
+            state=state,
+            model=model,
+            salesperson=salesperson,
+        )
+        query = SNAPSHOT_QUERY.format(
+            source=SAMPLE_SOURCE,
+            where=where,
+            measures="ven.valor_pago",
+            aggregates="""
+                COUNT(*) as amostra,
+                SUM(b.valor_pago) as soma,
+                SUM(b.valor_pago * b.valor_pago) as soma_quadrados
+            """,
+        )
+        result = self.db.execute_query(query, (percent, *params))
+        if result.empty or not result["amostra"].any():
+            return None
+        return self._split_snapshot(
+            self._scale_sample(result, fraction), ESTIMATE_MARGINS
+        )
+
+    def fetch_snapshot_progressive(
+        self, start_date=None, end_date=None, wait=None, **dimensions
+    ):
+        """Snapshot exato se chegar em wait segundos; senão, a estimativa
+
+        Retorna (painéis, pendente): pendente é None quando os painéis são
+        exatos, ou o Future do snapshot exato que segue em segundo plano.
+        Se o snapshot exato falhar ou exceder o tempo limite sem estimativa,
+        retorna (None, None), como fetch_many faz com cada consulta.
+        """
+        if wait is None:
+            wait = APPROX_CONFIG["wait"]
+        exact = self._get_executor().submit(
+            self.get_dashboard_snapshot, start_date, end_date, **dimensions
+        )
+        try:
+            return exact.result(timeout=wait), None
+        except FuturesTimeoutError:
+            pass
+        except Exception as e:
+            print(f"Erro ao executar consulta snapshot: {e}")
+            return None, None
+
+        estimate = self.get_dashboard_estimate(start_date, end_date, **dimensions)
+        if estimate is not None and not exact.done():
+            return estimate, exact
+        try:
+            return exact.result(timeout=FETCH_CONFIG["timeout"]), None
+        except FuturesTimeoutError:
+            # A consulta segue em segundo plano e devolve a conexão ao terminar
+            exact.cancel()
+            print("Erro: Consulta snapshot excedeu o tempo limite")
+        except Exception as e:
+            print(f"Erro ao executar consulta snapshot: {e}")
+        return None, None
+
+    def invalidate_cache(self, method=None):
+        """Descarta resultados memoizados de um método ou de todos"""
+        if self.cache is not None:
+            self.cache.invalidate(method)
+
+    def refresh_query(self, method, *args, **kwargs):
+        """Recalcula um método memoizado ignorando o cache e guarda o resultado
+
+        Levanta QueryError quando a consulta falha, mantendo a entrada anterior.
+        """
+        return getattr(type(self), method).refresh(self, *args, **kwargs)
+
+    def _revalidate(self, key, refresh, args, kwargs):
+        """Recalcula em segundo plano uma entrada stale, uma vez por chave"""
+        with self._executor_lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+        if not self.cache.claim(("revalidate", key), FETCH_CONFIG["timeout"]):
+            # Outro processo já está recalculando esta entrada
+            with self._executor_lock:
+                self._revalidating.discard(key)
+            return
+
+        def run():
+            try:
+                refresh(self, *args, **kwargs)
+            except Exception as e:
+                print(f"Erro ao revalidar {key[0]}: {e}")
+            finally:
+                with self._executor_lock:
+                    self._revalidating.discard(key)
+
+        self._get_executor().submit(run)
+
+    def _get_executor(self):
+        """Cria sob demanda o pool de threads das consultas paralelas"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=FETCH_CONFIG["max_workers"],
+                    thread_name_prefix="sales-fetch",
+                )
+            return self._executor
+
+    def fetch_many(self, requests, timeout=None, timeouts=None):
+        """Executa consultas independentes em paralelo e reúne os resultados
+
+        requests mapeia um nome para o nome de um método com seus argumentos,
+        por exemplo ("get_recent_sales", 1000), ou para uma função sem
+        argumentos. Cada consulta usa sua própria conexão do pool e tem seu
+        próprio tempo limite (timeouts[nome], ou timeout), contado a partir
+        do início da execução: o pool de threads é compartilhado por todas
+        as sessões, e o tempo na fila não conta. Retorna (resultados,
+        erros): consultas que falharam ou excederam o tempo ficam com
+        resultado None e a exceção correspondente em erros.
+        """
+        if timeout is None:
+            timeout = FETCH_CONFIG["timeout"]
+        timeouts = timeouts or {}
+        executor = self._get_executor()
+
+        started = {}
+        begun = {name: threading.Event() for name in requests}
+
+        def timed(name, function, *args):
+            started[name] = time.monotonic()
+            begun[name].set()
+            return function(*args)
+
+        futures = {}
+        for name, request in requests.items():
+            if callable(request):
+                futures[name] = executor.submit(timed, name, request)
+            else:
+                method = getattr(self, request[0])
+                futures[name] = executor.submit(timed, name, method, *request[1:])
+            # Cancelada antes de começar (pool encerrado): não espera o início
+            futures[name].add_done_callback(lambda _, event=begun[name]: event.set())
+
+        results = {}
+        errors = {}
+        for name, future in futures.items():
+            begun[name].wait()
+            deadline = started.get(name, time.monotonic()) + timeouts.get(name, timeout)
+            try:
+                results[name] = future.result(
+                    timeout=max(deadline - time.monotonic(), 0)
+                )
+            except FuturesTimeoutError:
+                # A consulta segue em segundo plano e devolve a conexão ao terminar
+                future.cancel()
+                results[name] = None
+                errors[name] = TimeoutError(f"Consulta {name} excedeu o tempo limite")
+                print(f"Erro: {errors[name]}")
+            except Exception as e:
+                results[name] = None
+                errors[name] = e
+                print(f"Erro ao executar consulta {name}: {e}")
+        return results, errors
 
     def close_connection(self):
         """Fecha a conexão com o banco"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
         self.db.disconnect()
@@ -0,0 +1,124 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Coluna decodificada: (tabela, chave, coluna de nome)
+DIMENSIONS = {
+    "modelo": ("veiculos", "id_veiculos", "nome"),
+    "concessionaria": ("concessionarias", "id_concessionarias", "concessionaria"),
+    "vendedor": ("vendedores", "id_vendedores", "nome"),
+    "cliente": ("clientes", "id_clientes", "cliente"),
+}
+
+# Colunas de get_recent_sales/get_sales_period, na ordem de SALES_ROWS_SELECT
+SALES_ROW_COLUMNS = [
+    "data_venda",
+    "modelo",
+    "concessionaria",
+    "vendedor",
+    "cliente",
+    "valor_pago",
+]
+
+
+class DimensionLookup:
+    """Mapeia chaves inteiras para códigos de categoria com um array denso"""
+
+    def __init__(self, ids, names):
+        codes, self.categories = pd.factorize(names, sort=True)
+        ids = np.asarray(ids, dtype=np.int64)
+        self.positions = np.full(int(ids.max(initial=-1)) + 1, -1, dtype=np.int32)
+        self.positions[ids] = codes
+
+    def codes(self, ids):
+        """Códigos de categoria das chaves; -1 para chaves desconhecidas"""
+        ids = np.asarray(ids, dtype=np.int64)
+        known = (ids >= 0) & (ids < len(self.positions))
+        codes = np.full(len(ids), -1, dtype=np.int32)
+        codes[known] = self.positions[ids[known]]
+        return codes
+
+    def decode(self, codes):
+        """Monta a coluna categórica só com as categorias usadas"""
+        return pd.Categorical.from_codes(
+            codes, self.categories
+        ).remove_unused_categories()
+
+
+class DimensionCache:
+    """Tabelas de dimensão em memória para decodificar as chaves das vendas
+
+    As consultas de vendas trazem só as chaves inteiras; os nomes são
+    resolvidos localmente. As tabelas são recarregadas após o TTL ou quando
+    aparece uma chave ainda não carregada (dimensão nova).
+    """
+
+    def __init__(self, db, ttl=3600):
+        self.db = db
+        self.ttl = ttl
+        self._lookups = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def is_stale(self):
+        """Indica se as dimensões nunca foram carregadas ou passaram do TTL"""
+        if self._lookups is None:
+            return True
+        return bool(self.ttl) and time.monotonic() - self._loaded_at > self.ttl
+
+    def refresh(self):
+        """Recarrega todas as dimensões; mantém as anteriores se falhar"""
+        lookups = {}
+        for column, (table, key, name) in DIMENSIONS.items():
+            frame = self.db.execute_query(f"SELECT {key}, {name} FROM {table}")
+            if frame.columns.empty:
+                print(f"Erro ao carregar a dimensão {table}")
+                return False
+            lookups[column] = DimensionLookup(frame[key], frame[name])
+
+        self._lookups = lookups
+        self._loaded_at = time.monotonic()
+        return True
+
+    def ensure_loaded(self):
+        """Carrega as dimensões quando necessário e indica se estão disponíveis"""
+        if self.is_stale():
+            with self._lock:
+                if self.is_stale():
+                    self.refresh()
+        return self._lookups is not None
+
+    def decode_sales(self, frame):
+        """Troca as chaves das vendas pelos nomes das dimensões"""
+        if frame.columns.empty:
+            return frame
+        if frame.empty:
+            return pd.DataFrame(columns=SALES_ROW_COLUMNS)
+
+        codes = self._codes(frame)
+        if any((values < 0).any() for values in codes.values()):
+            with self._lock:
+                self.refresh()
+            codes = self._codes(frame)
+
+        decoded = {
+            column: self._lookups[column].decode(values)
+            for column, values in codes.items()
+        }
+        return pd.DataFrame(
+            {
+                "data_venda": frame["data_venda"].to_numpy(),
+                **decoded,
+                "valor_pago": frame["valor_pago"].to_numpy(),
+            },
+            columns=SALES_ROW_COLUMNS,
+        )
+
+    def _codes(self, frame):
+        lookups = self._lookups
+        return {
+            column: lookups[column].codes(frame[key].to_numpy())
+            for column, (_, key, _) in DIMENSIONS.items()
+        }
@@ -0,0 +1,392 @@
+"""
+Cache de resultados compartilhado entre processos, em disco local
+
+Cada DataFrame fica em um arquivo Arrow IPC, lido por memory map: as
+colunas numéricas viram views das páginas do arquivo, sem cópia, e o
+sistema operacional compartilha essas páginas entre os processos do
+Streamlit. Um índice SQLite guarda chave, validade, tamanho e último
+acesso; gravações, invalidações e despejos seguram um lock de arquivo
+(flock), e os arquivos de cada versão têm nome único, então quem lê nunca
+vê um arquivo pela metade.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+
+from config import CACHE_CONFIG, CACHE_TTLS
+from database import ResultCache
+
+try:
+    import fcntl
+except ImportError:  # Windows: só as transações do SQLite serializam os escritores
+    fcntl = None
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entradas (
+    chave TEXT PRIMARY KEY,
+    metodo TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    nomes TEXT,
+    valor BLOB,
+    arquivo TEXT,
+    expira_em REAL NOT NULL,
+    tamanho INTEGER NOT NULL,
+    acesso REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entradas_acesso ON entradas (acesso);
+CREATE TABLE IF NOT EXISTS reservas (
+    nome TEXT PRIMARY KEY,
+    ate REAL NOT NULL
+);
+"""
+
+# Último acesso só é regravado depois deste intervalo, para não transformar
+# cada leitura em uma escrita no índice
+ACCESS_RESOLUTION = 5.0
+
+# Arquivos sem entrada no índice há mais tempo que isto são de gravações
+# interrompidas e podem ser apagados
+ORPHAN_AGE = 600.0
+
+
+def _write_frame(frame, path):
+    """Grava o DataFrame em um arquivo Arrow IPC"""
+    table = pa.Table.from_pandas(frame)
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _read_frame(path):
+    """Lê o DataFrame por memory map; colunas numéricas não são copiadas"""
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+class DiskResultCache(ResultCache):
+    """ResultCache em disco, compartilhado por todos os processos do diretório
+
+    Mesma interface do cache em memória (lookup, get, set, invalidate e
+    stats), com TTL e stale_ttl contados em tempo de relógio. DataFrames e
+    dicionários de DataFrames vão para arquivos Arrow; outros valores, em
+    pickle no próprio índice. Acima de max_bytes no disco, as entradas
+    menos acessadas são despejadas.
+    """
+
+    def __init__(
+        self,
+        directory,
+        max_bytes=1024 * 1024 * 1024,
+        default_ttl=300.0,
+        ttls=None,
+        stale_ttl=0.0,
+    ):
+        super().__init__(max_bytes, default_ttl, ttls, stale_ttl)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, "index.sqlite")
+        self._lock_path = os.path.join(directory, "index.lock")
+        self._local = threading.local()
+        with self._exclusive() as index:
+            index.executescript(INDEX_SCHEMA)
+            self._sweep_orphans(index)
+
+    @classmethod
+    def from_config(cls):
+        """Cria o cache em disco a partir de CACHE_CONFIG"""
+        return cls(
+            CACHE_CONFIG["directory"],
+            max_bytes=CACHE_CONFIG["disk_max_bytes"],
+            default_ttl=CACHE_CONFIG["default_ttl"],
+            ttls=CACHE_TTLS,
+            stale_ttl=CACHE_CONFIG["stale_ttl"],
+        )
+
+    def _index(self):
+        """Conexão com o índice, uma por thread"""
+        index = getattr(self._local, "index", None)
+        if index is None:
+            index = sqlite3.connect(self._index_path, timeout=30)
+            index.execute("PRAGMA journal_mode=WAL")
+            index.execute("PRAGMA synchronous=NORMAL")
+            self._local.index = index
+        return index
+
+    @contextmanager
+    def _exclusive(self):
+        """Lock entre processos para alterar o índice e os arquivos"""
+        with open(self._lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                index = self._index()
+                with index:
+                    yield index
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def digest(key):
+        """Identificador estável da chave, igual em todos os processos"""
+        return hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+    def _path(self, prefix, position):
+        return os.path.join(self.directory, f"{prefix}.{position}.arrow")
+
+    def _remove_files(self, prefix, count):
+        """Apaga os arquivos de uma versão; leitores com o mapa aberto seguem"""
+        for position in range(count):
+            try:
+                os.remove(self._path(prefix, position))
+            except FileNotFoundError:
+                pass
+
+    def _load(self, kind, names, value, prefix):
+        """Reconstrói o valor guardado a partir do índice e dos arquivos"""
+        if kind == "frame":
+            return _read_frame(self._path(prefix, 0))
+        if kind == "frames":
+            return {
+                name: _read_frame(self._path(prefix, position))
+                for position, name in enumerate(json.loads(names))
+            }
+        return pickle.loads(value)
+
+    def lookup(self, key):
+        """Retorna (estado, valor): estado é "fresh", "stale" ou None (ausente)"""
+        digest = self.digest(key)
+        try:
+            row = (
+                self._index()
+                .execute(
+                    "SELECT tipo, nomes, valor, arquivo, expira_em, acesso "
+                    "FROM entradas WHERE chave = ?",
+                    (digest,),
+                )
+                .fetchone()
+            )
+        except sqlite3.Error as e:
+            print(f"Erro ao ler o índice do cache em disco: {e}")
+            row = None
+
+        now = time.time()
+        state = None
+        if row is not None:
+            kind, names, value, prefix, expires_at, accessed = row
+            if expires_at > now:
+                state = "fresh"
+            elif expires_at + self.stale_ttl > now:
+                state = "stale"
+
+        if state is not None:
+            try:
+                value = self._load(kind, names, value, prefix)
+            except (OSError, pa.ArrowInvalid):
+                # Versão substituída ou despejada por outro processo
+                state = None
+
+        with self._lock:
+            if state == "fresh":
+                self.hits += 1
+            elif state == "stale":
+                self.stale_hits += 1
+            else:
+                self.misses += 1
+        if state is None:
+            return None, None
+
+        if now - accessed > ACCESS_RESOLUTION:
+            try:
+                with self._index() as index:
+                    index.execute(
+                        "UPDATE entradas SET acesso = ? WHERE chave = ?",
+                        (now, digest),
+                    )
+            except sqlite3.Error:
+                pass
+        return state, value
+
+    def set(self, key, value, ttl=None):
+        """Grava o valor em uma versão nova e troca a entrada no índice
+
+        Os arquivos são escritos fora do lock, com nome único; o lock só
+        cobre a troca no índice, a remoção da versão anterior e o despejo.
+        """
+        digest = self.digest(key)
+        prefix = f"{digest}-{uuid.uuid4().hex[:8]}"
+        frames = []
+        names = None
+        blob = None
+        if isinstance(value, pd.DataFrame):
+            kind = "frame"
+            frames = [value]
+        elif (
+            isinstance(value, dict)
+            and value
+            and all(isinstance(v, pd.DataFrame) for v in value.values())
+        ):
+            kind = "frames"
+            names = json.dumps(list(value))
+            frames = list(value.values())
+        else:
+            kind = "object"
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        try:
+            for position, frame in enumerate(frames):
+                _write_frame(frame, self._path(prefix, position))
+        except (OSError, pa.ArrowException) as e:
+            print(f"Erro ao gravar no cache em disco: {e}")
+            self._remove_files(prefix, len(frames))
+            return
+        size = len(blob or b"") + sum(
+            os.path.getsize(self._path(prefix, position))
+            for position in range(len(frames))
+        )
+        oversized = size > self.max_bytes
+        if oversized:
+            self._remove_files(prefix, len(frames))
+
+        ttl = self.ttl_for(key[0]) if ttl is None else ttl
+        now = time.time()
+        try:
+            with self._exclusive() as index:
+                previous = index.execute(
+                    "SELECT chave, arquivo, tipo, nomes FROM entradas WHERE chave = ?",
+                    (digest,),
+                ).fetchone()
+                if previous is not None:
+                    self._drop(index, *previous)
+                if oversized:
+                    # Não cabe no cache: descarta também o valor anterior
+                    return
+                index.execute(
+                    "INSERT OR REPLACE INTO entradas "
+                    "(chave, metodo, tipo, nomes, valor, arquivo, expira_em, "
+                    "tamanho, acesso) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (digest, key[0], kind, names, blob, prefix, now + ttl, size, now),
+                )
+                self._evict(index, now)
+        except sqlite3.Error as e:
+            print(f"Erro ao atualizar o índice do cache em disco: {e}")
+            self._remove_files(prefix, len(frames))
+
+    @staticmethod
+    def _file_count(kind, names):
+        if kind == "frame":
+            return 1
+        if kind == "frames":
+            return len(json.loads(names))
+        return 0
+
+    def _drop(self, index, digest, prefix, kind, names):
+        """Remove a entrada do índice e seus arquivos (chamado com o lock)"""
+        index.execute("DELETE FROM entradas WHERE chave = ?", (digest,))
+        self._remove_files(prefix, self._file_count(kind, names))
+
+    def _evict(self, index, now):
+        """Remove as entradas vencidas além do stale_ttl e, acima de
+        max_bytes, as menos acessadas (chamado com o lock)"""
+        for row in index.execute(
+            "SELECT chave, arquivo, tipo, nomes FROM entradas WHERE expira_em < ?",
+            (now - self.stale_ttl,),
+        ).fetchall():
+            self._drop(index, *row)
+
+        total = index.execute(
+            "SELECT COALESCE(SUM(tamanho), 0) FROM entradas"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for *row, size in index.execute(
+            "SELECT chave, arquivo, tipo, nomes, tamanho FROM entradas "
+            "ORDER BY acesso"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._drop(index, *row)
+            total -= size
+            self.evictions += 1
+
+    def _sweep_orphans(self, index):
+        """Apaga arquivos de gravações interrompidas (chamado com o lock)"""
+        known = {prefix for (prefix,) in index.execute("SELECT arquivo FROM entradas")}
+        limit = time.time() - ORPHAN_AGE
+        for entry in os.scandir(self.directory):
+            prefix = entry.name.split(".", 1)[0]
+            if (
+                entry.name.endswith(".arrow")
+                and prefix not in known
+                and entry.stat().st_mtime < limit
+            ):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def claim(self, name, seconds):
+        """Reserva um recálculo por seconds segundos entre todos os processos
+
+        Só o primeiro processo a pedir recebe True; os demais continuam
+        lendo o resultado que ele gravar.
+        """
+        digest = self.digest(name)
+        now = time.time()
+        try:
+            with self._exclusive() as index:
+                row = index.execute(
+                    "SELECT ate FROM reservas WHERE nome = ?", (digest,)
+                ).fetchone()
+                if row is not None and row[0] > now:
+                    return False
+                index.execute(
+                    "INSERT OR REPLACE INTO reservas (nome, ate) VALUES (?, ?)",
+                    (digest, now + seconds),
+                )
+                index.execute("DELETE FROM reservas WHERE ate < ?", (now,))
+                return True
+        except sqlite3.Error as e:
+            print(f"Erro ao reservar recálculo no cache em disco: {e}")
+            return False
+
+    def invalidate(self, method=None):
+        """Remove as entradas de um método, ou todas, em todos os processos"""
+        query = "SELECT chave, arquivo, tipo, nomes FROM entradas"
+        params = ()
+        if method is not None:
+            query += " WHERE metodo = ?"
+            params = (method,)
+        with self._exclusive() as index:
+            for row in index.execute(query, params).fetchall():
+                self._drop(index, *row)
+
+    def stats(self):
+        """Contadores deste processo e ocupação compartilhada do disco"""
+        entries, size = (
+            self._index()
+            .execute("SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM entradas")
+            .fetchone()
+        )
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": size,
+                "max_bytes": self.max_bytes,
+                "stale_ttl": self.stale_ttl,
+                "directory": self.directory,
+            }
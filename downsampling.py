@@ -0,0 +1,58 @@
+"""
+Redução de séries temporais longas para os gráficos (Largest-Triangle-Three-Buckets)
+
+O LTTB divide a série em baldes e, em cada um, mantém o ponto que forma o
+maior triângulo com o ponto escolhido no balde anterior e a média do balde
+seguinte, preservando picos e vales com uma fração dos pontos.
+"""
+
+import numpy as np
+
+
+def lttb_indices(x, y, threshold):
+    """Índices dos pontos mantidos pelo LTTB, em ordem crescente
+
+    x pode ser numérico ou datetime64. Retorna todos os índices quando a
+    série já tem até threshold pontos (ou threshold < 3).
+    """
+    y = np.asarray(y, dtype="float64")
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x)
+    x = (x - x[0]).astype("float64")
+
+    # threshold - 2 baldes entre o primeiro e o último ponto, que sempre ficam
+    edges = np.linspace(1, n - 1, threshold - 1).astype("int64")
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[: n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[: n - 1], edges[:-1]) / counts
+    # Terceiro vértice de cada balde: a média do seguinte (no último, o ponto final)
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype="int64")
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for bucket in range(threshold - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs(
+            (ax - next_x[bucket]) * (y[lo:hi] - ay)
+            - (ax - x[lo:hi]) * (next_y[bucket] - ay)
+        )
+        a = lo + int(np.argmax(area))
+        selected[bucket + 1] = a
+    return selected
+
+
+def downsample(frame, x, y, threshold):
+    """Linhas do DataFrame mantidas pelo LTTB sobre as colunas x e y
+
+    threshold None ou 0 desativa a redução.
+    """
+    if not threshold or len(frame) <= threshold:
+        return frame
+    return frame.iloc[lttb_indices(frame[x].to_numpy(), frame[y].to_numpy(), threshold)]
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Exportação das vendas de um período em CSV (via COPY) ou Parquet
+
+Uso:
+    python export.py --start 2024-01-01 --end 2024-12-31 --output vendas.csv
+    python export.py --start 2024-01-01 --end 2024-12-31 --format parquet --output vendas.parquet
+    python export.py --start 2024-01-01 --end 2024-12-31 --model Civic --output vendas_civic.csv
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from database import SALES_PERIOD_QUERY, sales_where
+
+EXPORT_FORMATS = {
+    "csv": {"extension": "csv", "mime": "text/csv"},
+    "parquet": {"extension": "parquet", "mime": "application/octet-stream"},
+}
+
+# Colunas e tipos fixos da exportação: blocos com categorias diferentes e
+# períodos sem vendas geram arquivos com o mesmo schema
+EXPORT_SCHEMA = pa.schema(
+    [
+        ("data_venda", pa.timestamp("us")),
+        ("modelo", pa.string()),
+        ("concessionaria", pa.string()),
+        ("vendedor", pa.string()),
+        ("cliente", pa.string()),
+        ("valor_pago", pa.float64()),
+    ]
+)
+
+
+class SalesExporter:
+    """Exporta as vendas de get_sales_period em memória constante
+
+    Os filtros de dimensão (dealership, state, model, salesperson) são os
+    de sales_where, para que o arquivo corresponda ao que o dashboard exibe.
+    Em caso de erro retorna None; um destino informado como caminho é
+    removido, para que não fique um arquivo parcial.
+    """
+
+    def __init__(self, sales_data):
+        self.sales_data = sales_data
+
+    def export(self, start_date, end_date, target, file_format="csv", **dimensions):
+        """Grava as vendas do período no destino e retorna o número de linhas"""
+        if file_format == "csv":
+            return self.export_csv(start_date, end_date, target, **dimensions)
+        if file_format == "parquet":
+            return self.export_parquet(start_date, end_date, target, **dimensions)
+        raise ValueError(f"Formato de exportação desconhecido: {file_format}")
+
+    def export_csv(self, start_date, end_date, target, **dimensions):
+        """Transmite o CSV direto do Postgres com COPY ... TO STDOUT"""
+        db = self.sales_data.db
+        if db is not None:
+            where, params = sales_where("ven", start_date, end_date, **dimensions)
+            query = SALES_PERIOD_QUERY.format(where=where)
+            rows = db.copy_to(query, tuple(params), target)
+            if rows is None:
+                self._discard(target)
+            return rows
+
+        # Backends sem Postgres (snapshot local) escrevem os blocos em sequência
+        rows = 0
+        own_file = isinstance(target, (str, os.PathLike))
+        f = open(target, "wb") if own_file else target
+        try:
+            chunks = self.sales_data.iter_sales_period(
+                start_date, end_date, **dimensions
+            )
+            for chunk in chunks:
+                f.write(chunk.to_csv(index=False, header=rows == 0).encode("utf-8"))
+                rows += len(chunk)
+            if rows == 0:
+                f.write((",".join(EXPORT_SCHEMA.names) + "\n").encode("utf-8"))
+        except Exception as e:
+            print(f"Erro ao exportar vendas: {e}")
+            rows = None
+        finally:
+            if own_file:
+                f.close()
+        if rows is None:
+            self._discard(target)
+        return rows
+
+    def export_parquet(self, start_date, end_date, target, **dimensions):
+        """Converte os blocos do cursor no servidor em row groups Parquet"""
+        rows = 0
+        try:
+            with pq.ParquetWriter(target, EXPORT_SCHEMA) as writer:
+                chunks = self.sales_data.iter_sales_period(
+                    start_date, end_date, **dimensions
+                )
+                for chunk in chunks:
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    writer.write_table(table.cast(EXPORT_SCHEMA))
+                    rows += len(chunk)
+        except Exception as e:
+            print(f"Erro ao exportar vendas: {e}")
+            self._discard(target)
+            return None
+        return rows
+
+    @staticmethod
+    def _discard(target):
+        """Remove o arquivo parcial de uma exportação que falhou"""
+        if isinstance(target, (str, os.PathLike)) and os.path.exists(target):
+            os.remove(target)
+
+
+def main(argv=None):
+    """Função principal"""
+    from database import SalesData
+
+    parser = argparse.ArgumentParser(description="Exporta vendas de um período")
+    parser.add_argument("--start", required=True, type=datetime.fromisoformat)
+    parser.add_argument("--end", required=True, type=datetime.fromisoformat)
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--output", required=True)
+    for name in ("dealership", "state", "model", "salesperson"):
+        parser.add_argument(f"--{name}", action="append", help="Repetível")
+    args = parser.parse_args(argv)
+
+    # Datas sem horário no fim do período incluem o dia inteiro
+    end_date = args.end
+    if end_date.time() == time.min:
+        end_date = datetime.combine(end_date.date(), time.max)
+
+    sales_data = SalesData(cache=False)
+    if not sales_data.connected:
+        sys.exit(1)
+    try:
+        rows = SalesExporter(sales_data).export(
+            args.start,
+            end_date,
+            args.output,
+            args.format,
+            dealership=args.dealership,
+            state=args.state,
+            model=args.model,
+            salesperson=args.salesperson,
+        )
+    finally:
+        sales_data.close_connection()
+
+    if rows is None:
+        sys.exit(1)
+    print(f"{rows} vendas exportadas para {args.output}")
+
+
+if __name__ == "__main__":
+    main()
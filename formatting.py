@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Prefixo da moeda brasileira
+BRL_PREFIX = "R$ "
+
+
+def _as_series(values):
+    """Converte escalares e sequências em Series, indicando se era escalar"""
+    if isinstance(values, pd.Series):
+        return values, False
+    if np.ndim(values) == 0:
+        return pd.Series([values]), True
+    return pd.Series(values), False
+
+
+def _to_series(strings, missing, index, scalar):
+    """Monta a Series de texto (ou o escalar) a partir do array Arrow"""
+    strings = pc.if_else(pa.array(missing), pa.scalar(None, pa.string()), strings)
+    formatted = pd.Series(strings, index=index, dtype="str")
+    return formatted.iloc[0] if scalar else formatted
+
+
+def _digits(integers):
+    """Converte inteiros NumPy em texto sem passar por objetos Python"""
+    return pc.cast(pa.array(integers, type=pa.int64()), pa.string())
+
+
+def _concat(*parts):
+    """Concatena arrays de texto elemento a elemento"""
+    return pc.binary_join_element_wise(*parts, "")
+
+
+def _group_thousands(integers):
+    """Insere "." a cada três dígitos de inteiros não negativos"""
+    # Completa com zeros até um múltiplo de 3, fatia os grupos e remove os zeros
+    groups = max(1, -(-len(str(integers.max(initial=0))) // 3))
+    padded = pc.utf8_lpad(_digits(integers), groups * 3, "0")
+    parts = [pc.utf8_slice_codeunits(padded, 3 * i, 3 * i + 3) for i in range(groups)]
+    grouped = pc.utf8_ltrim(pc.binary_join_element_wise(*parts, "."), "0.")
+    return pc.if_else(pa.array(integers == 0), "0", grouped)
+
+
+def _product_error(a, b):
+    """Erro de arredondamento de a * b em ponto flutuante (Dekker)
+
+    a * b == fl(a * b) + erro exatamente, para valores sem overflow.
+    """
+
+    def split(x):
+        high = x * 134217729.0  # 2**27 + 1
+        high = high - (high - x)
+        return high, x - high
+
+    product = a * b
+    a_high, a_low = split(a)
+    b_high, b_low = split(b)
+    return (
+        (a_high * b_high - product) + a_high * b_low + a_low * b_high
+    ) + a_low * b_low
+
+
+def _round_scaled(values, scale):
+    """Arredonda values * scale como a formatação "{:.Nf}" do Python
+
+    O produto em ponto flutuante pode cair exatamente no meio entre dois
+    inteiros mesmo quando o valor decimal exato não está no meio (por
+    exemplo 829224.405 * 100); nesse caso o sinal do erro do produto
+    decide o lado, e só empates exatos vão para o par.
+    """
+    scaled = values * scale
+    units = np.rint(scaled)
+    if scale != 1:
+        floor = np.floor(scaled)
+        tie = scaled - floor == 0.5
+        error = _product_error(values, float(scale))
+        units = np.where(tie & (error > 0), floor + 1, units)
+        units = np.where(tie & (error < 0), floor, units)
+    return units.astype("int64")
+
+
+def _format_number(series, decimals, prefix=""):
+    """Formata a Series numérica como texto no padrão brasileiro"""
+    numbers = pd.to_numeric(series, errors="coerce").astype("float64")
+    missing = numbers.isna().to_numpy()
+    filled = numbers.fillna(0).to_numpy()
+
+    # Arredonda em centavos como o f-string, sem "-0,00" para valores que zeram
+    scale = 10**decimals
+    units = _round_scaled(np.abs(filled), scale)
+    sign = pc.if_else(pa.array((filled < 0) & (units > 0)), "-", "")
+
+    parts = [prefix, sign, _group_thousands(units // scale)]
+    if decimals:
+        parts += [",", pc.utf8_lpad(_digits(units % scale), decimals, "0")]
+    return _concat(*parts), missing
+
+
+def format_number(values, decimals=0):
+    """Formata números com "." nos milhares e "," nos decimais"""
+    series, scalar = _as_series(values)
+    strings, missing = _format_number(series, decimals)
+    return _to_series(strings, missing, series.index, scalar)
+
+
+def format_brl(values):
+    """Formata valores como moeda brasileira (R$ 1.234,56)"""
+    series, scalar = _as_series(values)
+    strings, missing = _format_number(series, 2, prefix=BRL_PREFIX)
+    return _to_series(strings, missing, series.index, scalar)
+
+
+def format_dates(values, with_time=False):
+    """Formata datas como dd/mm/aaaa (ou dd/mm/aaaa HH:MM)"""
+    series, scalar = _as_series(values)
+    dates = pd.to_datetime(series)
+    missing = dates.isna().to_numpy()
+
+    # ISO 8601 gerado pelo NumPy em C; depois só reordena as fatias
+    iso = pa.array(dates.to_numpy("datetime64[m]").astype("str"), type=pa.string())
+
+    def piece(start, stop):
+        return pc.utf8_slice_codeunits(iso, start, stop)
+
+    parts = [piece(8, 10), "/", piece(5, 7), "/", piece(0, 4)]
+    if with_time:
+        parts += [" ", piece(11, 16)]
+    return _to_series(_concat(*parts), missing, series.index, scalar)
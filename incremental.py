@@ -0,0 +1,211 @@
+import threading
+
+import pandas as pd
+
+
+# Colunas de rótulo de cada painel, na ordem retornada pelos métodos de SalesData
+PANELS = {
+    "sales_by_model": {
+        "key": "id_veiculos",
+        "labels": ["modelo"],
+        "columns": ["modelo", "quantidade_vendida", "valor_total", "valor_medio"],
+        "sort": (["quantidade_vendida"], [False]),
+    },
+    "sales_by_month": {
+        "key": "mes_ref",
+        "labels": ["ano", "mes", "nome_mes"],
+        "columns": ["ano", "mes", "nome_mes", "quantidade_vendida", "valor_total"],
+        "sort": (["ano", "mes"], [False, True]),
+    },
+    "sales_by_dealership": {
+        "key": "id_concessionarias",
+        "labels": ["concessionaria", "cidade", "estado"],
+        "columns": [
+            "concessionaria",
+            "cidade",
+            "estado",
+            "quantidade_vendida",
+            "valor_total",
+            "valor_medio",
+        ],
+        "sort": (["valor_total"], [False]),
+    },
+    "sales_by_salesperson": {
+        "key": "id_vendedores",
+        "labels": ["vendedor", "concessionaria"],
+        "columns": [
+            "vendedor",
+            "concessionaria",
+            "quantidade_vendida",
+            "valor_total",
+            "valor_medio",
+        ],
+        "sort": (["valor_total"], [False]),
+    },
+}
+
+WATERMARK_QUERY = """
+SELECT
+    MAX(id_vendas) as max_id,
+    MAX(data_venda) as max_data
+FROM vendas
+"""
+
+# Agrega só as vendas entre as marcas d'água, com um GROUPING SET por painel
+DELTA_QUERY = """
+WITH delta AS (
+    SELECT
+        id_veiculos,
+        id_concessionarias,
+        id_vendedores,
+        DATE_TRUNC('month', data_venda) as mes_ref,
+        valor_pago
+    FROM vendas
+    WHERE id_vendas > %s AND id_vendas <= %s
+),
+agregados AS (
+    SELECT
+        CASE
+            WHEN GROUPING(d.id_veiculos) = 0 THEN 'sales_by_model'
+            WHEN GROUPING(d.mes_ref) = 0 THEN 'sales_by_month'
+            WHEN GROUPING(d.id_concessionarias) = 0 THEN 'sales_by_dealership'
+            ELSE 'sales_by_salesperson'
+        END as painel,
+        d.id_veiculos,
+        d.id_concessionarias,
+        d.id_vendedores,
+        d.mes_ref,
+        COUNT(*) as quantidade_vendida,
+        SUM(d.valor_pago) as valor_total
+    FROM delta d
+    GROUP BY GROUPING SETS (
+        (d.id_veiculos),
+        (d.mes_ref),
+        (d.id_concessionarias),
+        (d.id_vendedores)
+    )
+)
+SELECT
+    a.painel,
+    a.id_veiculos,
+    a.id_concessionarias,
+    a.id_vendedores,
+    a.mes_ref,
+    a.quantidade_vendida,
+    a.valor_total,
+    EXTRACT(YEAR FROM a.mes_ref) as ano,
+    EXTRACT(MONTH FROM a.mes_ref) as mes,
+    TO_CHAR(a.mes_ref, 'Month') as nome_mes,
+    v.nome as modelo,
+    COALESCE(c.concessionaria, cv.concessionaria) as concessionaria,
+    ci.cidade,
+    es.estado,
+    vend.nome as vendedor
+FROM agregados a
+LEFT JOIN veiculos v ON a.id_veiculos = v.id_veiculos
+LEFT JOIN concessionarias c ON a.id_concessionarias = c.id_concessionarias
+LEFT JOIN cidades ci ON c.id_cidades = ci.id_cidades
+LEFT JOIN estados es ON ci.id_estados = es.id_estados
+LEFT JOIN vendedores vend ON a.id_vendedores = vend.id_vendedores
+LEFT JOIN concessionarias cv ON vend.id_concessionarias = cv.id_concessionarias
+"""
+
+
+class IncrementalAggregates:
+    """Mantém agregados de vendas atualizados incrementalmente
+
+    Guarda contagem e soma por painel e uma marca d'água (maior id_vendas
+    já agregado). Cada refresh busca apenas as vendas acima da marca e
+    soma seus deltas aos agregados, recalculando a média a partir de
+    soma/contagem. Assume que vendas só recebe inserções, com id_vendas
+    crescente.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.watermark_id = 0
+        self.watermark_date = None
+        self._panels = {}
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Incorpora as vendas novas e retorna quantas foram agregadas"""
+        with self._lock:
+            marks = self.db.execute_query(WATERMARK_QUERY)
+            if marks.empty or pd.isna(marks["max_id"].iloc[0]):
+                return 0
+
+            high = int(marks["max_id"].iloc[0])
+            if high <= self.watermark_id:
+                return 0
+
+            delta = self.db.execute_query(DELTA_QUERY, (self.watermark_id, high))
+            if delta.columns.empty:
+                # Falha na consulta: a faixa é lida de novo no próximo refresh
+                return 0
+
+            # Uma faixa sem vendas (lacuna em id_vendas) também avança a marca
+            for name, rows in delta.groupby("painel"):
+                self._panels[name] = self._merge(name, rows)
+
+            new_sales = int(
+                delta.loc[
+                    delta["painel"] == "sales_by_model", "quantidade_vendida"
+                ].sum()
+            )
+            self.watermark_id = high
+            self.watermark_date = marks["max_data"].iloc[0]
+            return new_sales
+
+    def _merge(self, name, rows):
+        """Soma as contagens e valores do delta aos agregados guardados"""
+        spec = PANELS[name]
+        delta = rows.set_index(spec["key"])[
+            spec["labels"] + ["quantidade_vendida", "valor_total"]
+        ]
+        held = self._panels.get(name)
+        if held is None:
+            return delta.astype(
+                {"quantidade_vendida": "int64", "valor_total": "float64"}
+            )
+
+        merged = delta[spec["labels"]].combine_first(held[spec["labels"]])
+        merged["quantidade_vendida"] = (
+            held["quantidade_vendida"]
+            .add(delta["quantidade_vendida"], fill_value=0)
+            .astype("int64")
+        )
+        merged["valor_total"] = held["valor_total"].add(
+            delta["valor_total"].astype("float64"), fill_value=0
+        )
+        return merged
+
+    def get(self, name):
+        """Retorna o painel no mesmo formato do método SQL equivalente"""
+        spec = PANELS[name]
+        held = self._panels.get(name)
+        if held is None:
+            return pd.DataFrame()
+
+        result = held.copy()
+        result["valor_medio"] = result["valor_total"] / result["quantidade_vendida"]
+        by, ascending = spec["sort"]
+        return result.sort_values(by, ascending=ascending).reset_index(drop=True)[
+            spec["columns"]
+        ]
+
+    def get_total(self):
+        """Retorna o total de vendas derivado do painel por modelo"""
+        held = self._panels.get("sales_by_model")
+        if held is None:
+            return pd.DataFrame()
+
+        total_vendas = int(held["quantidade_vendida"].sum())
+        valor_total = float(held["valor_total"].sum())
+        return pd.DataFrame(
+            {
+                "total_vendas": [total_vendas],
+                "valor_total_vendas": [valor_total],
+                "valor_medio_venda": [valor_total / total_vendas],
+            }
+        )
@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+_local = threading.local()
+
+# Totais acumulados por método em QueryStats
+TOTALS = ("calls", "duration", "rows", "bytes", "cache_hits", "errors")
+
+# Contadores exportados para o Prometheus: nome -> (descrição, total)
+COUNTERS = {
+    "rows_total": ("Linhas retornadas", "rows"),
+    "bytes_total": ("Bytes aproximados retornados", "bytes"),
+    "cache_hits_total": ("Chamadas atendidas pelo cache", "cache_hits"),
+    "errors_total": ("Chamadas com erro", "errors"),
+}
+
+
+class CallContext:
+    """Informações coletadas durante uma chamada de método de SalesData"""
+
+    def __init__(self, method, explain=False):
+        self.method = method
+        self.explain = explain
+        self.cache_hit = False
+        self.errors = []
+        self.plan = None
+
+
+@contextmanager
+def track_call(method, explain=False):
+    """Torna a chamada atual visível para as camadas de banco e de cache"""
+    call = CallContext(method, explain)
+    previous = getattr(_local, "call", None)
+    _local.call = call
+    try:
+        yield call
+    finally:
+        _local.call = previous
+
+
+def current_call():
+    """Retorna o contexto da chamada em andamento na thread, se houver"""
+    return getattr(_local, "call", None)
+
+
+def result_size(value):
+    """Retorna (linhas, bytes aproximados) de um resultado"""
+    if isinstance(value, pd.DataFrame):
+        return len(value), int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, dict):
+        sizes = [result_size(v) for v in value.values()]
+        return sum(r for r, _ in sizes), sum(b for _, b in sizes)
+    return 0, 0
+
+
+class QueryStats:
+    """Buffer circular com métricas de cada chamada de SalesData
+
+    O buffer guarda as últimas capacity chamadas, usadas nos percentis. Os
+    totais por método (chamadas, duração, linhas, bytes, acertos de cache
+    e erros) são acumulados à parte e nunca diminuem, como esperam os
+    contadores do Prometheus.
+    """
+
+    def __init__(self, capacity=2000):
+        self.capacity = capacity
+        self._records = deque(maxlen=capacity)
+        self._plans = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def record(self, call, duration, value):
+        """Registra a duração, o tamanho do resultado e o uso do cache"""
+        rows, size = result_size(value)
+        with self._lock:
+            self._records.append(
+                {
+                    "method": call.method,
+                    "timestamp": time.time(),
+                    "duration": duration,
+                    "rows": rows,
+                    "bytes": size,
+                    "cache_hit": call.cache_hit,
+                    "error": "; ".join(call.errors) or None,
+                }
+            )
+            if call.plan is not None:
+                self._plans[call.method] = call.plan
+
+            totals = self._totals.setdefault(call.method, dict.fromkeys(TOTALS, 0))
+            totals["calls"] += 1
+            totals["duration"] += duration
+            totals["rows"] += rows
+            totals["bytes"] += size
+            totals["cache_hits"] += int(call.cache_hit)
+            totals["errors"] += int(bool(call.errors))
+
+    def totals(self):
+        """Retorna os totais acumulados de cada método desde a criação"""
+        with self._lock:
+            return {method: dict(totals) for method, totals in self._totals.items()}
+
+    def records(self):
+        """Retorna as chamadas registradas como DataFrame"""
+        with self._lock:
+            return pd.DataFrame(list(self._records))
+
+    def plans(self):
+        """Retorna o último plano EXPLAIN capturado de cada método"""
+        with self._lock:
+            return dict(self._plans)
+
+    def summary(self):
+        """Resumo por método com percentis de duração em milissegundos"""
+        records = self.records()
+        if records.empty:
+            return pd.DataFrame()
+
+        rows = []
+        for method, calls in records.groupby("method"):
+            durations = calls["duration"].to_numpy() * 1000
+            p50, p95, p99 = np.percentile(durations, [50, 95, 99])
+            rows.append(
+                {
+                    "method": method,
+                    "chamadas": len(calls),
+                    "p50_ms": p50,
+                    "p95_ms": p95,
+                    "p99_ms": p99,
+                    "linhas_media": calls["rows"].mean(),
+                    "bytes_media": calls["bytes"].mean(),
+                    "taxa_cache": calls["cache_hit"].mean(),
+                    "erros": int(calls["error"].notna().sum()),
+                }
+            )
+        return pd.DataFrame(rows).sort_values("p95_ms", ascending=False)
+
+    def to_prometheus(self, prefix="sales_query"):
+        """Exporta as métricas no formato texto do Prometheus
+
+        Os quantis vêm das chamadas no buffer; _sum, _count e os contadores
+        *_total vêm dos totais acumulados, que só crescem.
+        """
+        records = self.records()
+        totals = self.totals()
+        lines = [
+            f"# HELP {prefix}_duration_seconds Duração das chamadas de SalesData",
+            f"# TYPE {prefix}_duration_seconds summary",
+        ]
+        grouped = dict(tuple(records.groupby("method"))) if not records.empty else {}
+        for method, total in sorted(totals.items()):
+            label = f'method="{method}"'
+            calls = grouped.get(method)
+            if calls is not None:
+                durations = calls["duration"].to_numpy()
+                for quantile in (0.5, 0.95, 0.99):
+                    value = np.quantile(durations, quantile)
+                    lines.append(
+                        f'{prefix}_duration_seconds{{{label},quantile="{quantile}"}} '
+                        f"{value:.6f}"
+                    )
+            lines.append(
+                f"{prefix}_duration_seconds_sum{{{label}}} {total['duration']:.6f}"
+            )
+            lines.append(f"{prefix}_duration_seconds_count{{{label}}} {total['calls']}")
+
+        for name, (help_text, key) in COUNTERS.items():
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for method, total in sorted(totals.items()):
+                lines.append(f'{prefix}_{name}{{method="{method}"}} {total[key]}')
+
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """Descarta as chamadas e planos registrados; os totais são mantidos"""
+        with self._lock:
+            self._records.clear()
+            self._plans.clear()
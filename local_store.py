@@ -0,0 +1,773 @@
+#!/usr/bin/env python3
+"""
+Snapshot local (Parquet) das tabelas de vendas e backend de consultas em pandas
+
+Uso:
+    python local_store.py sync
+    python local_store.py status
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from config import (
+    LOCAL_STORE_CONFIG,
+    PAGINATION_CONFIG,
+    STREAM_CONFIG,
+)
+from database import (
+    TIMESERIES_GRANULARITIES,
+    SalesData,
+    cached_query,
+    empty_snapshot,
+    filter_values,
+)
+from rollups import year_bounds
+
+# Colunas copiadas de cada tabela; só o necessário para os painéis
+SNAPSHOT_TABLES = {
+    "estados": ["id_estados", "estado", "sigla"],
+    "cidades": ["id_cidades", "cidade", "id_estados"],
+    "concessionarias": ["id_concessionarias", "concessionaria", "id_cidades"],
+    "veiculos": ["id_veiculos", "nome"],
+    "vendedores": ["id_vendedores", "nome", "id_concessionarias"],
+    "clientes": ["id_clientes", "cliente"],
+    "vendas": [
+        "id_vendas",
+        "id_veiculos",
+        "id_concessionarias",
+        "id_vendedores",
+        "id_clientes",
+        "valor_pago",
+        "data_venda",
+    ],
+}
+
+METADATA_FILE = "metadata.json"
+
+# Períodos do pandas equivalentes ao DATE_TRUNC de cada granularidade
+PERIOD_FREQUENCIES = {
+    "day": "D",
+    "week": "W-SUN",
+    "month": "M",
+    "quarter": "Q",
+}
+
+
+class LocalStore:
+    """Diretório com um arquivo Parquet por tabela e metadados de sincronização"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or LOCAL_STORE_CONFIG["directory"]
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def exists(self):
+        """Verifica se há um snapshot completo no diretório"""
+        return os.path.exists(self.path(METADATA_FILE))
+
+    def metadata(self):
+        """Retorna os metadados da última sincronização"""
+        if not self.exists():
+            return None
+        with open(self.path(METADATA_FILE), encoding="utf-8") as f:
+            metadata = json.load(f)
+        metadata["synced_at"] = datetime.fromisoformat(metadata["synced_at"])
+        return metadata
+
+    def sync(self, db):
+        """Copia as tabelas do banco para Parquet e grava os metadados"""
+        os.makedirs(self.directory, exist_ok=True)
+        synced_at = datetime.now()
+        rows = {}
+
+        staged = []
+        for table, columns in SNAPSHOT_TABLES.items():
+            frame = db.execute_query(f"SELECT {', '.join(columns)} FROM {table}")
+            if frame.columns.empty:
+                for tmp in staged:
+                    os.remove(tmp)
+                raise RuntimeError(f"Falha ao copiar a tabela {table}")
+            tmp = self.path(f"{table}.parquet.tmp")
+            frame.to_parquet(tmp, index=False)
+            staged.append(tmp)
+            rows[table] = len(frame)
+
+        # Só substitui os arquivos depois que todas as tabelas foram copiadas
+        for tmp in staged:
+            os.replace(tmp, tmp[: -len(".tmp")])
+
+        metadata = {"synced_at": synced_at.isoformat(), "rows": rows}
+        tmp = self.path(METADATA_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(metadata, f)
+        os.replace(tmp, self.path(METADATA_FILE))
+        return rows
+
+    def load(self):
+        """Lê todas as tabelas do snapshot"""
+        return {
+            table: pd.read_parquet(self.path(f"{table}.parquet"))
+            for table in SNAPSHOT_TABLES
+        }
+
+
+def _month_name(dates):
+    """Equivale a TO_CHAR(data, 'Month'): nome em inglês com 9 caracteres"""
+    return dates.dt.month_name().str.ljust(9)
+
+
+class LocalSalesData(SalesData):
+    """SalesData respondido a partir do snapshot local, sem acessar o Postgres"""
+
+    # A contagem é feita sobre as vendas do snapshot: exata
+    exact_count = True
+
+    def __init__(self, directory=None, cache=None):
+        self.store = LocalStore(directory)
+        self._tables = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        # Sem banco: incrementais, rollups e cubo não se aplicam ao snapshot
+        super().__init__(cache=cache, incremental=False, use_rollups=False, cube=False)
+        self.dimensions = None
+
+    def _connect(self, db_config):
+        """O snapshot local está disponível se já foi sincronizado"""
+        self.db = None
+        return self.store.exists()
+
+    def _check_source(self):
+        """Descarta os resultados em cache quando há uma nova sincronização"""
+        if self._tables is not None and self.data_freshness() != self._loaded_at:
+            self._frames()
+
+    def data_freshness(self):
+        """Retorna o momento da última sincronização do snapshot"""
+        metadata = self.store.metadata()
+        return metadata["synced_at"] if metadata else None
+
+    def _frames(self):
+        """Carrega o snapshot, recarregando quando houver nova sincronização"""
+        with self._lock:
+            synced_at = self.data_freshness()
+            if self._tables is None or synced_at != self._loaded_at:
+                resynced = self._loaded_at is not None and synced_at != self._loaded_at
+                self._tables = self.store.load()
+                self._loaded_at = synced_at
+                if resynced:
+                    # Resultados calculados sobre o snapshot anterior; na
+                    # primeira carga o cache (talvez compartilhado com outros
+                    # processos) já corresponde a este snapshot
+                    self.invalidate_cache()
+            return self._tables
+
+    def _sales(self, start_date=None, end_date=None, **dimensions):
+        """Vendas do snapshot, opcionalmente filtradas por período e dimensões"""
+        tables = self._frames()
+        sales = tables["vendas"]
+        if start_date is not None:
+            sales = sales[sales["data_venda"] >= pd.Timestamp(start_date)]
+        if end_date is not None:
+            sales = sales[sales["data_venda"] <= pd.Timestamp(end_date)]
+
+        dealerships = filter_values(dimensions.get("dealership"))
+        if dealerships:
+            keys = tables["concessionarias"].loc[
+                tables["concessionarias"]["concessionaria"].isin(dealerships),
+                "id_concessionarias",
+            ]
+            sales = sales[sales["id_concessionarias"].isin(keys)]
+        states = filter_values(dimensions.get("state"))
+        if states:
+            places = (
+                tables["concessionarias"]
+                .merge(tables["cidades"], on="id_cidades")
+                .merge(tables["estados"], on="id_estados")
+            )
+            keys = places.loc[places["estado"].isin(states), "id_concessionarias"]
+            sales = sales[sales["id_concessionarias"].isin(keys)]
+        models = filter_values(dimensions.get("model"))
+        if models:
+            keys = tables["veiculos"].loc[
+                tables["veiculos"]["nome"].isin(models), "id_veiculos"
+            ]
+            sales = sales[sales["id_veiculos"].isin(keys)]
+        salespeople = filter_values(dimensions.get("salesperson"))
+        if salespeople:
+            keys = tables["vendedores"].loc[
+                tables["vendedores"]["nome"].isin(salespeople), "id_vendedores"
+            ]
+            sales = sales[sales["id_vendedores"].isin(keys)]
+        return sales
+
+    @staticmethod
+    def _aggregate(sales, key, mean=True):
+        """Contagem, soma e média de valor_pago agrupadas pela chave"""
+        grouped = sales.groupby(key, sort=False)["valor_pago"]
+        result = pd.DataFrame(
+            {
+                "quantidade_vendida": grouped.size(),
+                "valor_total": grouped.sum(),
+            }
+        )
+        if mean:
+            result["valor_medio"] = grouped.mean()
+        return result
+
+    def _total(self, sales):
+        return pd.DataFrame(
+            {
+                "total_vendas": [len(sales)],
+                "valor_total_vendas": [
+                    sales["valor_pago"].sum() if len(sales) else None
+                ],
+                "valor_medio_venda": [
+                    sales["valor_pago"].mean() if len(sales) else None
+                ],
+            }
+        )
+
+    def _by_model(self, sales):
+        tables = self._frames()
+        result = self._aggregate(sales, "id_veiculos")
+        names = tables["veiculos"].set_index("id_veiculos")["nome"]
+        result.insert(0, "modelo", names.reindex(result.index).values)
+        return result.sort_values(
+            "quantidade_vendida", ascending=False, kind="stable"
+        ).reset_index(drop=True)
+
+    def _by_month(self, sales, year=None):
+        month_start = sales["data_venda"].dt.to_period("M").dt.to_timestamp()
+        result = self._aggregate(sales.assign(mes_ref=month_start), "mes_ref", False)
+        months = result.index.to_series()
+        result.insert(0, "nome_mes", _month_name(months).values)
+        result.insert(0, "mes", months.dt.month.astype("float64").values)
+        if year:
+            return result.sort_values("mes").reset_index(drop=True)
+        result.insert(0, "ano", months.dt.year.astype("float64").values)
+        return result.sort_values(["ano", "mes"], ascending=[False, True]).reset_index(
+            drop=True
+        )
+
+    def _by_dealership(self, sales):
+        tables = self._frames()
+        result = self._aggregate(sales, "id_concessionarias")
+        places = (
+            tables["concessionarias"]
+            .merge(tables["cidades"], on="id_cidades")
+            .merge(tables["estados"], on="id_estados")
+            .set_index("id_concessionarias")
+            .reindex(result.index)
+        )
+        result.insert(0, "estado", places["estado"].values)
+        result.insert(0, "cidade", places["cidade"].values)
+        result.insert(0, "concessionaria", places["concessionaria"].values)
+        return result.sort_values(
+            "valor_total", ascending=False, kind="stable"
+        ).reset_index(drop=True)
+
+    def _by_salesperson(self, sales):
+        tables = self._frames()
+        result = self._aggregate(sales, "id_vendedores")
+        people = (
+            tables["vendedores"]
+            .merge(tables["concessionarias"], on="id_concessionarias")
+            .set_index("id_vendedores")
+            .reindex(result.index)
+        )
+        result.insert(0, "concessionaria", people["concessionaria"].values)
+        result.insert(0, "vendedor", people["nome"].values)
+        return result.sort_values(
+            "valor_total", ascending=False, kind="stable"
+        ).reset_index(drop=True)
+
+    def _sales_rows(self, sales):
+        """Decodifica as vendas no formato de get_recent_sales/get_sales_period"""
+        tables = self._frames()
+
+        def lookup(table, key, column):
+            return tables[table].set_index(key)[column].reindex(sales[key]).values
+
+        return pd.DataFrame(
+            {
+                "data_venda": sales["data_venda"].values,
+                "modelo": lookup("veiculos", "id_veiculos", "nome"),
+                "concessionaria": lookup(
+                    "concessionarias", "id_concessionarias", "concessionaria"
+                ),
+                "vendedor": lookup("vendedores", "id_vendedores", "nome"),
+                "cliente": lookup("clientes", "id_clientes", "cliente"),
+                "valor_pago": sales["valor_pago"].values,
+            }
+        )
+
+    @cached_query
+    def get_filter_options(self):
+        """Retorna os valores disponíveis para os filtros de dimensão"""
+        if not self.connected:
+            return {}
+        tables = self._frames()
+        return {
+            "dealership": sorted(tables["concessionarias"]["concessionaria"]),
+            "model": sorted(tables["veiculos"]["nome"]),
+            "state": sorted(tables["estados"]["estado"]),
+            "salesperson": sorted(tables["vendedores"]["nome"].unique()),
+        }
+
+    @cached_query
+    def get_total_sales(
+        self,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Retorna o total de vendas"""
+        if not self.connected:
+            return pd.DataFrame()
+        return self._total(
+            self._sales(
+                start_date,
+                end_date,
+                dealership=dealership,
+                state=state,
+                model=model,
+                salesperson=salesperson,
+            )
+        )
+
+    @cached_query
+    def get_sales_by_model(
+        self,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Retorna vendas por modelo de veículo"""
+        if not self.connected:
+            return pd.DataFrame()
+        return self._by_model(
+            self._sales(
+                start_date,
+                end_date,
+                dealership=dealership,
+                state=state,
+                model=model,
+                salesperson=salesperson,
+            )
+        )
+
+    @cached_query
+    def get_sales_by_month(
+        self,
+        year=None,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Retorna vendas por mês"""
+        if not self.connected:
+            return pd.DataFrame()
+        sales = self._sales(
+            start_date,
+            end_date,
+            dealership=dealership,
+            state=state,
+            model=model,
+            salesperson=salesperson,
+        )
+        if year:
+            first_day, next_year = year_bounds(year)
+            sales = sales[
+                (sales["data_venda"] >= pd.Timestamp(first_day))
+                & (sales["data_venda"] < pd.Timestamp(next_year))
+            ]
+            return self._by_month(sales, year)
+        return self._by_month(sales)
+
+    @cached_query
+    def get_sales_by_dealership(
+        self,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Retorna vendas por concessionária"""
+        if not self.connected:
+            return pd.DataFrame()
+        return self._by_dealership(
+            self._sales(
+                start_date,
+                end_date,
+                dealership=dealership,
+                state=state,
+                model=model,
+                salesperson=salesperson,
+            )
+        )
+
+    @cached_query
+    def get_sales_by_salesperson(
+        self,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Retorna vendas por vendedor"""
+        if not self.connected:
+            return pd.DataFrame()
+        return self._by_salesperson(
+            self._sales(
+                start_date,
+                end_date,
+                dealership=dealership,
+                state=state,
+                model=model,
+                salesperson=salesperson,
+            )
+        )
+
+    @cached_query
+    def get_sales_timeseries(
+        self,
+        granularity="day",
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Retorna vendas agrupadas por dia, semana, mês ou trimestre"""
+        if granularity not in TIMESERIES_GRANULARITIES:
+            raise ValueError(f"Granularidade desconhecida: {granularity}")
+        if not self.connected:
+            return pd.DataFrame()
+
+        sales = self._sales(
+            start_date,
+            end_date,
+            dealership=dealership,
+            state=state,
+            model=model,
+            salesperson=salesperson,
+        )
+        frequency = PERIOD_FREQUENCIES[granularity]
+        grouped = sales.groupby(sales["data_venda"].dt.to_period(frequency))[
+            "valor_pago"
+        ]
+        result = pd.DataFrame(
+            {"quantidade_vendida": grouped.size(), "valor_total": grouped.sum()}
+        )
+
+        first = pd.Period(start_date, frequency) if start_date else None
+        last = pd.Period(end_date, frequency) if end_date else None
+        if result.empty and (first is None or last is None):
+            return pd.DataFrame(
+                columns=["periodo", "quantidade_vendida", "valor_total"]
+            )
+
+        calendar = pd.period_range(
+            first or result.index.min(), last or result.index.max(), freq=frequency
+        )
+        result = result.reindex(calendar, fill_value=0)
+        return pd.DataFrame(
+            {
+                "periodo": calendar.start_time,
+                "quantidade_vendida": result["quantidade_vendida"].values,
+                "valor_total": result["valor_total"].astype("float64").values,
+            }
+        )
+
+    @cached_query
+    def get_sales_heatmap(
+        self,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Retorna a matriz densa de valor vendido por concessionária e mês"""
+        if not self.connected:
+            return pd.DataFrame()
+
+        sales = self._sales(
+            start_date,
+            end_date,
+            dealership=dealership,
+            state=state,
+            model=model,
+            salesperson=salesperson,
+        )
+        if sales.empty:
+            return pd.DataFrame()
+        months = sales["data_venda"].dt.to_period("M")
+        cells = sales.groupby(["id_concessionarias", months])["valor_pago"].sum()
+
+        calendar = pd.period_range(
+            pd.Period(start_date, "M") if start_date else months.min(),
+            pd.Period(end_date, "M") if end_date else months.max(),
+            freq="M",
+        )
+        matrix = cells.unstack(fill_value=0).reindex(columns=calendar, fill_value=0)
+        names = (
+            self._frames()["concessionarias"]
+            .set_index("id_concessionarias")["concessionaria"]
+            .reindex(matrix.index)
+        )
+        return pd.DataFrame(
+            matrix.to_numpy("float64"),
+            index=pd.Index(names.to_numpy(), name="concessionaria"),
+            columns=pd.DatetimeIndex(calendar.start_time, name="mes"),
+        ).sort_index(kind="stable")
+
+    @cached_query
+    def get_recent_sales(
+        self, limit=10, dealership=None, state=None, model=None, salesperson=None
+    ):
+        """Retorna as vendas mais recentes"""
+        if not self.connected:
+            return pd.DataFrame()
+        sales = self._sales(
+            dealership=dealership, state=state, model=model, salesperson=salesperson
+        )
+        return self._sales_rows(sales.nlargest(limit, "data_venda"))
+
+    @cached_query
+    def get_sales_period(
+        self,
+        start_date,
+        end_date,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Retorna vendas em um período específico"""
+        if not self.connected:
+            return pd.DataFrame()
+        sales = self._sales(
+            start_date,
+            end_date,
+            dealership=dealership,
+            state=state,
+            model=model,
+            salesperson=salesperson,
+        ).sort_values("data_venda", ascending=False, kind="stable")
+        return self._sales_rows(sales)
+
+    @cached_query
+    def get_sales_page(
+        self,
+        after=None,
+        page_size=None,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Retorna uma página de vendas por keyset em (data_venda, id_vendas)"""
+        if not self.connected:
+            return pd.DataFrame()
+        page_size = page_size or PAGINATION_CONFIG["page_size"]
+        sales = self._sales(
+            start_date,
+            end_date,
+            dealership=dealership,
+            state=state,
+            model=model,
+            salesperson=salesperson,
+        )
+        if after is not None:
+            moment, sale_id = pd.Timestamp(after[0]), after[1]
+            sales = sales[
+                (sales["data_venda"] < moment)
+                | ((sales["data_venda"] == moment) & (sales["id_vendas"] < sale_id))
+            ]
+        sales = sales.nlargest(page_size, ["data_venda", "id_vendas"])
+        page = self._sales_rows(sales)
+        page.insert(0, "id_vendas", sales["id_vendas"].values)
+        return page
+
+    @cached_query
+    def get_sales_count_estimate(
+        self,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Número de vendas com os filtros (exato, contado no snapshot)"""
+        if not self.connected:
+            return None
+        return len(
+            self._sales(
+                start_date,
+                end_date,
+                dealership=dealership,
+                state=state,
+                model=model,
+                salesperson=salesperson,
+            )
+        )
+
+    def iter_recent_sales(
+        self,
+        limit=10,
+        chunksize=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Entrega as vendas mais recentes em blocos"""
+        return self._iter_chunks(
+            self.get_recent_sales(
+                limit,
+                dealership=dealership,
+                state=state,
+                model=model,
+                salesperson=salesperson,
+            ),
+            chunksize,
+        )
+
+    def iter_sales_period(
+        self,
+        start_date,
+        end_date,
+        chunksize=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Entrega as vendas de um período em blocos"""
+        sales = self._sales(
+            start_date,
+            end_date,
+            dealership=dealership,
+            state=state,
+            model=model,
+            salesperson=salesperson,
+        ).sort_values("data_venda", ascending=False, kind="stable")
+        chunksize = chunksize or STREAM_CONFIG["chunksize"]
+        for start in range(0, len(sales), chunksize):
+            yield self._sales_rows(sales.iloc[start : start + chunksize])
+
+    @staticmethod
+    def _iter_chunks(frame, chunksize):
+        chunksize = chunksize or STREAM_CONFIG["chunksize"]
+        for start in range(0, len(frame), chunksize):
+            yield frame.iloc[start : start + chunksize].reset_index(drop=True)
+
+    @cached_query
+    def get_dashboard_snapshot(
+        self,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """Retorna os agregados de todos os painéis a partir do snapshot"""
+        if not self.connected:
+            return empty_snapshot()
+        sales = self._sales(
+            start_date,
+            end_date,
+            dealership=dealership,
+            state=state,
+            model=model,
+            salesperson=salesperson,
+        )
+        return {
+            "total_sales": self._total(sales),
+            "sales_by_model": self._by_model(sales),
+            "sales_by_dealership": self._by_dealership(sales),
+            "sales_by_salesperson": self._by_salesperson(sales),
+        }
+
+    def get_dashboard_estimate(
+        self,
+        start_date=None,
+        end_date=None,
+        dealership=None,
+        state=None,
+        model=None,
+        salesperson=None,
+    ):
+        """O snapshot local responde exato e em memória: não há estimativa"""
+        return None
+
+    def close_connection(self):
+        """Libera as tabelas carregadas em memória"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._tables = None
+
+
+def main(argv=None):
+    """Função principal"""
+    from database import DatabaseConnection
+
+    parser = argparse.ArgumentParser(description="Snapshot local das vendas")
+    parser.add_argument("command", choices=["sync", "status"])
+    parser.add_argument("--directory", default=LOCAL_STORE_CONFIG["directory"])
+    args = parser.parse_args(argv)
+
+    store = LocalStore(args.directory)
+    if args.command == "status":
+        metadata = store.metadata()
+        if metadata is None:
+            print("Nenhum snapshot encontrado")
+            sys.exit(1)
+        print(f"Sincronizado em {metadata['synced_at']:%d/%m/%Y %H:%M}")
+        for table, rows in metadata["rows"].items():
+            print(f"  {table}: {rows} linhas")
+        return
+
+    db = DatabaseConnection()
+    if not db.connect():
+        sys.exit(1)
+    try:
+        rows = store.sync(db)
+    except RuntimeError as e:
+        print(f"Erro ao sincronizar: {e}")
+        sys.exit(1)
+    finally:
+        db.disconnect()
+    print(f"Snapshot gravado em {store.directory}: {rows['vendas']} vendas")
+
+
+if __name__ == "__main__":
+    main()
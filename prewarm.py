@@ -0,0 +1,143 @@
+"""
+Pré-aquecimento do cache de resultados em segundo plano
+
+Uma thread recalcula periodicamente as consultas da tela inicial do
+dashboard e substitui os resultados no cache de uma vez, antes que vençam:
+o primeiro usuário depois do TTL não paga a consulta completa. O intervalo
+varia aleatoriamente (jitter), para que vários processos não consultem o
+banco ao mesmo tempo, e cresce quando o banco está lento ou com erros.
+"""
+
+import random
+import threading
+import time
+
+from config import PAGINATION_CONFIG, PREWARM_CONFIG
+
+# Consultas da tela inicial (todos os dados, sem filtros): método e argumentos
+# iguais aos usados por app.py, para que as chaves do cache coincidam
+DASHBOARD_QUERIES = {
+    "filter_options": ("get_filter_options", ()),
+    "snapshot": ("get_dashboard_snapshot", ()),
+    "months": ("get_sales_timeseries", ("month",)),
+    "trend": ("get_sales_timeseries", ("day",)),
+    "heatmap": ("get_sales_heatmap", ()),
+    "sales": ("get_sales_page", (None, PAGINATION_CONFIG["page_size"])),
+}
+
+
+class CacheWarmer:
+    """Recalcula as consultas do dashboard em uma thread de fundo
+
+    Cada rodada chama sales_data.refresh_query, que ignora o cache e troca
+    a entrada pelo resultado novo; quem lê nesse meio tempo recebe o
+    resultado anterior. Com um cache compartilhado entre processos, cada
+    rodada é reservada por cache.claim e só um processo a executa. Uma
+    rodada mais lenta que slow_after segundos ou com erro (refresh_query
+    levanta QueryError quando o banco falha) dobra o intervalo, até
+    max_backoff vezes; uma rodada normal o restaura.
+    """
+
+    def __init__(
+        self,
+        sales_data,
+        queries=None,
+        interval=240.0,
+        jitter=0.1,
+        slow_after=10.0,
+        max_backoff=8,
+    ):
+        self.sales_data = sales_data
+        self.queries = dict(DASHBOARD_QUERIES if queries is None else queries)
+        self.interval = interval
+        self.jitter = jitter
+        self.slow_after = slow_after
+        self.max_backoff = max_backoff
+        self.backoff = 1
+        self.rounds = 0
+        self.errors = 0
+        self.last_duration = None
+        self.next_run = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, sales_data):
+        """Cria o pré-aquecimento a partir de PREWARM_CONFIG, ou None se desabilitado"""
+        if not PREWARM_CONFIG["enabled"] or sales_data.cache is None:
+            return None
+        return cls(
+            sales_data,
+            interval=PREWARM_CONFIG["interval"],
+            jitter=PREWARM_CONFIG["jitter"],
+            slow_after=PREWARM_CONFIG["slow_after"],
+            max_backoff=PREWARM_CONFIG["max_backoff"],
+        )
+
+    def run_once(self):
+        """Recalcula todas as consultas e retorna quantas falharam"""
+        started = time.monotonic()
+        failed = 0
+        for name, (method, args) in self.queries.items():
+            try:
+                self.sales_data.refresh_query(method, *args)
+            except Exception as e:
+                failed += 1
+                print(f"Erro ao pré-aquecer {name}: {e}")
+        self.last_duration = time.monotonic() - started
+        self.rounds += 1
+        self.errors += failed
+
+        if failed or self.last_duration > self.slow_after:
+            self.backoff = min(self.backoff * 2, self.max_backoff)
+        else:
+            self.backoff = 1
+        return failed
+
+    def delay(self):
+        """Espera até a próxima rodada: intervalo com backoff e jitter"""
+        spread = random.uniform(-self.jitter, self.jitter)
+        return self.interval * self.backoff * (1 + spread)
+
+    def _run(self):
+        while True:
+            # Com o cache compartilhado, só um processo aquece em cada
+            # intervalo; a reserva vence antes da menor espera possível
+            claim = self.interval * (1 - self.jitter)
+            if self.sales_data.connected and self.sales_data.cache.claim(
+                "prewarm", claim
+            ):
+                self.run_once()
+            delay = self.delay()
+            self.next_run = time.time() + delay
+            if self._stop.wait(delay):
+                return
+
+    def start(self):
+        """Inicia a thread; a primeira rodada aquece o cache imediatamente"""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="cache-warmer", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Interrompe a thread depois da rodada em andamento"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self):
+        """Resumo das rodadas para o painel de performance"""
+        return {
+            "rodadas": self.rounds,
+            "erros": self.errors,
+            "ultima_duracao_s": self.last_duration,
+            "backoff": self.backoff,
+            "intervalo_s": self.interval,
+            "proxima_execucao": self.next_run,
+        }
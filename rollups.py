@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Gerenciamento das tabelas de rollup diário de vendas
+
+Uso:
+    python rollups.py create
+    python rollups.py refresh [--concurrently]
+    python rollups.py schedule [--interval SEGUNDOS]
+"""
+import argparse
+import sys
+import time
+from datetime import date, datetime, timedelta, time as dt_time
+
+from config import ROLLUP_CONFIG
+
+ROLLUP_VIEW = "mv_vendas_diarias"
+
+CREATE_VIEW = f"""
+CREATE MATERIALIZED VIEW IF NOT EXISTS {ROLLUP_VIEW} AS
+SELECT
+    ven.data_venda::date as dia,
+    ven.id_veiculos,
+    ven.id_concessionarias,
+    ven.id_vendedores,
+    COUNT(*) as quantidade_vendida,
+    SUM(ven.valor_pago) as valor_total
+FROM vendas ven
+GROUP BY ven.data_venda::date, ven.id_veiculos, ven.id_concessionarias, ven.id_vendedores
+WITH DATA
+"""
+
+# O índice único é exigido por REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE_UNIQUE_INDEX = f"""
+CREATE UNIQUE INDEX IF NOT EXISTS {ROLLUP_VIEW}_chave_idx
+ON {ROLLUP_VIEW} (dia, id_veiculos, id_concessionarias, id_vendedores)
+"""
+
+VIEW_STATUS = """
+SELECT ispopulated
+FROM pg_matviews
+WHERE matviewname = %s
+"""
+
+# Consultas de SalesData respondidas a partir do rollup; {where} recebe os
+# filtros montados por database.sales_where sobre o alias r
+ROLLUP_QUERIES = {
+    "get_total_sales": f"""
+        SELECT
+            COALESCE(SUM(r.quantidade_vendida), 0)::bigint as total_vendas,
+            SUM(r.valor_total) as valor_total_vendas,
+            SUM(r.valor_total) / NULLIF(SUM(r.quantidade_vendida), 0) as valor_medio_venda
+        FROM {ROLLUP_VIEW} r
+        {{where}}
+    """,
+    "get_sales_by_model": f"""
+        SELECT
+            v.nome as modelo,
+            SUM(r.quantidade_vendida)::bigint as quantidade_vendida,
+            SUM(r.valor_total) as valor_total,
+            SUM(r.valor_total) / SUM(r.quantidade_vendida) as valor_medio
+        FROM {ROLLUP_VIEW} r
+        JOIN veiculos v ON r.id_veiculos = v.id_veiculos
+        {{where}}
+        GROUP BY v.id_veiculos, v.nome
+        ORDER BY quantidade_vendida DESC
+    """,
+    "get_sales_by_month_year": f"""
+        SELECT
+            EXTRACT(MONTH FROM m.mes_ref) as mes,
+            TO_CHAR(m.mes_ref, 'Month') as nome_mes,
+            m.quantidade_vendida,
+            m.valor_total
+        FROM (
+            SELECT
+                DATE_TRUNC('month', r.dia::timestamp) as mes_ref,
+                SUM(r.quantidade_vendida)::bigint as quantidade_vendida,
+                SUM(r.valor_total) as valor_total
+            FROM {ROLLUP_VIEW} r
+            {{where}}
+            GROUP BY DATE_TRUNC('month', r.dia::timestamp)
+        ) m
+        ORDER BY mes
+    """,
+    "get_sales_by_month": f"""
+        SELECT
+            EXTRACT(YEAR FROM m.mes_ref) as ano,
+            EXTRACT(MONTH FROM m.mes_ref) as mes,
+            TO_CHAR(m.mes_ref, 'Month') as nome_mes,
+            m.quantidade_vendida,
+            m.valor_total
+        FROM (
+            SELECT
+                DATE_TRUNC('month', r.dia::timestamp) as mes_ref,
+                SUM(r.quantidade_vendida)::bigint as quantidade_vendida,
+                SUM(r.valor_total) as valor_total
+            FROM {ROLLUP_VIEW} r
+            {{where}}
+            GROUP BY DATE_TRUNC('month', r.dia::timestamp)
+        ) m
+        ORDER BY ano DESC, mes
+    """,
+    "get_sales_by_dealership": f"""
+        SELECT
+            c.concessionaria,
+            ci.cidade,
+            es.estado,
+            SUM(r.quantidade_vendida)::bigint as quantidade_vendida,
+            SUM(r.valor_total) as valor_total,
+            SUM(r.valor_total) / SUM(r.quantidade_vendida) as valor_medio
+        FROM {ROLLUP_VIEW} r
+        JOIN concessionarias c ON r.id_concessionarias = c.id_concessionarias
+        JOIN cidades ci ON c.id_cidades = ci.id_cidades
+        JOIN estados es ON ci.id_estados = es.id_estados
+        {{where}}
+        GROUP BY c.id_concessionarias, c.concessionaria, ci.cidade, es.estado
+        ORDER BY valor_total DESC
+    """,
+    "get_sales_by_salesperson": f"""
+        SELECT
+            v.nome as vendedor,
+            c.concessionaria,
+            SUM(r.quantidade_vendida)::bigint as quantidade_vendida,
+            SUM(r.valor_total) as valor_total,
+            SUM(r.valor_total) / SUM(r.quantidade_vendida) as valor_medio
+        FROM {ROLLUP_VIEW} r
+        JOIN vendedores v ON r.id_vendedores = v.id_vendedores
+        JOIN concessionarias c ON v.id_concessionarias = c.id_concessionarias
+        {{where}}
+        GROUP BY v.id_vendedores, v.nome, c.concessionaria
+        ORDER BY valor_total DESC
+    """,
+}
+
+
+def day_bounds(start_date=None, end_date=None):
+    """Converte limites de período em dias inteiros, se possível
+
+    Retorna (primeiro_dia, último_dia), com None para limites abertos, ou
+    None quando algum limite cai no meio de um dia e o rollup diário não
+    consegue responder a consulta.
+    """
+    first_day = None
+    last_day = None
+
+    if start_date is not None:
+        if isinstance(start_date, datetime):
+            if start_date.time() != dt_time.min:
+                return None
+            start_date = start_date.date()
+        first_day = start_date
+
+    if end_date is not None:
+        # O fim do período é inclusivo: só um fim às 23:59:59.999999 cobre o dia todo
+        if not isinstance(end_date, datetime) or end_date.time() != dt_time.max:
+            return None
+        last_day = end_date.date()
+
+    return first_day, last_day
+
+
+def recent_days(days, today=None):
+    """Limites em dias inteiros dos últimos N dias, incluindo o dia de hoje
+
+    Começa à meia-noite e termina no fim de hoje, para que o rollup diário
+    (e o cache de resultados, ao longo do dia) atenda os períodos prontos.
+    """
+    today = today or date.today()
+    start = datetime.combine(today - timedelta(days=days), dt_time.min)
+    return start, datetime.combine(today, dt_time.max)
+
+
+def year_bounds(year):
+    """Retorna o intervalo semiaberto de dias de um ano"""
+    return date(int(year), 1, 1), date(int(year) + 1, 1, 1)
+
+
+class RollupManager:
+    """Cria e atualiza a materialized view de vendas diárias"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def exists(self):
+        """Verifica se o rollup existe e está populado"""
+        status = self.db.execute_query(VIEW_STATUS, (ROLLUP_VIEW,))
+        return not status.empty and bool(status["ispopulated"].iloc[0])
+
+    def create(self):
+        """Cria a materialized view e o índice único"""
+        return self.db.execute_command(CREATE_VIEW) and self.db.execute_command(
+            CREATE_UNIQUE_INDEX
+        )
+
+    def refresh(self, concurrently=True):
+        """Atualiza o rollup; em modo concorrente as leituras não são bloqueadas"""
+        mode = "CONCURRENTLY " if concurrently else ""
+        return self.db.execute_command(f"REFRESH MATERIALIZED VIEW {mode}{ROLLUP_VIEW}")
+
+    def run_schedule(self, interval, concurrently=True, iterations=None):
+        """Atualiza o rollup periodicamente até ser interrompido"""
+        done = 0
+        while iterations is None or done < iterations:
+            started = time.monotonic()
+            ok = self.refresh(concurrently=concurrently)
+            elapsed = time.monotonic() - started
+            status = "ok" if ok else "falhou"
+            print(f"Refresh de {ROLLUP_VIEW} {status} em {elapsed:.1f}s")
+            done += 1
+            if iterations is None or done < iterations:
+                time.sleep(max(interval - elapsed, 0))
+
+
+def main(argv=None):
+    """Função principal"""
+    from database import DatabaseConnection
+
+    parser = argparse.ArgumentParser(description="Rollups diários de vendas")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("create", help="Cria a materialized view")
+    refresh = subparsers.add_parser("refresh", help="Atualiza a materialized view")
+    refresh.add_argument("--concurrently", action="store_true")
+    schedule = subparsers.add_parser("schedule", help="Atualiza periodicamente")
+    schedule.add_argument(
+        "--interval", type=float, default=ROLLUP_CONFIG["refresh_interval"]
+    )
+    args = parser.parse_args(argv)
+
+    db = DatabaseConnection()
+    if not db.connect():
+        sys.exit(1)
+
+    manager = RollupManager(db)
+    try:
+        if args.command == "create":
+            ok = manager.create()
+        elif args.command == "refresh":
+            ok = manager.refresh(concurrently=args.concurrently)
+        else:
+            manager.run_schedule(args.interval)
+            ok = True
+    except KeyboardInterrupt:
+        ok = True
+    finally:
+        db.disconnect()
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
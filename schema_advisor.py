@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Verificação dos índices usados pelas consultas de SalesData
+
+Uso:
+    python schema_advisor.py check
+    python schema_advisor.py create [--concurrently]
+"""
+import argparse
+import sys
+
+# Índices exigidos pelos filtros de data e pelos JOINs das consultas.
+# Os que incluem valor_pago permitem somar vendas sem ler a tabela.
+RECOMMENDED_INDEXES = [
+    {
+        "name": "idx_vendas_data_venda_id_vendas",
+        "table": "vendas",
+        "columns": ["data_venda", "id_vendas"],
+        "include": ["valor_pago"],
+        "reason": "filtros de período e de ano e paginação das vendas",
+    },
+    {
+        "name": "idx_vendas_id_veiculos",
+        "table": "vendas",
+        "columns": ["id_veiculos"],
+        "include": ["valor_pago"],
+        "reason": "vendas por modelo",
+    },
+    {
+        "name": "idx_vendas_id_concessionarias",
+        "table": "vendas",
+        "columns": ["id_concessionarias"],
+        "include": ["valor_pago"],
+        "reason": "vendas por concessionária",
+    },
+    {
+        "name": "idx_vendas_id_vendedores",
+        "table": "vendas",
+        "columns": ["id_vendedores"],
+        "include": ["valor_pago"],
+        "reason": "vendas por vendedor",
+    },
+    {
+        "name": "idx_vendas_id_clientes",
+        "table": "vendas",
+        "columns": ["id_clientes"],
+        "include": [],
+        "reason": "JOIN de clientes nas vendas recentes e do período",
+    },
+    {
+        "name": "idx_vendedores_id_concessionarias",
+        "table": "vendedores",
+        "columns": ["id_concessionarias"],
+        "include": [],
+        "reason": "JOIN de vendedores com concessionárias",
+    },
+    {
+        "name": "idx_concessionarias_id_cidades",
+        "table": "concessionarias",
+        "columns": ["id_cidades"],
+        "include": [],
+        "reason": "JOIN de concessionárias com cidades",
+    },
+    {
+        "name": "idx_cidades_id_estados",
+        "table": "cidades",
+        "columns": ["id_estados"],
+        "include": [],
+        "reason": "JOIN de cidades com estados",
+    },
+]
+
+# Colunas de cada índice válido do schema atual; as de chave vêm primeiro.
+# Expressões (attnum 0) entram como NULL, para que n_chaves continue
+# contando as posições certas
+EXISTING_INDEXES = """
+SELECT
+    t.relname as tabela,
+    i.relname as indice,
+    ix.indnkeyatts as n_chaves,
+    ARRAY(
+        SELECT a.attname::text
+        FROM unnest(ix.indkey::int2[]) WITH ORDINALITY k(attnum, ordem)
+        LEFT JOIN pg_attribute a
+            ON a.attrelid = ix.indrelid AND a.attnum = k.attnum
+        ORDER BY k.ordem
+    ) as colunas
+FROM pg_index ix
+JOIN pg_class i ON ix.indexrelid = i.oid
+JOIN pg_class t ON ix.indrelid = t.oid
+JOIN pg_namespace n ON t.relnamespace = n.oid
+WHERE n.nspname = current_schema()
+  AND ix.indisvalid
+"""
+
+
+def covers(index, spec):
+    """Verifica se um índice existente atende ao índice recomendado
+
+    As colunas recomendadas precisam ser o prefixo da chave, e as colunas
+    incluídas podem estar em qualquer posição do índice.
+    """
+    keys = list(index["colunas"][: index["n_chaves"]])
+    if keys[: len(spec["columns"])] != spec["columns"]:
+        return False
+    return set(spec["include"]) <= set(index["colunas"])
+
+
+def create_statement(spec, concurrently=False):
+    """Monta o CREATE INDEX de um índice recomendado"""
+    mode = "CONCURRENTLY " if concurrently else ""
+    statement = (
+        f"CREATE INDEX {mode}IF NOT EXISTS {spec['name']} "
+        f"ON {spec['table']} ({', '.join(spec['columns'])})"
+    )
+    if spec["include"]:
+        statement += f" INCLUDE ({', '.join(spec['include'])})"
+    return statement
+
+
+class SchemaAdvisor:
+    """Compara os índices do banco com os exigidos pelas consultas"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def missing(self):
+        """Retorna os índices recomendados que não existem no banco"""
+        existing = self.db.execute_query(EXISTING_INDEXES)
+        if existing.empty:
+            return list(RECOMMENDED_INDEXES)
+
+        by_table = {
+            table: rows.to_dict("records") for table, rows in existing.groupby("tabela")
+        }
+        return [
+            spec
+            for spec in RECOMMENDED_INDEXES
+            if not any(covers(index, spec) for index in by_table.get(spec["table"], []))
+        ]
+
+    def create(self, specs, concurrently=False):
+        """Cria os índices informados e retorna quantos foram criados
+
+        CREATE INDEX CONCURRENTLY não bloqueia escritas, mas não pode rodar
+        dentro de uma transação, por isso usa autocommit.
+        """
+        created = 0
+        for spec in specs:
+            statement = create_statement(spec, concurrently)
+            print(f"Criando {spec['name']}...")
+            if self.db.execute_command(statement, autocommit=concurrently):
+                created += 1
+        if created:
+            self.db.execute_command(
+                f"ANALYZE {', '.join(sorted({spec['table'] for spec in specs}))}"
+            )
+        return created
+
+
+def report(specs):
+    """Imprime os índices ausentes com o comando para criá-los"""
+    if not specs:
+        print("✅ Todos os índices recomendados existem")
+        return
+    print(f"❌ {len(specs)} índice(s) recomendado(s) ausente(s):")
+    for spec in specs:
+        print(f"  - {spec['name']} ({spec['reason']})")
+        print(f"    {create_statement(spec, concurrently=True)};")
+
+
+def main(argv=None):
+    """Função principal"""
+    from database import DatabaseConnection
+
+    parser = argparse.ArgumentParser(description="Índices das consultas de vendas")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("check", help="Lista os índices ausentes")
+    create = subparsers.add_parser("create", help="Cria os índices ausentes")
+    create.add_argument("--concurrently", action="store_true")
+    args = parser.parse_args(argv)
+
+    db = DatabaseConnection()
+    if not db.connect():
+        sys.exit(1)
+
+    advisor = SchemaAdvisor(db)
+    try:
+        missing = advisor.missing()
+        if args.command == "check":
+            report(missing)
+            ok = not missing
+        else:
+            created = advisor.create(missing, concurrently=args.concurrently)
+            print(f"{created} índice(s) criado(s)")
+            ok = created == len(missing)
+    finally:
+        db.disconnect()
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
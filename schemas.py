@@ -0,0 +1,105 @@
+"""
+Tipos das colunas retornadas por cada método de SalesData
+
+Contagens chegam como int64 e valores em dinheiro como float64. Nas linhas
+de venda, em que cada nome se repete muitas vezes, os nomes de dimensão
+viram categorias do pandas (um código por linha em vez de uma string); nos
+agregados cada nome aparece uma vez e fica como texto.
+"""
+
+import pandas as pd
+
+COUNT = "int64"
+MONEY = "float64"
+NAME = "category"
+
+_SALES_ROWS = {
+    "modelo": NAME,
+    "concessionaria": NAME,
+    "vendedor": NAME,
+    "cliente": NAME,
+    "valor_pago": MONEY,
+}
+
+SCHEMAS = {
+    "get_total_sales": {
+        "total_vendas": COUNT,
+        "valor_total_vendas": MONEY,
+        "valor_medio_venda": MONEY,
+    },
+    "get_sales_by_model": {
+        "quantidade_vendida": COUNT,
+        "valor_total": MONEY,
+        "valor_medio": MONEY,
+    },
+    "get_sales_by_month": {
+        "ano": "int64",
+        "mes": "int64",
+        "quantidade_vendida": COUNT,
+        "valor_total": MONEY,
+    },
+    "get_sales_by_dealership": {
+        "quantidade_vendida": COUNT,
+        "valor_total": MONEY,
+        "valor_medio": MONEY,
+    },
+    "get_sales_by_salesperson": {
+        "quantidade_vendida": COUNT,
+        "valor_total": MONEY,
+        "valor_medio": MONEY,
+    },
+    "get_sales_timeseries": {
+        "periodo": "datetime64[ns]",
+        "quantidade_vendida": COUNT,
+        "valor_total": MONEY,
+    },
+    "get_recent_sales": _SALES_ROWS,
+    "get_sales_period": _SALES_ROWS,
+    "get_sales_page": {"id_vendas": "int64", **_SALES_ROWS},
+}
+
+# Cada painel do snapshot segue o schema do método equivalente
+SCHEMAS["get_dashboard_snapshot"] = {
+    "total_sales": SCHEMAS["get_total_sales"],
+    "sales_by_model": SCHEMAS["get_sales_by_model"],
+    "sales_by_dealership": SCHEMAS["get_sales_by_dealership"],
+    "sales_by_salesperson": SCHEMAS["get_sales_by_salesperson"],
+}
+
+# A estimativa tem os painéis do snapshot e as margens de erro de cada linha
+_MARGINS = {"margem_quantidade": MONEY, "margem_valor": MONEY}
+SCHEMAS["get_dashboard_estimate"] = {
+    name: {**schema, **_MARGINS}
+    for name, schema in SCHEMAS["get_dashboard_snapshot"].items()
+}
+
+
+def cast_frame(frame, schema):
+    """Converte as colunas presentes no DataFrame para os tipos do schema"""
+    if frame.empty:
+        return frame
+    types = {
+        column: dtype
+        for column, dtype in schema.items()
+        if column in frame.columns and frame[column].dtype != dtype
+    }
+    return frame.astype(types) if types else frame
+
+
+def apply_schema(method, value):
+    """Aplica o schema declarado do método ao seu resultado"""
+    schema = SCHEMAS.get(method)
+    if schema is None:
+        return value
+    if isinstance(value, pd.DataFrame):
+        return cast_frame(value, schema)
+    if isinstance(value, dict):
+        return {
+            name: (
+                cast_frame(frame, schema[name])
+                if name in schema and isinstance(frame, pd.DataFrame)
+                else frame
+            )
+            for name, frame in value.items()
+        }
+    return value
@@ -0,0 +1,56 @@
+"""
+Testes da verificação de regressões do benchmark (benchmarks/run_benchmarks.py)
+"""
+
+import pytest
+
+from benchmarks.run_benchmarks import check_regressions
+
+THRESHOLDS = {"10k": {"default_query": 0.25, "get_sales_period": 0.5}}
+
+
+def result(median, name="get_total_sales", kind="query", scale="10k"):
+    """Resultado de uma medição, no formato gravado pelo benchmark"""
+    return {"scale": scale, "kind": kind, "name": name, "median": median}
+
+
+class TestCheckRegressions:
+    @pytest.mark.parametrize(
+        "measured, baseline, passed",
+        [
+            # Limite padrão do tipo e limite específico do método
+            (result(0.2), None, True),
+            (result(0.3), None, False),
+            (result(0.4, "get_sales_period"), None, True),
+            # Sem limite para a escala ou o tipo, só o resultado anterior conta
+            (result(9.0, scale="1m"), None, True),
+            (result(9.0, kind="chart"), None, True),
+            # Piora relativa e absoluta acima dos limites
+            (result(0.2), result(0.1), False),
+            # Piora relativa grande, mas de poucos milissegundos: ruído
+            (result(0.004), result(0.001), True),
+            # Piora absoluta, mas dentro de max_slowdown
+            (result(0.24), result(0.2), True),
+            # Resultado anterior de outra escala não é comparado
+            (result(0.2), result(0.1, scale="1m"), True),
+        ],
+    )
+    def test_pass_or_fail(self, measured, baseline, passed):
+        """Cada resultado é marcado pelo limite e pela comparação com o anterior"""
+        previous = {"results": [baseline]} if baseline else None
+        failures = check_regressions([measured], THRESHOLDS, previous)
+        assert measured["passed"] is passed
+        assert failures == ([] if passed else [measured])
+
+    def test_records_threshold_and_slowdown(self):
+        measured = result(0.2)
+        check_regressions([measured], THRESHOLDS, {"results": [result(0.1)]})
+        assert measured["threshold"] == 0.25
+        assert measured["slowdown"] == pytest.approx(2.0)
+
+    def test_custom_limits(self):
+        """max_slowdown e min_delta ajustam a tolerância à piora"""
+        measured = result(0.2)
+        baseline = {"results": [result(0.1)]}
+        assert not check_regressions([measured], THRESHOLDS, baseline, max_slowdown=2.5)
+        assert not check_regressions([measured], THRESHOLDS, baseline, min_delta=0.2)
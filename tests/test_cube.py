@@ -0,0 +1,161 @@
+"""
+Testes do cubo de vendas em memória (cube.py)
+"""
+
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from cube import AXES, CELLS_QUERY, SIZE_QUERY, SalesCube
+from rollups import recent_days
+
+EPOCH = pd.Timestamp("1970-01-01")
+
+
+class CubeDatabase:
+    """Banco falso com dois modelos, duas concessionárias e três vendedores"""
+
+    def __init__(self):
+        sales = [
+            # dia, veículo, concessionária, vendedor, quantidade, valor
+            ("2024-01-10", 1, 1, 1, 2, 200.0),
+            ("2024-01-10", 2, 1, 2, 1, 50.0),
+            ("2024-02-05", 1, 2, 3, 1, 120.0),
+            ("2024-03-01", 2, 2, 3, 3, 90.0),
+        ]
+        self.cells = pd.DataFrame(
+            {
+                "dia": [(pd.Timestamp(s[0]) - EPOCH).days for s in sales],
+                "id_veiculos": [s[1] for s in sales],
+                "id_concessionarias": [s[2] for s in sales],
+                "id_vendedores": [s[3] for s in sales],
+                "quantidade_vendida": [s[4] for s in sales],
+                "valor_total": [s[5] for s in sales],
+            }
+        )
+        self.responses = {
+            SIZE_QUERY: pd.DataFrame(
+                {
+                    "vendas": [7],
+                    "dias": [60],
+                    "veiculos": [2],
+                    "concessionarias": [2],
+                    "vendedores": [3],
+                }
+            ),
+            AXES["model"][1]: pd.DataFrame(
+                {"id_veiculos": [1, 2], "modelo": ["Civic", "Golf"]}
+            ),
+            AXES["dealership"][1]: pd.DataFrame(
+                {
+                    "id_concessionarias": [1, 2],
+                    "concessionaria": ["Concessionária A", "Concessionária B"],
+                    "cidade": ["Campinas", "Curitiba"],
+                    "estado": ["São Paulo", "Paraná"],
+                }
+            ),
+            AXES["salesperson"][1]: pd.DataFrame(
+                {
+                    "id_vendedores": [1, 2, 3],
+                    "vendedor": ["Ana", "João", "Maria"],
+                    "concessionaria": [
+                        "Concessionária A",
+                        "Concessionária A",
+                        "Concessionária B",
+                    ],
+                }
+            ),
+            CELLS_QUERY: self.cells,
+        }
+
+    def execute_query(self, query, params=None):
+        return self.responses[query]
+
+
+@pytest.fixture
+def cube():
+    return SalesCube(CubeDatabase(), max_bytes=1024 * 1024, ttl=0)
+
+
+def total(cube, *args, **dimensions):
+    result = cube.query("total_sales", *args, **dimensions)
+    return int(result["total_vendas"].iloc[0]), result["valor_total_vendas"].iloc[0]
+
+
+class TestSalesCube:
+    def test_total_without_filters(self, cube):
+        assert total(cube) == (7, 460.0)
+
+    def test_whole_day_periods(self, cube):
+        """Períodos em dias inteiros viram uma fatia das células"""
+        start = datetime(2024, 1, 10)
+        end = datetime(2024, 2, 5, 23, 59, 59, 999999)
+        assert total(cube, start, end) == (4, 370.0)
+        assert total(cube, date(2024, 2, 6), None) == (3, 90.0)
+        assert total(cube, None, None, 2024) == (7, 460.0)
+
+    def test_partial_day_falls_back_to_sql(self, cube):
+        """Limites no meio do dia não são respondidos pelo cubo"""
+        assert cube.query("total_sales", datetime(2024, 1, 10, 12, 0), None) is None
+
+    def test_presets_are_answered(self, cube):
+        """Os períodos prontos do dashboard são respondidos pelo cubo"""
+        start, end = recent_days(30, today=date(2024, 3, 1))
+        assert total(cube, start, end) == (4, 210.0)
+
+    @pytest.mark.parametrize(
+        "dimensions, expected",
+        [
+            ({"model": ["Golf"]}, (4, 140.0)),
+            ({"dealership": ["Concessionária A"]}, (3, 250.0)),
+            ({"state": ["Paraná"]}, (4, 210.0)),
+            ({"salesperson": ["Maria"]}, (4, 210.0)),
+            ({"salesperson": ["Ana", "João"], "model": ["Civic"]}, (2, 200.0)),
+        ],
+    )
+    def test_dimension_filters(self, cube, dimensions, expected):
+        assert total(cube, **dimensions) == expected
+
+    def test_salesperson_panel(self, cube):
+        """Painel por vendedor com colunas e ordenação do método SQL"""
+        panel = cube.query("sales_by_salesperson", salesperson=["Ana", "Maria"])
+        assert list(panel.columns) == [
+            "vendedor",
+            "concessionaria",
+            "quantidade_vendida",
+            "valor_total",
+            "valor_medio",
+        ]
+        assert list(panel["vendedor"]) == ["Maria", "Ana"]
+        assert list(panel["valor_medio"]) == [52.5, 100.0]
+
+    def test_month_panel(self, cube):
+        panel = cube.query("sales_by_month", model=["Civic"])
+        assert list(zip(panel["mes"], panel["quantidade_vendida"])) == [(1, 2), (2, 1)]
+
+    def test_too_large_uses_sql(self):
+        """Acima de max_bytes o cubo não é carregado"""
+        cube = SalesCube(CubeDatabase(), max_bytes=10)
+        assert cube.query("total_sales") is None
+        assert cube.stats()["carregado"] is False
+
+    def test_reload_swaps_cells_and_axes_together(self, cube):
+        """Uma nova carga troca células e eixos juntos; quem já leu o par
+        anterior continua com códigos e rótulos da mesma carga"""
+        assert total(cube, model=["Golf"]) == (4, 140.0)
+        previous = cube._data
+
+        db = cube.db
+        db.responses[AXES["model"][1]] = pd.DataFrame(
+            {"id_veiculos": [3, 1, 2], "modelo": ["Accord", "Civic", "Golf"]}
+        )
+        assert cube.refresh()
+        cells, axes = cube._data
+        assert list(axes["model"]["modelo"]) == ["Accord", "Civic", "Golf"]
+        assert set(cells["model"]) == {1, 2}
+        assert total(cube, model=["Golf"]) == (4, 140.0)
+
+        old_cells, old_axes = previous
+        assert list(old_axes["model"]["modelo"]) == ["Civic", "Golf"]
+        assert set(old_cells["model"]) == {0, 1}
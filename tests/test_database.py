@@ -0,0 +1,552 @@
+"""
+Testes da camada de acesso a dados (database.py)
+"""
+
+import threading
+from datetime import datetime
+from unittest.mock import Mock
+
+import pandas as pd
+
+import pytest
+from psycopg2 import extensions
+
+import database
+from database import (
+    ESTIMATE_MARGINS,
+    ConnectionPool,
+    DatabaseConnection,
+    PoolTimeoutError,
+    ResultCache,
+    SalesData,
+    empty_snapshot,
+)
+
+
+def make_connection():
+    """Conexão psycopg2 falsa, ociosa e aberta"""
+    conn = Mock()
+    conn.closed = False
+    conn.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_IDLE
+    return conn
+
+
+@pytest.fixture
+def fake_connect(monkeypatch):
+    """Substitui psycopg2.connect e guarda as conexões abertas"""
+    opened = []
+
+    def connect(**kwargs):
+        conn = make_connection()
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(database.psycopg2, "connect", connect)
+    monkeypatch.setattr(database.extensions, "register_type", Mock())
+    return opened
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Relógio controlado pelo teste para os vencimentos do cache"""
+    now = [1000.0]
+    monkeypatch.setattr(database.time, "monotonic", lambda: now[0])
+    return now
+
+
+class TestConnectionPool:
+    def test_opens_min_size_connections(self, fake_connect):
+        """O pool abre min_size conexões na criação"""
+        pool = ConnectionPool({}, min_size=2, max_size=4)
+        assert len(fake_connect) == 2
+        assert pool.stats() == {"size": 2, "idle": 2, "in_use": 0, "max_size": 4}
+
+    def test_invalid_sizes(self, fake_connect):
+        """Tamanhos inconsistentes são rejeitados"""
+        with pytest.raises(ValueError):
+            ConnectionPool({}, min_size=3, max_size=2)
+
+    def test_reuses_returned_connection(self, fake_connect):
+        """Uma conexão devolvida é reaproveitada no próximo empréstimo"""
+        pool = ConnectionPool({}, min_size=0, max_size=2)
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            assert second is first
+        assert len(fake_connect) == 1
+
+    def test_timeout_when_exhausted(self, fake_connect):
+        """Sem vagas, getconn desiste depois do tempo limite"""
+        pool = ConnectionPool({}, min_size=0, max_size=1, timeout=0.05)
+        conn = pool.getconn()
+        with pytest.raises(PoolTimeoutError):
+            pool.getconn()
+        pool.putconn(conn)
+        assert pool.getconn() is conn
+
+    def test_recycles_expired_connection(self, fake_connect):
+        """Conexões acima do tempo de vida são fechadas e substituídas"""
+        pool = ConnectionPool({}, min_size=1, max_size=1, max_lifetime=0.01)
+        old = fake_connect[0]
+        pool._created_at[old] -= 1
+        conn = pool.getconn()
+        assert conn is not old
+        old.close.assert_called_once()
+        assert pool.stats()["size"] == 1
+
+    def test_discards_broken_connection(self, fake_connect):
+        """Erros operacionais descartam a conexão em vez de devolvê-la"""
+        pool = ConnectionPool({}, min_size=0, max_size=1)
+        with pytest.raises(database.psycopg2.OperationalError):
+            with pool.connection() as conn:
+                raise database.psycopg2.OperationalError("caiu")
+        conn.close.assert_called_once()
+        assert pool.stats()["size"] == 0
+
+    def test_closes_opened_connections_on_failure(self, fake_connect, monkeypatch):
+        """Se uma conexão inicial falha, as já abertas são fechadas"""
+        connect = database.psycopg2.connect
+
+        def flaky(**kwargs):
+            if len(fake_connect) == 2:
+                raise database.psycopg2.OperationalError("recusada")
+            return connect(**kwargs)
+
+        monkeypatch.setattr(database.psycopg2, "connect", flaky)
+        with pytest.raises(database.psycopg2.OperationalError):
+            ConnectionPool({}, min_size=3, max_size=3)
+        assert len(fake_connect) == 2
+        for conn in fake_connect:
+            conn.close.assert_called_once()
+
+    def test_closeall_rejects_new_loans(self, fake_connect):
+        """Depois de closeall, o pool não empresta mais conexões"""
+        pool = ConnectionPool({}, min_size=1, max_size=1)
+        pool.closeall()
+        fake_connect[0].close.assert_called_once()
+        with pytest.raises(PoolTimeoutError):
+            pool.getconn()
+
+
+class TestDatabaseConnection:
+    def test_reconnect_closes_previous_pool(self, fake_connect, mock_db_config):
+        """Um novo connect fecha o pool anterior"""
+        db = DatabaseConnection(mock_db_config)
+        assert db.connect()
+        previous = db.pool
+        assert db.connect()
+        assert previous.closed
+        assert db.pool is not previous and db.is_connected()
+
+
+class TestResultCache:
+    def test_normalized_keys(self):
+        """Parâmetros equivalentes geram a mesma chave"""
+        cache = ResultCache()
+        assert cache.make_key("m", {"b": [1, 2], "a": {3}}) == cache.make_key(
+            "m", {"a": {3}, "b": (1, 2)}
+        )
+
+    def test_expires_after_ttl(self, clock):
+        """Entradas vencem depois do TTL do método"""
+        cache = ResultCache(default_ttl=10, ttls={"curto": 1})
+        cache.set(("curto", ()), "a")
+        cache.set(("longo", ()), "b")
+        clock[0] += 5
+        assert cache.get(("curto", ())) == (False, None)
+        assert cache.get(("longo", ())) == (True, "b")
+        assert cache.stats()["entries"] == 1
+
+    def test_evicts_least_recently_used(self):
+        """Acima de max_bytes, sai a entrada usada há mais tempo"""
+        size = ResultCache.size_of("x" * 100)
+        cache = ResultCache(max_bytes=size * 2)
+        cache.set(("a", ()), "x" * 100)
+        cache.set(("b", ()), "y" * 100)
+        cache.get(("a", ()))
+        cache.set(("c", ()), "z" * 100)
+        assert cache.get(("b", ()))[0] is False
+        assert cache.get(("a", ()))[0] and cache.get(("c", ()))[0]
+        assert cache.stats()["evictions"] == 1
+
+    def test_oversized_value_drops_previous(self):
+        """Um valor maior que o cache não deixa o anterior em uso"""
+        cache = ResultCache(max_bytes=ResultCache.size_of("x" * 100))
+        cache.set(("a", ()), "x" * 10)
+        cache.set(("a", ()), "x" * 1000)
+        assert cache.get(("a", ())) == (False, None)
+        assert cache.stats()["bytes"] == 0
+
+    def test_stale_while_revalidate(self, clock):
+        """Depois do TTL a entrada fica stale por stale_ttl e depois some"""
+        cache = ResultCache(default_ttl=10, stale_ttl=5)
+        cache.set(("a", ()), "v")
+        assert cache.lookup(("a", ())) == ("fresh", "v")
+        clock[0] += 12
+        assert cache.lookup(("a", ())) == ("stale", "v")
+        clock[0] += 5
+        assert cache.lookup(("a", ())) == (None, None)
+        assert cache.stats()["stale_hits"] == 1
+
+    def test_invalidate_by_method(self):
+        """invalidate remove só as entradas do método informado"""
+        cache = ResultCache()
+        cache.set(("a", (1,)), 1)
+        cache.set(("a", (2,)), 2)
+        cache.set(("b", ()), 3)
+        cache.invalidate("a")
+        assert cache.stats()["entries"] == 1
+        cache.invalidate()
+        assert cache.stats()["entries"] == 0
+
+
+class FakeNamedCursor:
+    """Cursor no servidor falso: itera as linhas e pode falhar no meio"""
+
+    def __init__(self, rows, fail_after=None):
+        self.rows = rows
+        self.fail_after = fail_after
+        self.description = [("id_vendas",), ("valor_pago",)]
+        self.itersize = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        pass
+
+    def __iter__(self):
+        for position, row in enumerate(self.rows):
+            if position == self.fail_after:
+                raise database.psycopg2.DataError("falha no meio")
+            yield row
+
+
+def streaming_connection(cursor, fake_connect, db_config):
+    """DatabaseConnection com pool cuja conexão devolve o cursor informado"""
+    db = DatabaseConnection(db_config)
+    db.connect()
+    fake_connect[0].cursor = Mock(return_value=cursor)
+    return db
+
+
+class TestStreamQuery:
+    def test_rechunks_rows(self, fake_connect, mock_db_config):
+        """As linhas do cursor são entregues em blocos de chunksize"""
+        cursor = FakeNamedCursor([(i, float(i)) for i in range(5)])
+        db = streaming_connection(cursor, fake_connect, mock_db_config)
+        chunks = list(db.stream_query("SELECT", itersize=2, chunksize=3))
+        assert [len(chunk) for chunk in chunks] == [3, 2]
+        assert list(chunks[1]["id_vendas"]) == [3, 4]
+        assert cursor.itersize == 2
+
+    def test_propagates_errors(self, fake_connect, mock_db_config):
+        """Uma falha no meio da transmissão chega ao chamador"""
+        cursor = FakeNamedCursor([(i, float(i)) for i in range(5)], fail_after=4)
+        db = streaming_connection(cursor, fake_connect, mock_db_config)
+        chunks = db.stream_query("SELECT", chunksize=3)
+        assert len(next(chunks)) == 3
+        with pytest.raises(database.psycopg2.DataError):
+            next(chunks)
+        assert db.pool.stats()["in_use"] == 0
+
+
+class TestExecuteQuery:
+    @pytest.mark.parametrize(
+        "query, explained",
+        [
+            ("SELECT 1 FROM vendas", True),
+            ("\n EXPLAIN (FORMAT JSON) SELECT 1 FROM vendas", False),
+        ],
+    )
+    def test_explain_capture(
+        self, fake_connect, mock_db_config, monkeypatch, query, explained
+    ):
+        """O plano é capturado, exceto para consultas que já são EXPLAIN"""
+        monkeypatch.setattr(database.pd, "read_sql_query", Mock())
+        db = DatabaseConnection(mock_db_config)
+        db.connect()
+        db._explain = Mock(return_value="Seq Scan")
+        with database.track_call("get_total_sales", explain=True) as call:
+            db.execute_query(query)
+        assert db._explain.called is explained
+        assert call.errors == []
+
+
+class OfflineSalesData(SalesData):
+    """SalesData sem banco, com as consultas substituídas pelo teste"""
+
+    def _connect(self, db_config):
+        self.db = None
+        return False
+
+
+@pytest.fixture
+def offline():
+    sales_data = OfflineSalesData(cache=False, incremental=False, cube=False)
+    yield sales_data
+    if sales_data._executor is not None:
+        sales_data._executor.shutdown(wait=False)
+
+
+class TestFetchSnapshotProgressive:
+    def test_exact_within_wait(self, offline):
+        offline.get_dashboard_snapshot = Mock(return_value={"exato": 1})
+        assert offline.fetch_snapshot_progressive(wait=1) == ({"exato": 1}, None)
+
+    def test_estimate_while_exact_runs(self, offline):
+        """Com a consulta exata lenta, a estimativa sai antes"""
+        release = threading.Event()
+        offline.get_dashboard_snapshot = lambda *a, **k: release.wait(5) and "exato"
+        offline.get_dashboard_estimate = Mock(return_value="estimativa")
+        panels, pending = offline.fetch_snapshot_progressive(wait=0.01)
+        assert panels == "estimativa"
+        release.set()
+        assert pending.result(timeout=5) == "exato"
+
+    def test_exact_error(self, offline):
+        """Um erro na consulta exata vira (None, None), sem exceção"""
+        offline.get_dashboard_snapshot = Mock(side_effect=RuntimeError("falhou"))
+        assert offline.fetch_snapshot_progressive(wait=1) == (None, None)
+
+    def test_exact_timeout_without_estimate(self, offline, monkeypatch):
+        """Sem estimativa, o tempo limite da consulta exata vira (None, None)"""
+        release = threading.Event()
+        monkeypatch.setitem(database.FETCH_CONFIG, "timeout", 0.05)
+        offline.get_dashboard_snapshot = lambda *a, **k: release.wait(5)
+        offline.get_dashboard_estimate = Mock(return_value=None)
+        assert offline.fetch_snapshot_progressive(wait=0.01) == (None, None)
+        release.set()
+
+
+class TestFetchMany:
+    def test_partial_failure(self, offline):
+        """Uma consulta com erro não impede as demais"""
+        offline.get_total_sales = Mock(return_value="total")
+        results, errors = offline.fetch_many(
+            {
+                "total": ("get_total_sales", 2024),
+                "ok": lambda: 1,
+                "bad": Mock(side_effect=RuntimeError("falhou")),
+            }
+        )
+        assert results == {"total": "total", "ok": 1, "bad": None}
+        assert list(errors) == ["bad"]
+        offline.get_total_sales.assert_called_once_with(2024)
+
+    def test_timeout(self, offline):
+        """A consulta lenta vira TimeoutError e as outras seguem"""
+        release = threading.Event()
+        results, errors = offline.fetch_many(
+            {"slow": lambda: release.wait(5), "fast": lambda: 1},
+            timeout=5,
+            timeouts={"slow": 0.05},
+        )
+        release.set()
+        assert results == {"slow": None, "fast": 1}
+        assert isinstance(errors["slow"], TimeoutError)
+
+    def test_queue_time_does_not_count(self, offline, monkeypatch):
+        """O tempo limite começa quando a consulta sai da fila"""
+        monkeypatch.setitem(database.FETCH_CONFIG, "max_workers", 1)
+        results, errors = offline.fetch_many(
+            {
+                "first": lambda: threading.Event().wait(0.3) or 1,
+                "second": lambda: threading.Event().wait(0.2) or 2,
+            },
+            timeout=0.35,
+        )
+        assert errors == {}
+        assert results == {"first": 1, "second": 2}
+
+
+class QueryDatabase:
+    """Banco falso que devolve sempre o mesmo resultado e guarda as consultas"""
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    def execute_query(self, query, params=None):
+        self.calls.append((query, params))
+        return self.result
+
+
+class FakeSalesData(SalesData):
+    """SalesData com o banco falso passado em db_config"""
+
+    def _connect(self, db_config):
+        self.db = db_config
+        return True
+
+
+def fake_sales_data(result):
+    return FakeSalesData(
+        cache=False,
+        incremental=False,
+        use_rollups=False,
+        db_config=QueryDatabase(result),
+        cube=False,
+    )
+
+
+class TestSalesHeatmap:
+    def test_reshapes_cells_into_dense_matrix(self):
+        """As células em ordem de linha viram a matriz concessionária × mês"""
+        months = pd.to_datetime(["2024-01-01", "2024-02-01", "2024-03-01"])
+        cells = pd.DataFrame(
+            {
+                "concessionaria": ["A"] * 3 + ["B"] * 3,
+                "mes": list(months) * 2,
+                # Meses sem vendas já chegam com zero (COALESCE da consulta)
+                "valor_total": [10.0, 0.0, 30.0, 0.0, 5.0, 0.0],
+            }
+        )
+        sales_data = fake_sales_data(cells)
+        heatmap = sales_data.get_sales_heatmap(
+            datetime(2024, 1, 1), datetime(2024, 3, 31, 23, 59)
+        )
+        assert heatmap.shape == (2, 3)
+        assert list(heatmap.index) == ["A", "B"]
+        assert isinstance(heatmap.columns, pd.DatetimeIndex)
+        assert list(heatmap.columns) == list(months)
+        assert heatmap.loc["A"].tolist() == [10.0, 0.0, 30.0]
+        assert heatmap.loc["B"].tolist() == [0.0, 5.0, 0.0]
+        assert heatmap.to_numpy().dtype == "float64"
+
+        # Filtro do WHERE e, depois, os limites do calendário
+        start, end = datetime(2024, 1, 1), datetime(2024, 3, 31, 23, 59)
+        assert sales_data.db.calls[0][1] == (start, end, start, end)
+
+    def test_no_sales(self):
+        assert fake_sales_data(pd.DataFrame()).get_sales_heatmap().empty
+
+
+class TestSalesTimeseries:
+    def test_date_trunc_parameter_order(self):
+        """Granularidade, filtros, limites do calendário e passo, na ordem dos %s"""
+        sales_data = fake_sales_data(pd.DataFrame())
+        start, end = datetime(2024, 1, 1, 8), datetime(2024, 6, 30, 18)
+        sales_data.get_sales_timeseries("quarter", start, end, model=["Civic"])
+        query, params = sales_data.db.calls[0]
+        assert query.count("%s") == len(params)
+        assert params == (
+            "quarter",
+            start,
+            end,
+            ["Civic"],
+            "quarter",
+            start,
+            "quarter",
+            end,
+            "3 months",
+        )
+        assert query.index("DATE_TRUNC(%s, ven.data_venda)") < query.index("WHERE")
+
+    def test_unknown_granularity(self):
+        with pytest.raises(ValueError):
+            fake_sales_data(pd.DataFrame()).get_sales_timeseries("year")
+
+
+def snapshot_rows(*rows):
+    """Linhas do SNAPSHOT_QUERY: painel, rótulos e agregados (o resto fica NaN)"""
+    columns = [
+        "painel",
+        "modelo",
+        "concessionaria",
+        "cidade",
+        "estado",
+        "vendedor",
+        "concessionaria_vendedor",
+        "quantidade_vendida",
+        "valor_total",
+        "valor_medio",
+    ]
+    return pd.DataFrame([dict(row) for row in rows], columns=columns)
+
+
+SNAPSHOT_ROWS = snapshot_rows(
+    {"painel": "total_sales", "quantidade_vendida": 3, "valor_total": 60.0},
+    {"painel": "sales_by_model", "modelo": "Golf", "quantidade_vendida": 1},
+    {"painel": "sales_by_model", "modelo": "Civic", "quantidade_vendida": 2},
+    {"painel": "sales_by_dealership", "concessionaria": "A", "valor_total": 10.0},
+    {"painel": "sales_by_dealership", "concessionaria": "B", "valor_total": 50.0},
+    {
+        "painel": "sales_by_salesperson",
+        "vendedor": "João",
+        "concessionaria_vendedor": "A",
+        "valor_total": 60.0,
+    },
+)
+
+
+class TestSplitSnapshot:
+    @pytest.mark.parametrize(
+        "panel, columns, first",
+        [
+            (
+                "total_sales",
+                ["total_vendas", "valor_total_vendas", "valor_medio_venda"],
+                ("total_vendas", 3),
+            ),
+            (
+                "sales_by_model",
+                ["modelo", "quantidade_vendida", "valor_total", "valor_medio"],
+                ("modelo", "Civic"),
+            ),
+            (
+                "sales_by_dealership",
+                [
+                    "concessionaria",
+                    "cidade",
+                    "estado",
+                    "quantidade_vendida",
+                    "valor_total",
+                    "valor_medio",
+                ],
+                ("concessionaria", "B"),
+            ),
+            (
+                "sales_by_salesperson",
+                [
+                    "vendedor",
+                    "concessionaria",
+                    "quantidade_vendida",
+                    "valor_total",
+                    "valor_medio",
+                ],
+                ("concessionaria", "A"),
+            ),
+        ],
+    )
+    def test_panels(self, panel, columns, first):
+        """Cada painel recebe só as suas linhas, colunas e ordenação"""
+        panels = fake_sales_data(None)._split_snapshot(SNAPSHOT_ROWS)
+        assert set(panels) == set(empty_snapshot())
+        frame = panels[panel]
+        assert list(frame.columns) == columns
+        assert list(frame.index) == list(range(len(frame)))
+        column, value = first
+        assert frame[column].iloc[0] == value
+
+    def test_missing_panel_keeps_columns(self):
+        """Um painel sem linhas vem vazio, mas com as colunas do método"""
+        rows = SNAPSHOT_ROWS[SNAPSHOT_ROWS["painel"] != "sales_by_model"]
+        model = fake_sales_data(None)._split_snapshot(rows)["sales_by_model"]
+        assert model.empty
+        assert list(model.columns) == [
+            "modelo",
+            "quantidade_vendida",
+            "valor_total",
+            "valor_medio",
+        ]
+
+    def test_extra_columns(self):
+        """As margens da estimativa acompanham todos os painéis"""
+        rows = SNAPSHOT_ROWS.assign(margem_quantidade=1.0, margem_valor=2.0)
+        panels = fake_sales_data(None)._split_snapshot(rows, ESTIMATE_MARGINS)
+        for frame in panels.values():
+            assert list(frame.columns[-2:]) == list(ESTIMATE_MARGINS)
@@ -0,0 +1,102 @@
+"""
+Testes do cache de dimensões que decodifica as vendas (dimensions.py)
+"""
+
+import pandas as pd
+import pytest
+
+from dimensions import SALES_ROW_COLUMNS, DimensionCache, DimensionLookup
+
+
+class DimensionDatabase:
+    """Responde o SELECT de cada tabela de dimensão e conta as cargas"""
+
+    def __init__(self):
+        self.tables = {
+            "veiculos": pd.DataFrame(
+                {"id_veiculos": [1, 2], "nome": ["Golf", "Civic"]}
+            ),
+            "concessionarias": pd.DataFrame(
+                {"id_concessionarias": [1], "concessionaria": ["Concessionária A"]}
+            ),
+            "vendedores": pd.DataFrame({"id_vendedores": [7], "nome": ["João"]}),
+            "clientes": pd.DataFrame({"id_clientes": [3], "cliente": ["Cliente 3"]}),
+        }
+        self.loads = 0
+
+    def execute_query(self, query, params=None):
+        table = query.rsplit(" ", 1)[-1]
+        if table == "veiculos":
+            self.loads += 1
+        return self.tables[table]
+
+
+def sales_keys(vehicles):
+    """Vendas com as chaves inteiras, como em SALES_KEYS_SELECT"""
+    return pd.DataFrame(
+        {
+            "data_venda": pd.date_range("2024-01-01", periods=len(vehicles)),
+            "id_veiculos": vehicles,
+            "id_concessionarias": 1,
+            "id_vendedores": 7,
+            "id_clientes": 3,
+            "valor_pago": [100.0 * (i + 1) for i in range(len(vehicles))],
+        }
+    )
+
+
+@pytest.fixture
+def db():
+    return DimensionDatabase()
+
+
+@pytest.fixture
+def dimensions(db):
+    cache = DimensionCache(db, ttl=0)
+    assert cache.ensure_loaded()
+    return cache
+
+
+class TestDimensionLookup:
+    def test_codes(self):
+        """Chaves viram códigos das categorias ordenadas; desconhecidas, -1"""
+        lookup = DimensionLookup(pd.Series([5, 2]), pd.Series(["Golf", "Civic"]))
+        assert list(lookup.categories) == ["Civic", "Golf"]
+        assert list(lookup.codes([2, 5, 3, 9, -1])) == [0, 1, -1, -1, -1]
+
+
+class TestDimensionCache:
+    def test_decodes_known_keys(self, dimensions, db):
+        """Chaves conhecidas são decodificadas sem nova carga"""
+        sales = dimensions.decode_sales(sales_keys([2, 1, 2]))
+        assert list(sales.columns) == SALES_ROW_COLUMNS
+        assert list(sales["modelo"]) == ["Civic", "Golf", "Civic"]
+        assert list(sales["vendedor"]) == ["João"] * 3
+        assert list(sales["valor_pago"]) == [100.0, 200.0, 300.0]
+        assert db.loads == 1
+
+    def test_dtypes(self, dimensions):
+        """Nomes categóricos só com as categorias usadas; data e valor nativos"""
+        sales = dimensions.decode_sales(sales_keys([2, 2]))
+        assert pd.api.types.is_datetime64_dtype(sales["data_venda"])
+        assert sales["valor_pago"].dtype == "float64"
+        for column in ["modelo", "concessionaria", "vendedor", "cliente"]:
+            assert isinstance(sales[column].dtype, pd.CategoricalDtype)
+        assert list(sales["modelo"].cat.categories) == ["Civic"]
+
+    def test_new_key_triggers_refresh(self, dimensions, db):
+        """Uma chave ainda não carregada recarrega as dimensões"""
+        db.tables["veiculos"] = pd.DataFrame(
+            {"id_veiculos": [1, 2, 3], "nome": ["Golf", "Civic", "Onix"]}
+        )
+        sales = dimensions.decode_sales(sales_keys([3, 1]))
+        assert list(sales["modelo"]) == ["Onix", "Golf"]
+        assert db.loads == 2
+
+    def test_empty_and_failed_frames(self, dimensions):
+        """Sem linhas, as colunas são mantidas; um erro (sem colunas) passa adiante"""
+        assert list(dimensions.decode_sales(sales_keys([])).columns) == (
+            SALES_ROW_COLUMNS
+        )
+        failed = pd.DataFrame()
+        assert dimensions.decode_sales(failed) is failed
@@ -0,0 +1,129 @@
+"""
+Testes do cache de resultados em disco (disk_cache.py)
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+import disk_cache
+from disk_cache import DiskResultCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Relógio de parede controlado pelo teste para os vencimentos"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(disk_cache.time, "time", lambda: now[0])
+    return now
+
+
+def arrow_files(cache):
+    """Arquivos Arrow presentes no diretório do cache"""
+    return sorted(
+        name for name in os.listdir(cache.directory) if name.endswith(".arrow")
+    )
+
+
+def sales_frame(rows=3):
+    """Painel por modelo com o número de linhas informado"""
+    return pd.DataFrame(
+        {"modelo": [f"Modelo {i}" for i in range(rows)], "valor_total": range(rows)}
+    )
+
+
+class TestDiskResultCache:
+    def test_round_trip(self, tmp_path):
+        """DataFrames, dicionários de DataFrames e objetos voltam iguais"""
+        cache = DiskResultCache(str(tmp_path))
+        frame = sales_frame()
+        panels = {"total": sales_frame(1), "modelos": sales_frame(2)}
+        cache.set(("frame", ()), frame)
+        cache.set(("panels", ()), panels)
+        cache.set(("object", ()), {"estado": ["SP"]})
+
+        state, value = cache.lookup(("frame", ()))
+        assert state == "fresh"
+        pd.testing.assert_frame_equal(value, frame)
+        state, value = cache.lookup(("panels", ()))
+        assert list(value) == ["total", "modelos"]
+        pd.testing.assert_frame_equal(value["modelos"], panels["modelos"])
+        assert cache.lookup(("object", ())) == ("fresh", {"estado": ["SP"]})
+        assert len(arrow_files(cache)) == 3
+
+    def test_shared_between_instances(self, tmp_path):
+        """Outra instância no mesmo diretório vê as gravações"""
+        DiskResultCache(str(tmp_path)).set(("a", ()), 1)
+        assert DiskResultCache(str(tmp_path)).get(("a", ())) == (True, 1)
+
+    def test_replacing_removes_previous_files(self, tmp_path):
+        """Uma nova versão apaga os arquivos da anterior"""
+        cache = DiskResultCache(str(tmp_path))
+        cache.set(("a", ()), sales_frame())
+        first = arrow_files(cache)
+        cache.set(("a", ()), sales_frame(5))
+        assert len(arrow_files(cache)) == 1
+        assert arrow_files(cache) != first
+        assert len(cache.get(("a", ()))[1]) == 5
+
+    def test_stale_and_expiry(self, tmp_path, clock):
+        """Depois do TTL a entrada fica stale por stale_ttl e depois some"""
+        cache = DiskResultCache(str(tmp_path), default_ttl=10, stale_ttl=5)
+        cache.set(("a", ()), "v")
+        clock[0] += 12
+        assert cache.lookup(("a", ())) == ("stale", "v")
+        clock[0] += 5
+        assert cache.lookup(("a", ())) == (None, None)
+        assert cache.stats()["stale_hits"] == 1
+
+    def test_evicts_least_recently_used(self, tmp_path, clock):
+        """Acima de max_bytes, sai a entrada acessada há mais tempo"""
+        probe = DiskResultCache(str(tmp_path / "probe"))
+        probe.set(("a", ()), sales_frame())
+        size = probe.stats()["bytes"]
+
+        cache = DiskResultCache(str(tmp_path / "cache"), max_bytes=size * 2)
+        cache.set(("a", ()), sales_frame())
+        clock[0] += 10
+        cache.set(("b", ()), sales_frame())
+        clock[0] += 10
+        cache.get(("a", ()))
+        clock[0] += 10
+        cache.set(("c", ()), sales_frame())
+        assert cache.get(("b", ()))[0] is False
+        assert cache.get(("a", ()))[0] and cache.get(("c", ()))[0]
+        assert cache.stats()["evictions"] == 1
+        assert len(arrow_files(cache)) == 2
+
+    def test_oversized_value_drops_previous(self, tmp_path):
+        """Um valor maior que o cache não deixa o anterior em uso"""
+        cache = DiskResultCache(str(tmp_path), max_bytes=4096)
+        cache.set(("a", ()), sales_frame(1))
+        assert cache.get(("a", ()))[0]
+        cache.set(("a", ()), sales_frame(5000))
+        assert cache.get(("a", ())) == (False, None)
+        assert cache.stats()["entries"] == 0
+        assert arrow_files(cache) == []
+
+    def test_invalidate_by_method(self, tmp_path):
+        """invalidate remove as entradas e os arquivos do método"""
+        cache = DiskResultCache(str(tmp_path))
+        cache.set(("a", (1,)), sales_frame())
+        cache.set(("a", (2,)), sales_frame())
+        cache.set(("b", ()), sales_frame())
+        cache.invalidate("a")
+        assert cache.stats()["entries"] == 1
+        assert len(arrow_files(cache)) == 1
+        cache.invalidate()
+        assert cache.stats()["entries"] == 0
+        assert arrow_files(cache) == []
+
+    def test_claim_is_exclusive(self, tmp_path, clock):
+        """Só o primeiro processo recebe a reserva até ela vencer"""
+        first = DiskResultCache(str(tmp_path))
+        second = DiskResultCache(str(tmp_path))
+        assert first.claim("prewarm", 60)
+        assert not second.claim("prewarm", 60)
+        clock[0] += 61
+        assert second.claim("prewarm", 60)
@@ -0,0 +1,61 @@
+"""
+Testes da redução de séries por LTTB (downsampling.py)
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from downsampling import downsample, lttb_indices
+from visualizations import SalesVisualizations
+
+
+def daily_series(n):
+    """Série diária com um pico isolado no meio"""
+    values = np.sin(np.linspace(0, 20, n))
+    values[n // 2] = 50
+    return pd.DataFrame(
+        {
+            "periodo": pd.date_range("2020-01-01", periods=n, freq="D"),
+            "valor_total": values * 1000,
+            "quantidade_vendida": np.arange(n) % 7,
+        }
+    )
+
+
+class TestLttb:
+    def test_short_series_unchanged(self):
+        """Séries com até threshold pontos ficam inteiras"""
+        assert list(lttb_indices(np.arange(5), np.arange(5), 10)) == [0, 1, 2, 3, 4]
+        assert list(lttb_indices(np.arange(5), np.arange(5), 2)) == [0, 1, 2, 3, 4]
+
+    def test_keeps_endpoints_and_peak(self):
+        """Mantém primeiro, último e o pico, em ordem crescente"""
+        data = daily_series(5000)
+        indices = lttb_indices(
+            data["periodo"].to_numpy(), data["valor_total"].to_numpy(), 100
+        )
+        assert len(indices) == 100
+        assert indices[0] == 0 and indices[-1] == 4999
+        assert 2500 in indices
+        assert (np.diff(indices) > 0).all()
+
+    def test_downsample_frame(self):
+        """downsample devolve as linhas escolhidas; 0 desativa"""
+        data = daily_series(300)
+        assert len(downsample(data, "periodo", "valor_total", 50)) == 50
+        assert downsample(data, "periodo", "valor_total", 0) is data
+
+
+class TestTrendChart:
+    def test_webgl_for_long_series(self):
+        """Séries longas, mesmo reduzidas, são desenhadas com WebGL"""
+        viz = SalesVisualizations(figure_cache=False)
+        fig = viz.create_sales_trend_chart(daily_series(5000))
+        assert all(isinstance(trace, go.Scattergl) for trace in fig.data)
+        assert len(fig.data[0].x) == 1000
+
+    def test_svg_for_short_series(self):
+        viz = SalesVisualizations(figure_cache=False)
+        fig = viz.create_sales_trend_chart(daily_series(100))
+        assert all(isinstance(trace, go.Scatter) for trace in fig.data)
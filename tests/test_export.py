@@ -0,0 +1,102 @@
+"""
+Testes da exportação de vendas (export.py)
+"""
+
+from datetime import datetime
+from unittest.mock import Mock
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from export import EXPORT_SCHEMA, SalesExporter
+
+START = datetime(2024, 1, 1)
+END = datetime(2024, 1, 31, 23, 59, 59)
+
+
+class StreamingSalesData:
+    """Backend sem Postgres que transmite blocos fixos e registra os filtros"""
+
+    db = None
+
+    def __init__(self, chunks, fail=False):
+        self.chunks = chunks
+        self.fail = fail
+        self.calls = []
+
+    def iter_sales_period(self, start_date, end_date, **dimensions):
+        self.calls.append(dimensions)
+        for chunk in self.chunks:
+            yield chunk
+        if self.fail:
+            raise RuntimeError("conexão perdida")
+
+
+def sales_chunk(models):
+    return pd.DataFrame(
+        {
+            "data_venda": pd.date_range("2024-01-01", periods=len(models)),
+            "modelo": pd.Categorical(models),
+            "concessionaria": "Concessionária A",
+            "vendedor": "João",
+            "cliente": "Cliente 1",
+            "valor_pago": 100.0,
+        }
+    )
+
+
+class TestSalesExporter:
+    def test_parquet_from_chunks(self, tmp_path):
+        """Blocos com categorias diferentes viram um Parquet com schema fixo"""
+        sales_data = StreamingSalesData(
+            [sales_chunk(["Civic", "Golf"]), sales_chunk(["Onix"])]
+        )
+        target = tmp_path / "vendas.parquet"
+        rows = SalesExporter(sales_data).export(
+            START, END, target, "parquet", model=["Civic", "Golf", "Onix"]
+        )
+        assert rows == 3
+        assert sales_data.calls == [{"model": ["Civic", "Golf", "Onix"]}]
+        table = pq.read_table(target)
+        assert table.schema.equals(EXPORT_SCHEMA)
+        assert table.column("modelo").to_pylist() == ["Civic", "Golf", "Onix"]
+
+    def test_empty_period_parquet(self, tmp_path):
+        """Um período sem vendas gera um Parquet válido e vazio"""
+        target = tmp_path / "vazio.parquet"
+        assert (
+            SalesExporter(StreamingSalesData([])).export_parquet(START, END, target)
+            == 0
+        )
+        table = pq.read_table(target)
+        assert table.num_rows == 0 and table.schema.equals(EXPORT_SCHEMA)
+
+    def test_failure_discards_partial_file(self, tmp_path):
+        """Uma falha no meio da transmissão não deixa arquivo parcial"""
+        sales_data = StreamingSalesData([sales_chunk(["Civic"])], fail=True)
+        for file_format in ("csv", "parquet"):
+            target = tmp_path / f"vendas.{file_format}"
+            assert (
+                SalesExporter(sales_data).export(START, END, target, file_format)
+                is None
+            )
+            assert not target.exists()
+
+    def test_local_csv(self, tmp_path):
+        """Sem Postgres, o CSV é escrito bloco a bloco com um só cabeçalho"""
+        sales_data = StreamingSalesData([sales_chunk(["Civic"]), sales_chunk(["Golf"])])
+        target = tmp_path / "vendas.csv"
+        assert SalesExporter(sales_data).export_csv(START, END, target) == 2
+        assert list(pd.read_csv(target)["modelo"]) == ["Civic", "Golf"]
+
+    def test_copy_applies_dimension_filters(self, tmp_path):
+        """O COPY usa os mesmos filtros de dimensão do dashboard"""
+        sales_data = Mock()
+        sales_data.db.copy_to.return_value = 5
+        rows = SalesExporter(sales_data).export_csv(
+            START, END, tmp_path / "vendas.csv", state=["São Paulo"]
+        )
+        assert rows == 5
+        query, params, _ = sales_data.db.copy_to.call_args.args
+        assert "ven.data_venda >= %s" in query and "ven.id_concessionarias IN" in query
+        assert params == (START, END, ["São Paulo"])
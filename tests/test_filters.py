@@ -0,0 +1,112 @@
+"""
+Testes do WHERE parametrizado dos filtros de período e dimensão (database.py)
+"""
+
+import itertools
+from datetime import date, datetime
+
+import pytest
+
+from database import DIMENSION_FILTERS, filter_values, has_filters, sales_where
+
+START = datetime(2024, 1, 1)
+END = datetime(2024, 3, 31, 23, 59, 59, 999999)
+
+# Valor de teste de cada filtro de dimensão e o trecho que o recebe
+DIMENSION_VALUES = {
+    "dealership": (["Concessionária A"], "concessionaria = ANY(['Concessionária A'])"),
+    "state": (["São Paulo", "Paraná"], "es.estado = ANY(['São Paulo', 'Paraná'])"),
+    "model": ("Civic", "FROM veiculos WHERE nome = ANY(['Civic'])"),
+    "salesperson": (["Maria"], "FROM vendedores WHERE nome = ANY(['Maria'])"),
+}
+
+
+def bind(where, params):
+    """Substitui os %s pelos parâmetros na ordem, como o driver faria"""
+    parts = where.split("%s")
+    assert len(parts) == len(params) + 1
+    bound = parts[0]
+    for value, part in zip(params, parts[1:]):
+        bound += repr(value) + part
+    return " ".join(bound.split())
+
+
+def dimension_sets():
+    names = list(DIMENSION_VALUES)
+    for size in range(len(names) + 1):
+        yield from itertools.combinations(names, size)
+
+
+class TestFilterValues:
+    @pytest.mark.parametrize(
+        "value, expected",
+        [(None, None), ([], None), ("Civic", ["Civic"]), (("A", "B"), ["A", "B"])],
+    )
+    def test_normalizes(self, value, expected):
+        assert filter_values(value) == expected
+
+    def test_has_filters(self):
+        assert not has_filters()
+        assert not has_filters(model=[], state=None)
+        assert has_filters(START, None)
+        assert has_filters(year=2024)
+        assert has_filters(salesperson=["Maria"])
+
+
+class TestSalesWhere:
+    def test_no_filters(self):
+        assert sales_where("ven") == ("", [])
+
+    @pytest.mark.parametrize("names", list(dimension_sets()), ids=str)
+    @pytest.mark.parametrize("dated", [False, True])
+    def test_dimension_combinations(self, names, dated):
+        """Cada parâmetro cai no placeholder do seu filtro, em qualquer combinação"""
+        dimensions = {name: DIMENSION_VALUES[name][0] for name in names}
+        dates = (START, END) if dated else (None, None)
+        where, params = sales_where("ven", *dates, **dimensions)
+
+        assert len(params) == len(names) + (2 if dated else 0)
+        assert where.startswith("WHERE ") == bool(params)
+
+        bound = bind(where, params)
+        if dated:
+            assert f"ven.data_venda >= {START!r} AND ven.data_venda <= {END!r}" in bound
+        else:
+            assert "data_venda" not in bound
+        for name in names:
+            key, _ = DIMENSION_FILTERS[name]
+            assert f"ven.{key} IN (" in bound
+            assert DIMENSION_VALUES[name][1] in bound
+
+    def test_parameter_order_follows_conditions(self):
+        """Datas, ano e dimensões entram nos parâmetros na ordem do WHERE"""
+        where, params = sales_where(
+            "ven", START, END, 2024, model=["Civic"], dealership=["Concessionária A"]
+        )
+        assert params == [
+            START,
+            END,
+            date(2024, 1, 1),
+            date(2025, 1, 1),
+            ["Civic"],
+            ["Concessionária A"],
+        ]
+        assert where.index("id_veiculos") < where.index("id_concessionarias")
+        bound = bind(where, params)
+        assert (
+            "ven.data_venda >= datetime.date(2024, 1, 1) AND "
+            "ven.data_venda < datetime.date(2025, 1, 1)" in bound
+        )
+
+    def test_empty_dimensions_are_ignored(self):
+        assert sales_where("ven", model=[], state=None) == ("", [])
+
+    def test_rollup_uses_whole_days(self):
+        """No rollup, as datas viram dias e as dimensões usam o mesmo alias"""
+        where, params = sales_where("r", START, END, rollup=True, state=["Paraná"])
+        assert params == [date(2024, 1, 1), date(2024, 3, 31), ["Paraná"]]
+        assert bind(where, params).startswith(
+            "WHERE r.dia >= datetime.date(2024, 1, 1) AND "
+            "r.dia <= datetime.date(2024, 3, 31) AND r.id_concessionarias IN ("
+        )
+        assert sales_where("r", datetime(2024, 1, 1, 12), None, rollup=True) is None
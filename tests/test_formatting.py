@@ -0,0 +1,68 @@
+"""
+Testes da formatação brasileira de valores, números e datas (formatting.py)
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from formatting import format_brl, format_dates, format_number
+
+
+def legacy_brl(value):
+    """Formatação anterior, valor a valor, usada como referência"""
+    return f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+class TestFormatBrl:
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            (0, "R$ 0,00"),
+            (1234.5, "R$ 1.234,50"),
+            (-1234567.891, "R$ -1.234.567,89"),
+            (999.995, "R$ 1.000,00"),
+            # O produto por 100 cai em ...0,5 mas o valor exato está acima
+            (829224.405, "R$ 829.224,41"),
+            # Empates exatos em binário vão para o par, como no f-string
+            (0.125, "R$ 0,12"),
+            (0.375, "R$ 0,38"),
+        ],
+    )
+    def test_scalar(self, value, expected):
+        assert format_brl(value) == expected
+        assert legacy_brl(value) == expected
+
+    def test_matches_legacy_rounding(self):
+        """Valores com mais de duas casas arredondam como o f-string"""
+        values = np.random.default_rng(7).uniform(0, 1e7, 100_000).round(3)
+        values = np.concatenate([values, np.arange(100_000) / 1000 + 0.005])
+        formatted = format_brl(pd.Series(values))
+        assert formatted.tolist() == [legacy_brl(v) for v in values]
+
+    def test_series_keeps_index_and_missing(self):
+        """Series mantém o índice; valores ausentes ficam ausentes"""
+        formatted = format_brl(pd.Series([1.0, None], index=[10, 20]))
+        assert list(formatted.index) == [10, 20]
+        assert formatted[10] == "R$ 1,00" and pd.isna(formatted[20])
+
+    def test_no_negative_zero(self):
+        """Negativos que arredondam para zero não exibem sinal"""
+        assert format_brl(-0.004) == "R$ 0,00"
+
+
+class TestFormatNumber:
+    def test_thousands(self):
+        assert format_number(1234567) == "1.234.567"
+        assert format_number(0) == "0"
+        assert format_number(1234.5678, decimals=2) == "1.234,57"
+
+
+class TestFormatDates:
+    def test_dates_and_times(self):
+        values = pd.Series([datetime(2024, 1, 5, 14, 30), pd.NaT])
+        assert format_dates(values)[0] == "05/01/2024"
+        assert format_dates(values, with_time=True)[0] == "05/01/2024 14:30"
+        assert pd.isna(format_dates(values)[1])
@@ -0,0 +1,105 @@
+"""
+Testes dos agregados incrementais (incremental.py)
+"""
+
+import pandas as pd
+
+from incremental import DELTA_QUERY, WATERMARK_QUERY, IncrementalAggregates
+
+
+class FakeDatabase:
+    """Responde às consultas de marca d'água e de delta com lotes fixos"""
+
+    def __init__(self):
+        self.max_id = None
+        self.delta = pd.DataFrame()
+        self.ranges = []
+
+    def execute_query(self, query, params=None):
+        if query == WATERMARK_QUERY:
+            return pd.DataFrame(
+                {"max_id": [self.max_id], "max_data": [pd.Timestamp("2024-02-01")]}
+            )
+        assert query == DELTA_QUERY
+        self.ranges.append(params)
+        return self.delta
+
+
+def model_delta(rows):
+    """Delta do painel por modelo: (id, modelo, quantidade, valor)"""
+    return pd.DataFrame(
+        {
+            "painel": "sales_by_model",
+            "id_veiculos": [r[0] for r in rows],
+            "modelo": [r[1] for r in rows],
+            "quantidade_vendida": [r[2] for r in rows],
+            "valor_total": [r[3] for r in rows],
+        }
+    )
+
+
+class TestIncrementalAggregates:
+    def test_empty_table(self):
+        """Sem vendas, nada é agregado"""
+        aggregates = IncrementalAggregates(FakeDatabase())
+        assert aggregates.refresh() == 0
+        assert aggregates.get("sales_by_model").empty
+        assert aggregates.get_total().empty
+
+    def test_merges_deltas_above_watermark(self):
+        """Deltas somam contagens e valores e recalculam a média"""
+        db = FakeDatabase()
+        aggregates = IncrementalAggregates(db)
+
+        db.max_id = 3
+        db.delta = model_delta([(1, "Civic", 2, 100.0), (2, "Golf", 1, 30.0)])
+        assert aggregates.refresh() == 3
+
+        db.max_id = 5
+        db.delta = model_delta([(1, "Civic", 1, 50.0), (3, "Onix", 1, 20.0)])
+        assert aggregates.refresh() == 2
+        assert db.ranges == [(0, 3), (3, 5)]
+
+        panel = aggregates.get("sales_by_model")
+        assert list(panel["modelo"]) == ["Civic", "Golf", "Onix"]
+        assert list(panel["quantidade_vendida"]) == [3, 1, 1]
+        assert list(panel["valor_total"]) == [150.0, 30.0, 20.0]
+        assert list(panel["valor_medio"]) == [50.0, 30.0, 20.0]
+        assert panel["quantidade_vendida"].dtype == "int64"
+
+        total = aggregates.get_total()
+        assert total["total_vendas"].iloc[0] == 5
+        assert total["valor_total_vendas"].iloc[0] == 200.0
+
+    def test_skips_when_watermark_unchanged(self):
+        """Sem vendas novas, a consulta de delta não é executada"""
+        db = FakeDatabase()
+        aggregates = IncrementalAggregates(db)
+        db.max_id = 2
+        db.delta = model_delta([(1, "Civic", 2, 100.0)])
+        aggregates.refresh()
+        assert aggregates.refresh() == 0
+        assert db.ranges == [(0, 2)]
+
+    def test_gap_advances_watermark(self):
+        """Uma faixa de ids sem vendas não é varrida de novo"""
+        db = FakeDatabase()
+        aggregates = IncrementalAggregates(db)
+        db.max_id = 4
+        db.delta = model_delta([])
+        assert aggregates.refresh() == 0
+        assert aggregates.watermark_id == 4
+        assert aggregates.refresh() == 0
+        assert db.ranges == [(0, 4)]
+
+    def test_failed_delta_keeps_watermark(self):
+        """Se a consulta de delta falha, a mesma faixa é lida no próximo refresh"""
+        db = FakeDatabase()
+        aggregates = IncrementalAggregates(db)
+        db.max_id = 2
+        assert aggregates.refresh() == 0
+        assert aggregates.watermark_id == 0
+
+        db.delta = model_delta([(1, "Civic", 2, 100.0)])
+        assert aggregates.refresh() == 2
+        assert db.ranges == [(0, 2), (0, 2)]
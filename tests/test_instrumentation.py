@@ -0,0 +1,83 @@
+"""
+Testes das métricas por chamada (instrumentation.py)
+"""
+
+import pandas as pd
+
+from instrumentation import CallContext, QueryStats, current_call, track_call
+
+
+def metric(text, name):
+    """Valor de uma linha de métrica do texto do Prometheus"""
+    for line in text.splitlines():
+        if line.startswith(name + " ") or line.startswith(name + "{"):
+            return float(line.rsplit(" ", 1)[1])
+    raise KeyError(name)
+
+
+def record(stats, method, duration, rows=1, hit=False, error=None):
+    call = CallContext(method)
+    call.cache_hit = hit
+    if error:
+        call.errors.append(error)
+    stats.record(call, duration, pd.DataFrame({"x": range(rows)}))
+
+
+class TestQueryStats:
+    def test_track_call_sets_current_call(self):
+        """track_call expõe a chamada em andamento e restaura a anterior"""
+        assert current_call() is None
+        with track_call("get_total_sales") as call:
+            assert current_call() is call
+        assert current_call() is None
+
+    def test_summary_uses_recent_calls(self):
+        """Os percentis consideram só as chamadas no buffer"""
+        stats = QueryStats(capacity=2)
+        for duration in (10.0, 0.001, 0.003):
+            record(stats, "get_total_sales", duration)
+        summary = stats.summary().iloc[0]
+        assert summary["chamadas"] == 2
+        assert summary["p99_ms"] < 10
+
+    def test_prometheus_counters_never_decrease(self):
+        """Os contadores seguem crescendo depois que o buffer dá a volta"""
+        stats = QueryStats(capacity=2)
+        label = '{method="get_total_sales"}'
+        previous = None
+        for i in range(5):
+            record(stats, "get_total_sales", 0.5, rows=3, hit=i % 2 == 0, error="x")
+            text = stats.to_prometheus()
+            current = {
+                name: metric(text, f"sales_query_{name}{label}")
+                for name in (
+                    "rows_total",
+                    "cache_hits_total",
+                    "errors_total",
+                    "duration_seconds_sum",
+                    "duration_seconds_count",
+                )
+            }
+            if previous is not None:
+                assert all(current[k] >= previous[k] for k in current)
+            previous = current
+
+        assert current["rows_total"] == 15
+        assert current["cache_hits_total"] == 3
+        assert current["errors_total"] == 5
+        assert current["duration_seconds_count"] == 5
+        assert current["duration_seconds_sum"] == 2.5
+        assert "# TYPE sales_query_rows_total counter" in text
+
+    def test_clear_keeps_totals(self):
+        """clear esvazia o buffer sem zerar os contadores"""
+        stats = QueryStats()
+        record(stats, "get_total_sales", 0.1)
+        stats.clear()
+        assert stats.records().empty
+        assert stats.totals()["get_total_sales"]["calls"] == 1
+        text = stats.to_prometheus()
+        assert (
+            metric(text, 'sales_query_duration_seconds_count{method="get_total_sales"}')
+            == 1
+        )
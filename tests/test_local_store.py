@@ -0,0 +1,186 @@
+"""
+Testes do snapshot local e do backend em pandas (local_store.py)
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from database import ResultCache, SalesData
+from local_store import LocalSalesData, LocalStore
+
+
+class SnapshotDatabase:
+    """Banco falso que responde o SELECT de cada tabela do snapshot"""
+
+    def __init__(self, sales):
+        self.tables = {
+            "estados": pd.DataFrame(
+                {"id_estados": [1], "estado": ["São Paulo"], "sigla": ["SP"]}
+            ),
+            "cidades": pd.DataFrame(
+                {"id_cidades": [1], "cidade": ["Campinas"], "id_estados": [1]}
+            ),
+            "concessionarias": pd.DataFrame(
+                {
+                    "id_concessionarias": [1, 2],
+                    "concessionaria": ["Concessionária A", "Concessionária B"],
+                    "id_cidades": [1, 1],
+                }
+            ),
+            "veiculos": pd.DataFrame({"id_veiculos": [1], "nome": ["Civic"]}),
+            "vendedores": pd.DataFrame(
+                {
+                    "id_vendedores": [1, 2],
+                    "nome": ["João", "Maria"],
+                    "id_concessionarias": [1, 1],
+                }
+            ),
+            "clientes": pd.DataFrame({"id_clientes": [1], "cliente": ["Cliente 1"]}),
+            "vendas": sales,
+        }
+
+    def execute_query(self, query, params=None):
+        return self.tables[query.rsplit(" ", 1)[-1]]
+
+
+def make_sales(values, salespeople=1, dealerships=1, dates=None):
+    """Vendas do único modelo com os valores informados, uma por dia"""
+    if dates is None:
+        dates = pd.date_range("2024-01-01", periods=len(values))
+    return pd.DataFrame(
+        {
+            "id_vendas": range(1, len(values) + 1),
+            "id_veiculos": 1,
+            "id_concessionarias": dealerships,
+            "id_vendedores": salespeople,
+            "id_clientes": 1,
+            "valor_pago": values,
+            "data_venda": pd.to_datetime(dates),
+        }
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LocalStore(str(tmp_path))
+    store.sync(SnapshotDatabase(make_sales([100.0, 200.0])))
+    return store
+
+
+class TestLocalSalesData:
+    def test_reads_snapshot_without_database(self, store):
+        """O backend local responde a partir dos arquivos Parquet"""
+        data = LocalSalesData(store.directory, cache=ResultCache())
+        assert data.connected and data.db is None
+        assert data.cube is None and data.incremental is None
+        total = data.get_total_sales()
+        assert total["total_vendas"].iloc[0] == 2
+        assert total["valor_total_vendas"].iloc[0] == 300.0
+
+    def test_missing_snapshot(self, tmp_path):
+        """Sem sincronização, o backend fica desconectado"""
+        data = LocalSalesData(str(tmp_path), cache=False)
+        assert not data.connected
+        assert data.get_total_sales().empty
+
+    def test_count_is_exact(self, store):
+        """A contagem local não é estimativa, então o app não mostra "≈" nela"""
+        data = LocalSalesData(store.directory, cache=False)
+        assert data.exact_count and not SalesData.exact_count
+        assert data.get_sales_count_estimate() == 2
+
+    def test_resync_invalidates_cached_results(self, store):
+        """Uma nova sincronização descarta resultados ainda dentro do TTL"""
+        cache = ResultCache(default_ttl=3600)
+        data = LocalSalesData(store.directory, cache=cache)
+        assert data.get_total_sales()["total_vendas"].iloc[0] == 2
+
+        store.sync(SnapshotDatabase(make_sales([100.0, 200.0, 300.0])))
+        total = data.get_total_sales()
+        assert total["total_vendas"].iloc[0] == 3
+        assert total["valor_total_vendas"].iloc[0] == 600.0
+
+    def test_first_load_keeps_shared_cache(self, store):
+        """Carregar o snapshot pela primeira vez não apaga o cache de outros"""
+        cache = ResultCache(default_ttl=3600)
+        cache.set(("get_sales_heatmap", ()), "de outro processo")
+        data = LocalSalesData(store.directory, cache=cache)
+        assert data.get_total_sales()["total_vendas"].iloc[0] == 2
+        assert cache.get(("get_sales_heatmap", ())) == (True, "de outro processo")
+
+    def test_filters_by_salesperson(self, tmp_path):
+        """O filtro de vendedor vale para os agregados e para as listagens"""
+        store = LocalStore(str(tmp_path))
+        store.sync(SnapshotDatabase(make_sales([100.0, 200.0, 300.0], [1, 2, 2])))
+        data = LocalSalesData(store.directory, cache=False)
+
+        total = data.get_total_sales(salesperson=["Maria"])
+        assert total["total_vendas"].iloc[0] == 2
+        assert total["valor_total_vendas"].iloc[0] == 500.0
+        recent = pd.concat(data.iter_recent_sales(salesperson=["João"]))
+        assert list(recent["vendedor"]) == ["João"]
+        assert list(recent["valor_pago"]) == [100.0]
+        assert data.get_filter_options()["salesperson"] == ["João", "Maria"]
+
+
+class TestLocalHeatmap:
+    def test_dense_matrix_with_zero_fill(self, tmp_path):
+        """Matriz concessionária × mês com zero nas células sem vendas"""
+        store = LocalStore(str(tmp_path))
+        sales = make_sales(
+            [100.0, 50.0, 30.0],
+            dealerships=[1, 1, 2],
+            dates=["2024-01-05", "2024-01-20", "2024-03-10"],
+        )
+        store.sync(SnapshotDatabase(sales))
+        data = LocalSalesData(store.directory, cache=False)
+
+        heatmap = data.get_sales_heatmap(
+            datetime(2024, 1, 1), datetime(2024, 4, 30, 23, 59)
+        )
+        assert heatmap.shape == (2, 4)
+        assert list(heatmap.index) == ["Concessionária A", "Concessionária B"]
+        assert isinstance(heatmap.columns, pd.DatetimeIndex)
+        assert list(heatmap.columns) == list(
+            pd.date_range("2024-01-01", periods=4, freq="MS")
+        )
+        assert heatmap.loc["Concessionária A"].tolist() == [150.0, 0.0, 0.0, 0.0]
+        assert heatmap.loc["Concessionária B"].tolist() == [0.0, 0.0, 30.0, 0.0]
+
+    def test_no_sales(self, store):
+        """Sem vendas no período, o heatmap fica vazio"""
+        data = LocalSalesData(store.directory, cache=False)
+        assert data.get_sales_heatmap(datetime(2030, 1, 1), None).empty
+
+
+class TestLocalTimeseries:
+    @pytest.fixture
+    def data(self, tmp_path):
+        store = LocalStore(str(tmp_path))
+        sales = make_sales(
+            [100.0, 50.0, 30.0], dates=["2024-01-05", "2024-01-20", "2024-05-10"]
+        )
+        store.sync(SnapshotDatabase(sales))
+        return LocalSalesData(store.directory, cache=False)
+
+    def test_month_gaps_are_zero(self, data):
+        """Meses sem vendas entram com zero entre a primeira e a última venda"""
+        series = data.get_sales_timeseries("month")
+        assert list(series["periodo"]) == list(
+            pd.date_range("2024-01-01", "2024-05-01", freq="MS")
+        )
+        assert list(series["quantidade_vendida"]) == [2, 0, 0, 0, 1]
+        assert list(series["valor_total"]) == [150.0, 0.0, 0.0, 0.0, 30.0]
+
+    def test_quarter_calendar_follows_period(self, data):
+        """Com o período informado, o calendário vai do trimestre inicial ao final"""
+        series = data.get_sales_timeseries(
+            "quarter", datetime(2023, 11, 1), datetime(2024, 9, 30, 23, 59)
+        )
+        assert list(series["periodo"]) == list(
+            pd.to_datetime(["2023-10-01", "2024-01-01", "2024-04-01", "2024-07-01"])
+        )
+        assert list(series["quantidade_vendida"]) == [0, 2, 1, 0]
+        assert series["valor_total"].dtype == "float64"
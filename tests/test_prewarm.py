@@ -0,0 +1,109 @@
+"""
+Testes do pré-aquecimento do cache (prewarm.py)
+"""
+
+from unittest.mock import Mock
+
+import pandas as pd
+import pytest
+
+from database import QueryError, ResultCache, SalesData, cached_query
+from instrumentation import current_call
+from prewarm import CacheWarmer
+
+
+class FlakyDatabase:
+    """Banco falso que falha como DatabaseConnection.execute_query"""
+
+    def __init__(self):
+        self.failing = False
+
+    def execute_query(self, query, params=None):
+        if self.failing:
+            current_call().errors.append("conexão recusada")
+            return pd.DataFrame()
+        return pd.DataFrame({"total_vendas": [10]})
+
+
+class WarmSalesData(SalesData):
+    """SalesData com uma consulta e o banco falso"""
+
+    def _connect(self, db_config):
+        self.db = FlakyDatabase()
+        return True
+
+    @cached_query
+    def get_total_sales(self):
+        return self.db.execute_query("SELECT")
+
+
+@pytest.fixture
+def sales_data():
+    return WarmSalesData(cache=ResultCache(), incremental=False, cube=False)
+
+
+def make_warmer(sales_data, **kwargs):
+    queries = {"total": ("get_total_sales", ())}
+    return CacheWarmer(sales_data, queries, interval=10, jitter=0, **kwargs)
+
+
+class TestCacheWarmer:
+    def test_round_fills_cache(self, sales_data):
+        warmer = make_warmer(sales_data)
+        assert warmer.run_once() == 0
+        assert sales_data.cache.stats()["entries"] == 1
+        assert warmer.backoff == 1 and warmer.delay() == 10
+
+    def test_database_error_reaches_warmer(self, sales_data):
+        """Erros do banco chegam ao refresh_query em vez de um resultado vazio"""
+        sales_data.db.failing = True
+        with pytest.raises(QueryError, match="conexão recusada"):
+            sales_data.refresh_query("get_total_sales")
+
+    def test_backs_off_on_errors(self, sales_data):
+        """Rodadas com erro dobram o intervalo até max_backoff"""
+        warmer = make_warmer(sales_data, max_backoff=4)
+        warmer.run_once()
+        sales_data.db.failing = True
+        assert warmer.run_once() == 1
+        assert warmer.backoff == 2
+        warmer.run_once()
+        warmer.run_once()
+        assert warmer.backoff == 4 and warmer.delay() == 40
+        assert warmer.stats()["erros"] == 3
+
+        # O resultado anterior continua no cache durante as falhas
+        assert sales_data.get_total_sales()["total_vendas"].iloc[0] == 10
+
+        sales_data.db.failing = False
+        assert warmer.run_once() == 0
+        assert warmer.backoff == 1
+
+    def test_backs_off_when_slow(self):
+        sales_data = Mock()
+        warmer = CacheWarmer(sales_data, {"q": ("m", ())}, slow_after=-1)
+        warmer.run_once()
+        assert warmer.backoff == 2
+
+
+class TestStaleWhileRevalidate:
+    def test_stale_result_is_revalidated(self):
+        """Um acerto stale devolve o valor antigo e recalcula em segundo plano"""
+        cache = ResultCache(ttls={"get_total_sales": 0}, stale_ttl=60)
+        sales_data = WarmSalesData(cache=cache, incremental=False, cube=False)
+        sales_data.db.execute_query = Mock(
+            side_effect=[
+                pd.DataFrame({"total_vendas": [1]}),
+                pd.DataFrame({"total_vendas": [2]}),
+            ]
+        )
+        assert sales_data.get_total_sales()["total_vendas"].iloc[0] == 1
+        assert sales_data.get_total_sales()["total_vendas"].iloc[0] == 1
+        sales_data._executor.shutdown(wait=True)
+        assert sales_data.db.execute_query.call_count == 2
+        assert (
+            cache.lookup(cache.make_key("get_total_sales", {}))[1]["total_vendas"].iloc[
+                0
+            ]
+            == 2
+        )
@@ -0,0 +1,115 @@
+"""
+Testes dos limites de período atendidos pelo rollup diário (rollups.py)
+"""
+
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from database import SalesData, sales_where
+from instrumentation import current_call
+from rollups import ROLLUP_VIEW, VIEW_STATUS, day_bounds, recent_days
+
+
+class TestDayBounds:
+    def test_whole_days(self):
+        """Início à meia-noite e fim às 23:59:59.999999 viram dias inteiros"""
+        start = datetime(2024, 1, 1)
+        end = datetime(2024, 1, 31, 23, 59, 59, 999999)
+        assert day_bounds(start, end) == (date(2024, 1, 1), date(2024, 1, 31))
+        assert day_bounds(date(2024, 1, 1), None) == (date(2024, 1, 1), None)
+
+    def test_partial_days(self):
+        """Limites no meio do dia não podem ser atendidos pelo rollup"""
+        assert day_bounds(datetime(2024, 1, 1, 12, 30), None) is None
+        assert day_bounds(None, datetime(2024, 1, 31, 12, 30)) is None
+
+
+class TestRecentDays:
+    @pytest.mark.parametrize("days", [30, 90, 365])
+    def test_presets_use_the_rollup(self, days):
+        """Os períodos prontos do dashboard caem em dias inteiros"""
+        start, end = recent_days(days, today=date(2024, 6, 15))
+        assert (end.date() - start.date()).days == days
+        assert end.date() == date(2024, 6, 15)
+        assert day_bounds(start, end) is not None
+
+        where, params = sales_where("r", start, end, rollup=True)
+        assert where == "WHERE r.dia >= %s AND r.dia <= %s"
+        assert params == [start.date(), date(2024, 6, 15)]
+
+    def test_defaults_to_today(self):
+        """Sem data de referência, o período termina no fim de hoje"""
+        start, end = recent_days(30)
+        assert end.date() == date.today()
+        assert day_bounds(start, end) is not None
+
+
+class RollupDatabase:
+    """Banco falso em que o rollup pode não existir ou falhar na consulta"""
+
+    def __init__(self, exists=True, broken=False):
+        self.exists = exists
+        self.broken = broken
+        self.status_checks = 0
+        self.sources = []
+
+    def execute_query(self, query, params=None):
+        if query == VIEW_STATUS:
+            self.status_checks += 1
+            return pd.DataFrame({"ispopulated": [True]} if self.exists else {})
+        source = "rollup" if ROLLUP_VIEW in query else "vendas"
+        self.sources.append(source)
+        if source == "rollup" and self.broken:
+            # Como execute_query: erro registrado na chamada e DataFrame vazio
+            current_call().errors.append("relation does not exist")
+            return pd.DataFrame()
+        return pd.DataFrame(
+            {"total_vendas": [2], "valor_total_vendas": [300.0], "fonte": [source]}
+        )
+
+
+class RollupSalesData(SalesData):
+    def _connect(self, db_config):
+        self.db = db_config
+        return True
+
+
+def rollup_sales_data(db):
+    return RollupSalesData(
+        cache=False, incremental=False, use_rollups=True, db_config=db, cube=False
+    )
+
+
+class TestRollupFallback:
+    def test_uses_rollup_when_present(self):
+        """Com a view populada, períodos em dias inteiros vão para o rollup"""
+        db = RollupDatabase()
+        data = rollup_sales_data(db)
+        start, end = recent_days(30, today=date(2024, 6, 15))
+        data.get_total_sales(start, end)
+        data.get_total_sales()
+        assert db.sources == ["rollup", "rollup"]
+        assert db.status_checks == 1
+
+    def test_missing_view_uses_sales(self):
+        """Sem a view, as consultas seguem para vendas; a verificação é guardada"""
+        db = RollupDatabase(exists=False)
+        data = rollup_sales_data(db)
+        assert data.get_total_sales()["fonte"].iloc[0] == "vendas"
+        data.get_sales_timeseries("month")
+        assert db.sources == ["vendas", "vendas"]
+        assert db.status_checks == 1
+
+    def test_failing_rollup_query_falls_back(self):
+        """Uma falha no rollup é refeita sobre vendas, sem erro na chamada"""
+        db = RollupDatabase(broken=True)
+        data = rollup_sales_data(db)
+        total = data.get_total_sales.refresh(data)
+        assert total["fonte"].iloc[0] == "vendas"
+        assert db.sources == ["rollup", "vendas"]
+
+        data.get_sales_by_model()
+        assert db.sources == ["rollup", "vendas", "vendas"]
+        assert data.stats.summary()["erros"].sum() == 0
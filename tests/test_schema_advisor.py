@@ -0,0 +1,88 @@
+"""
+Testes da verificação de índices recomendados (schema_advisor.py)
+"""
+
+import pandas as pd
+import pytest
+
+from schema_advisor import (
+    RECOMMENDED_INDEXES,
+    SchemaAdvisor,
+    covers,
+    create_statement,
+)
+
+BY_NAME = {spec["name"]: spec for spec in RECOMMENDED_INDEXES}
+DATE_INDEX = BY_NAME["idx_vendas_data_venda_id_vendas"]
+MODEL_INDEX = BY_NAME["idx_vendas_id_veiculos"]
+
+
+def index(columns, keys):
+    """Linha de EXISTING_INDEXES; None marca uma coluna de expressão"""
+    return {"tabela": "vendas", "indice": "i", "n_chaves": keys, "colunas": columns}
+
+
+class TestCovers:
+    @pytest.mark.parametrize(
+        "existing, expected",
+        [
+            (index(["data_venda", "id_vendas", "valor_pago"], 2), True),
+            (index(["data_venda", "id_vendas", "id_veiculos", "valor_pago"], 3), True),
+            (index(["data_venda", "id_vendas", "valor_pago"], 3), True),
+            (index(["data_venda", "id_vendas"], 2), False),
+            (index(["id_vendas", "data_venda", "valor_pago"], 3), False),
+            (index(["data_venda", "valor_pago", "id_vendas"], 1), False),
+            # Expressão na chave: a coluna incluída não sobe para a chave
+            (index([None, "data_venda", "id_vendas", "valor_pago"], 3), False),
+            (index(["data_venda", None, "id_vendas", "valor_pago"], 3), False),
+        ],
+    )
+    def test_key_prefix_and_include(self, existing, expected):
+        """A chave precisa começar pelas colunas recomendadas e ter as incluídas"""
+        assert covers(existing, DATE_INDEX) is expected
+
+    def test_expression_does_not_shift_keys(self):
+        """Uma expressão antes da coluna não faz o INCLUDE contar como chave"""
+        existing = index([None, "id_veiculos", "valor_pago"], 2)
+        assert not covers(existing, MODEL_INDEX)
+        assert covers(index(["id_veiculos", None, "valor_pago"], 2), MODEL_INDEX)
+
+
+class TestCreateStatement:
+    def test_with_include(self):
+        assert create_statement(MODEL_INDEX, concurrently=True) == (
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_vendas_id_veiculos "
+            "ON vendas (id_veiculos) INCLUDE (valor_pago)"
+        )
+
+    def test_without_include(self):
+        spec = BY_NAME["idx_cidades_id_estados"]
+        assert create_statement(spec) == (
+            "CREATE INDEX IF NOT EXISTS idx_cidades_id_estados ON cidades (id_estados)"
+        )
+
+
+class IndexDatabase:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute_query(self, query, params=None):
+        return pd.DataFrame(self.rows)
+
+
+class TestSchemaAdvisor:
+    def test_missing(self):
+        """Só os índices não atendidos pelos existentes são listados"""
+        rows = [
+            index(["data_venda", "id_vendas", "valor_pago"], 2),
+            index([None, "id_veiculos", "valor_pago"], 2),
+        ]
+        missing = {
+            spec["name"] for spec in SchemaAdvisor(IndexDatabase(rows)).missing()
+        }
+        assert DATE_INDEX["name"] not in missing
+        assert MODEL_INDEX["name"] in missing
+        assert len(missing) == len(RECOMMENDED_INDEXES) - 1
+
+    def test_no_indexes(self):
+        assert SchemaAdvisor(IndexDatabase([])).missing() == RECOMMENDED_INDEXES
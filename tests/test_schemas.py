@@ -0,0 +1,101 @@
+"""
+Testes dos tipos declarados para os resultados de SalesData (schemas.py)
+"""
+
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from schemas import SCHEMAS, apply_schema, cast_frame
+
+
+def decimal_total(value=Decimal("300.50")):
+    """Total como o psycopg2 devolve sem conversão: contagem e DECIMALs"""
+    return pd.DataFrame(
+        {
+            "total_vendas": [Decimal(2)],
+            "valor_total_vendas": [value],
+            "valor_medio_venda": [value / 2 if value is not None else None],
+        }
+    )
+
+
+class TestCastFrame:
+    def test_decimal_to_native(self):
+        """DECIMAL vira float64 e a contagem, int64"""
+        total = apply_schema("get_total_sales", decimal_total())
+        assert total["total_vendas"].dtype == "int64"
+        assert total["valor_total_vendas"].dtype == "float64"
+        assert total["valor_total_vendas"].iloc[0] == 300.5
+        assert total["valor_medio_venda"].iloc[0] == 150.25
+
+    def test_null_sum_becomes_nan(self):
+        """SUM/AVG nulos (período sem vendas) viram NaN"""
+        total = apply_schema("get_total_sales", decimal_total(None))
+        assert total["valor_total_vendas"].dtype == "float64"
+        assert np.isnan(total["valor_total_vendas"].iloc[0])
+
+    def test_missing_columns_are_ignored(self):
+        """Só as colunas presentes são convertidas; as demais ficam como estão"""
+        frame = pd.DataFrame({"modelo": ["Civic"], "valor_total": [Decimal("10")]})
+        result = cast_frame(frame, SCHEMAS["get_sales_by_model"])
+        assert list(result.columns) == ["modelo", "valor_total"]
+        assert result["valor_total"].dtype == "float64"
+        assert result["modelo"].dtype == frame["modelo"].dtype
+
+    def test_empty_and_typed_frames_are_returned_as_is(self):
+        """DataFrames vazios ou já tipados não são copiados"""
+        empty = pd.DataFrame()
+        assert cast_frame(empty, SCHEMAS["get_total_sales"]) is empty
+        typed = apply_schema("get_total_sales", decimal_total())
+        assert cast_frame(typed, SCHEMAS["get_total_sales"]) is typed
+
+    def test_sales_rows_use_categories(self):
+        """Nas linhas de venda, os nomes viram categorias"""
+        rows = pd.DataFrame(
+            {"modelo": ["Civic", "Civic"], "valor_pago": [Decimal("1.5")] * 2}
+        )
+        result = apply_schema("get_recent_sales", rows)
+        assert isinstance(result["modelo"].dtype, pd.CategoricalDtype)
+        assert result["valor_pago"].dtype == "float64"
+
+
+class TestApplySchema:
+    def test_snapshot_panels(self):
+        """No snapshot, cada painel recebe o schema do método equivalente"""
+        snapshot = {
+            "total_sales": decimal_total(),
+            "sales_by_model": pd.DataFrame(
+                {
+                    "modelo": ["Civic"],
+                    "quantidade_vendida": [Decimal(2)],
+                    "valor_total": [Decimal("300.50")],
+                    "valor_medio": [Decimal("150.25")],
+                }
+            ),
+            "sales_by_salesperson": pd.DataFrame(),
+            "extra": "mantido",
+        }
+        result = apply_schema("get_dashboard_snapshot", snapshot)
+        assert result["total_sales"]["valor_total_vendas"].dtype == "float64"
+        model = result["sales_by_model"]
+        assert model["quantidade_vendida"].dtype == "int64"
+        assert model["valor_medio"].dtype == "float64"
+        assert result["sales_by_salesperson"].empty
+        assert result["extra"] == "mantido"
+
+    def test_estimate_keeps_margins(self):
+        """A estimativa converte também as margens de erro"""
+        total = decimal_total().assign(
+            margem_quantidade=[Decimal("0.5")], margem_valor=[Decimal("12.3")]
+        )
+        result = apply_schema("get_dashboard_estimate", {"total_sales": total})
+        assert result["total_sales"]["margem_valor"].dtype == "float64"
+
+    def test_unknown_method_and_other_values(self):
+        """Métodos sem schema e valores que não são DataFrame passam direto"""
+        frame = pd.DataFrame({"x": [Decimal(1)]})
+        assert apply_schema("get_filter_options", frame) is frame
+        assert apply_schema("get_sales_count_estimate", 42) == 42
+        assert apply_schema("get_total_sales", None) is None
@@ -0,0 +1,89 @@
+"""
+Testes do cache de figuras por hash do DataFrame (visualizations.py)
+"""
+
+import json
+
+import pandas as pd
+import plotly.io as pio
+import pytest
+
+from database import ResultCache
+from visualizations import SalesVisualizations, frame_fingerprint
+
+
+def sales_by_model():
+    """Painel por modelo no formato de get_sales_by_model"""
+    return pd.DataFrame(
+        {
+            "modelo": ["Civic", "Golf", "Onix"],
+            "quantidade_vendida": [3, 2, 1],
+            "valor_total": [300.0, 150.0, 60.0],
+            "valor_medio": [100.0, 75.0, 60.0],
+        }
+    )
+
+
+class TestFrameFingerprint:
+    def test_equal_frames(self):
+        """Conteúdos iguais têm o mesmo hash, mesmo em objetos diferentes"""
+        assert frame_fingerprint(sales_by_model()) == frame_fingerprint(
+            sales_by_model()
+        )
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            lambda frame: frame.assign(valor_total=[300.0, 150.0, 61.0]),
+            lambda frame: frame.astype({"quantidade_vendida": "int32"}),
+            lambda frame: frame.set_axis([1, 2, 3]),
+            lambda frame: frame.rename(columns={"valor_medio": "media"}),
+        ],
+        ids=["valores", "tipo", "indice", "colunas"],
+    )
+    def test_changed_frame(self, change):
+        """Valores, tipos, índice ou colunas diferentes mudam o hash"""
+        frame = sales_by_model()
+        assert frame_fingerprint(change(frame)) != frame_fingerprint(frame)
+
+
+class TestCachedFigure:
+    @pytest.fixture
+    def viz(self):
+        return SalesVisualizations(figure_cache=ResultCache(default_ttl=float("inf")))
+
+    def test_hit_returns_equivalent_figure(self, viz):
+        """O acerto remonta a mesma figura a partir do JSON guardado"""
+        first = viz.create_sales_by_model_chart(sales_by_model())
+        second = viz.create_sales_by_model_chart(sales_by_model())
+        assert viz.figure_cache.stats()["hits"] == 1
+        assert second is not first
+        assert json.loads(pio.to_json(second)) == json.loads(pio.to_json(first))
+
+    def test_changed_data_misses(self, viz):
+        """Um DataFrame diferente gera outra figura"""
+        viz.create_sales_by_model_chart(sales_by_model())
+        changed = sales_by_model().assign(quantidade_vendida=[1, 2, 3])
+        fig = viz.create_sales_by_model_chart(changed)
+        assert viz.figure_cache.stats()["hits"] == 0
+        assert list(fig.data[0].y) == [1, 2, 3]
+
+    def test_parameters_are_part_of_the_key(self, viz):
+        """Os parâmetros do gráfico entram na chave junto com o hash"""
+        trend = pd.DataFrame(
+            {
+                "periodo": pd.date_range("2024-01-01", periods=3, freq="MS"),
+                "quantidade_vendida": [1, 2, 3],
+                "valor_total": [10.0, 20.0, 30.0],
+            }
+        )
+        viz.create_sales_trend_chart(trend, "month")
+        viz.create_sales_trend_chart(trend, "quarter")
+        assert viz.figure_cache.stats()["hits"] == 0
+        viz.create_sales_trend_chart(trend, "month")
+        assert viz.figure_cache.stats()["hits"] == 1
+
+    def test_disabled_cache(self):
+        viz = SalesVisualizations(figure_cache=False)
+        assert viz.figure_cache is None
+        assert viz.create_sales_by_model_chart(sales_by_model()) is not None
@@ -1,12 +1,85 @@
+import functools
+import hashlib
+import inspect
+import json
+
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import pandas as pd
 
+from config import FIGURE_CACHE_CONFIG, TREND_CHART_CONFIG
+from database import ResultCache
+from downsampling import downsample
+from formatting import format_brl, format_number
+
+# Rótulo de cada granularidade de SalesData.get_sales_timeseries
+GRANULARITY_LABELS = {
+    "day": "Dia",
+    "week": "Semana",
+    "month": "Mês",
+    "quarter": "Trimestre",
+}
+
+
+def frame_fingerprint(frame):
+    """Hash rápido do conteúdo de um DataFrame: valores, índice, colunas e tipos"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(str(c), str(t)) for c, t in frame.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def figure_cache_from_config():
+    """Cria o cache de figuras a partir de FIGURE_CACHE_CONFIG, ou None"""
+    if not FIGURE_CACHE_CONFIG["enabled"]:
+        return None
+    # A chave identifica o conteúdo da entrada, então a figura nunca expira
+    return ResultCache(
+        max_bytes=FIGURE_CACHE_CONFIG["max_bytes"], default_ttl=float("inf")
+    )
+
+
+def cached_figure(method):
+    """Memoiza um create_* pelo hash do DataFrame e pelos parâmetros do gráfico
+
+    Guarda o JSON da figura no cache da instância (self.figure_cache). Num
+    acerto a figura é remontada sem validação, que já ocorreu na criação,
+    em vez de refazer o gráfico do plotly express.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, data, *args, **kwargs):
+        if self.figure_cache is None or data.empty:
+            return method(self, data, *args, **kwargs)
+
+        bound = signature.bind(self, data, *args, **kwargs)
+        bound.apply_defaults()
+        params = dict(bound.arguments)
+        params.pop("self")
+        params["data"] = frame_fingerprint(data)
+
+        key = self.figure_cache.make_key(method.__name__, params)
+        found, spec = self.figure_cache.get(key)
+        if found:
+            return go.Figure(json.loads(spec), _validate=False)
+
+        fig = method(self, data, *args, **kwargs)
+        if fig is not None:
+            self.figure_cache.set(key, pio.to_json(fig, validate=False))
+        return fig
+
+    return wrapper
+
 
 class SalesVisualizations:
-    def __init__(self):
-        pass
+    def __init__(self, figure_cache=None):
+        """figure_cache=False desativa o cache de figuras"""
+        if figure_cache is None:
+            figure_cache = figure_cache_from_config()
+        self.figure_cache = figure_cache or None
 
     def create_total_sales_card(self, data):
         """Cria cards com métricas totais"""
@@ -17,24 +90,13 @@ class SalesVisualizations:
         valor_total = data["valor_total_vendas"].iloc[0]
         valor_medio = data["valor_medio_venda"].iloc[0]
 
-        # Formatação dos valores
-        valor_total_fmt = (
-            f"R$ {valor_total:,.2f}".replace(",", "X")
-            .replace(".", ",")
-            .replace("X", ".")
-        )
-        valor_medio_fmt = (
-            f"R$ {valor_medio:,.2f}".replace(",", "X")
-            .replace(".", ",")
-            .replace("X", ".")
-        )
-
         return {
             "total_vendas": total_vendas,
-            "valor_total": valor_total_fmt,
-            "valor_medio": valor_medio_fmt,
+            "valor_total": format_brl(valor_total),
+            "valor_medio": format_brl(valor_medio),
         }
 
+    @cached_figure
     def create_sales_by_model_chart(self, data):
         """Cria gráfico de vendas por modelo"""
         if data.empty:
@@ -57,24 +119,27 @@ class SalesVisualizations:
 
         return fig
 
+    @cached_figure
     def create_sales_by_month_chart(self, data):
-        """Cria gráfico de vendas por mês"""
+        """Cria gráfico de vendas por mês a partir de get_sales_timeseries("month")"""
         if data.empty:
             return None
 
         fig = px.line(
             data,
-            x="nome_mes",
+            x="periodo",
             y="quantidade_vendida",
             title="Vendas por Mês",
-            labels={"nome_mes": "Mês", "quantidade_vendida": "Quantidade Vendida"},
+            labels={"periodo": "Mês", "quantidade_vendida": "Quantidade Vendida"},
             markers=True,
         )
 
         fig.update_layout(xaxis_tickangle=-45, height=400)
+        fig.update_xaxes(tickformat="%b/%Y")
 
         return fig
 
+    @cached_figure
     def create_sales_by_dealership_chart(self, data):
         """Cria gráfico de vendas por concessionária"""
         if data.empty:
@@ -101,6 +166,7 @@ class SalesVisualizations:
 
         return fig
 
+    @cached_figure
     def create_sales_by_salesperson_chart(self, data):
         """Cria gráfico de vendas por vendedor"""
         if data.empty:
@@ -124,43 +190,44 @@ class SalesVisualizations:
 
         return fig
 
-    def create_sales_trend_chart(self, data):
-        """Cria gráfico de tendência de vendas ao longo do tempo"""
+    @cached_figure
+    def create_sales_trend_chart(self, data, granularity="day", max_points=None):
+        """Cria gráfico de tendência a partir de get_sales_timeseries
+
+        Séries longas são reduzidas por LTTB a max_points pontos (padrão em
+        TREND_CHART_CONFIG; 0 desativa) e, acima do limite configurado,
+        desenhadas com WebGL (Scattergl).
+        """
         if data.empty:
             return None
 
-        # Agrupa por data e soma as vendas
-        daily_sales = (
-            data.groupby(data["data_venda"].dt.date)
-            .agg({"valor_pago": "sum"})
-            .reset_index()
-        )
-
-        # Adiciona contagem de vendas
-        daily_sales["quantidade"] = (
-            data.groupby(data["data_venda"].dt.date).size().values
-        )
-
-        # Renomeia as colunas
-        daily_sales = daily_sales.rename(
-            columns={"data_venda": "data", "valor_pago": "valor_total"}
+        if max_points is None:
+            max_points = TREND_CHART_CONFIG["max_points"]
+        value_data = downsample(data, "periodo", "valor_total", max_points)
+        count_data = downsample(data, "periodo", "quantidade_vendida", max_points)
+        points = max(len(value_data), len(count_data))
+        scatter = (
+            go.Scattergl
+            if points > TREND_CHART_CONFIG["webgl_threshold"]
+            else go.Scatter
         )
 
+        label = GRANULARITY_LABELS[granularity]
         fig = make_subplots(
             rows=2,
             cols=1,
             subplot_titles=(
-                "Valor Total de Vendas por Dia",
-                "Quantidade de Vendas por Dia",
+                f"Valor Total de Vendas por {label}",
+                f"Quantidade de Vendas por {label}",
             ),
             vertical_spacing=0.1,
         )
 
         # Gráfico de valor total
         fig.add_trace(
-            go.Scatter(
-                x=daily_sales["data"],
-                y=daily_sales["valor_total"],
+            scatter(
+                x=value_data["periodo"],
+                y=value_data["valor_total"],
                 mode="lines+markers",
                 name="Valor Total",
                 line=dict(color="blue"),
@@ -171,9 +238,9 @@ class SalesVisualizations:
 
         # Gráfico de quantidade
         fig.add_trace(
-            go.Scatter(
-                x=daily_sales["data"],
-                y=daily_sales["quantidade"],
+            scatter(
+                x=count_data["periodo"],
+                y=count_data["quantidade_vendida"],
                 mode="lines+markers",
                 name="Quantidade",
                 line=dict(color="red"),
@@ -190,6 +257,7 @@ class SalesVisualizations:
 
         return fig
 
+    @cached_figure
     def create_pie_chart_models(self, data):
         """Cria gráfico de pizza para distribuição de modelos"""
         if data.empty:
@@ -209,27 +277,20 @@ class SalesVisualizations:
 
         return fig
 
+    @cached_figure
     def create_heatmap_dealership_month(self, data):
-        """Cria heatmap de vendas por concessionária e mês"""
-        if data.empty:
-            return None
+        """Cria heatmap de vendas por concessionária e mês
 
-        # Verifica se as colunas necessárias existem
-        required_columns = ["concessionaria", "nome_mes", "valor_total"]
-        if not all(col in data.columns for col in required_columns):
+        Recebe a matriz de get_sales_heatmap (concessionárias nas linhas,
+        meses nas colunas), desenhada sem pivotar.
+        """
+        if data.empty:
             return None
 
-        # Pivot table para heatmap
-        pivot_data = data.pivot_table(
-            values="valor_total",
-            index="concessionaria",
-            columns="nome_mes",
-            aggfunc="sum",
-            fill_value=0,
-        )
-
         fig = px.imshow(
-            pivot_data,
+            data.to_numpy(),
+            x=data.columns.strftime("%m/%Y"),
+            y=data.index,
             title="Heatmap de Vendas por Concessionária e Mês",
             labels=dict(x="Mês", y="Concessionária", color="Valor Total (R$)"),
             aspect="auto",
@@ -240,9 +301,9 @@ class SalesVisualizations:
         return fig
 
     def format_currency(self, value):
-        """Formata valor para moeda brasileira"""
-        return f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        """Formata valor (ou Series inteira) para moeda brasileira"""
+        return format_brl(value)
 
     def format_number(self, value):
-        """Formata número com separadores de milhares"""
-        return f"{value:,.0f}".replace(",", ".")
+        """Formata número (ou Series inteira) com separadores de milhares"""
+        return format_number(value)